@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import aiohttp
+from open_webui.config import (
+    ENABLE_OLLAMA_CHAT_AFFINITY,
+    OLLAMA_HEALTH_CHECK_INTERVAL,
+)
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.session_pool import CLIENT_SESSIONS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
+
+# Consecutive failures before a backend is taken out of rotation
+FAILURE_THRESHOLD = 2
+# Seconds an unhealthy backend is skipped before it gets another chance
+FAILURE_COOLDOWN = 30
+EWMA_ALPHA = 0.3
+MAX_CHAT_AFFINITY_ENTRIES = 10000
+
+
+class BackendStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.last_failure_at = 0.0
+        self.last_probe_at: Optional[float] = None
+        self.loaded_models: set[str] = set()
+
+    def is_healthy(self) -> bool:
+        return (
+            self.consecutive_failures < FAILURE_THRESHOLD
+            or time.monotonic() - self.last_failure_at > FAILURE_COOLDOWN
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "healthy": self.is_healthy(),
+            "in_flight": self.in_flight,
+            "latency_ewma": self.latency_ewma,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.consecutive_failures,
+            "loaded_models": sorted(self.loaded_models),
+        }
+
+
+class OllamaBalancer:
+    """
+    Picks an Ollama backend for a model among the urls that serve it.
+
+    Healthy backends are preferred, then backends that already have the
+    model loaded (from /api/ps probes), then the least loaded one by
+    in-flight requests and latency EWMA. With chat affinity enabled a chat
+    stays on the backend that served its previous turn while it is healthy.
+    """
+
+    def __init__(self, chat_affinity: bool = ENABLE_OLLAMA_CHAT_AFFINITY):
+        self.chat_affinity = chat_affinity
+        self.stats: dict[str, BackendStats] = {}
+        self.chats: OrderedDict[str, str] = OrderedDict()
+        self.probe_task: Optional[asyncio.Task] = None
+
+    def get_stats(self, url: str) -> BackendStats:
+        if url not in self.stats:
+            self.stats[url] = BackendStats()
+        return self.stats[url]
+
+    def select(
+        self,
+        urls: list[str],
+        model: Optional[str] = None,
+        chat_id: Optional[str] = None,
+    ) -> str:
+        candidates = [url for url in urls if self.get_stats(url).is_healthy()]
+        if not candidates:
+            # Everything looks down; let the request surface the real error
+            candidates = list(urls)
+
+        if self.chat_affinity and chat_id:
+            url = self.chats.get(chat_id)
+            if url in candidates:
+                self.chats.move_to_end(chat_id)
+                return url
+
+        if model:
+            loaded = [
+                url for url in candidates if model in self.get_stats(url).loaded_models
+            ]
+            if loaded:
+                candidates = loaded
+
+        def load(url: str):
+            stats = self.get_stats(url)
+            return (stats.in_flight, stats.latency_ewma or 0.0)
+
+        least = min(load(url) for url in candidates)
+        url = random.choice([url for url in candidates if load(url) == least])
+
+        if self.chat_affinity and chat_id:
+            self.chats[chat_id] = url
+            self.chats.move_to_end(chat_id)
+            while len(self.chats) > MAX_CHAT_AFFINITY_ENTRIES:
+                self.chats.popitem(last=False)
+
+        return url
+
+    def begin(self, url: str) -> float:
+        stats = self.get_stats(url)
+        stats.in_flight += 1
+        stats.requests += 1
+        return time.monotonic()
+
+    def end(self, url: str):
+        stats = self.get_stats(url)
+        stats.in_flight = max(0, stats.in_flight - 1)
+
+    def record_success(self, url: str, start: Optional[float] = None):
+        stats = self.get_stats(url)
+        stats.consecutive_failures = 0
+        if start is not None:
+            latency = time.monotonic() - start
+            stats.latency_ewma = (
+                latency
+                if stats.latency_ewma is None
+                else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats.latency_ewma
+            )
+
+    def record_failure(self, url: str):
+        stats = self.get_stats(url)
+        stats.errors += 1
+        stats.consecutive_failures += 1
+        stats.last_failure_at = time.monotonic()
+
+    async def probe(self, url: str):
+        stats = self.get_stats(url)
+        stats.last_probe_at = time.time()
+        try:
+            session = CLIENT_SESSIONS.get_session(url)
+            async with session.get(
+                f"{url}/api/ps", timeout=aiohttp.ClientTimeout(total=5)
+            ) as r:
+                r.raise_for_status()
+                data = await r.json()
+
+            stats.loaded_models = {
+                model.get("model", model.get("name"))
+                for model in data.get("models", [])
+            }
+            stats.consecutive_failures = 0
+        except Exception as e:
+            log.warning(f"Ollama health check failed for {url}: {e}")
+            self.record_failure(url)
+
+    async def _run_probes(self, get_urls: Callable[[], list[str]]):
+        while True:
+            urls = [url for url in get_urls() if url]
+
+            # Forget backends that were removed from the config
+            for url in list(self.stats.keys()):
+                if url not in urls:
+                    del self.stats[url]
+
+            await asyncio.gather(*[self.probe(url) for url in urls])
+            await asyncio.sleep(OLLAMA_HEALTH_CHECK_INTERVAL)
+
+    def start(self, get_urls: Callable[[], list[str]]):
+        if OLLAMA_HEALTH_CHECK_INTERVAL <= 0:
+            return
+        if self.probe_task is None or self.probe_task.done():
+            self.probe_task = asyncio.create_task(self._run_probes(get_urls))
+
+    async def stop(self):
+        if self.probe_task and not self.probe_task.done():
+            self.probe_task.cancel()
+            try:
+                await self.probe_task
+            except asyncio.CancelledError:
+                pass
+
+    def to_dict(self) -> dict:
+        return {
+            "chat_affinity": self.chat_affinity,
+            "chats": len(self.chats),
+            "urls": {url: stats.to_dict() for url, stats in self.stats.items()},
+        }
+
+
+OLLAMA_BALANCER = OllamaBalancer()
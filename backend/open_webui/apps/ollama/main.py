@@ -2,17 +2,16 @@ import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 from urllib.parse import urlparse
 
 import aiohttp
 import requests
+from open_webui.apps.ollama.balancer import OLLAMA_BALANCER
 from open_webui.apps.webui.models.models import Models
 from open_webui.config import (
-    AIOHTTP_CLIENT_TIMEOUT,
     CORS_ALLOW_ORIGIN,
     ENABLE_MODEL_FILTER,
     ENABLE_OLLAMA_API,
@@ -24,9 +23,10 @@ from open_webui.config import (
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from fastapi import Depends, FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, ValidationError
 from starlette.background import BackgroundTask
 
 
@@ -38,6 +38,12 @@ from open_webui.utils.payload import (
     apply_model_params_to_body_openai,
     apply_model_system_prompt_to_body,
 )
+from open_webui.utils.chat_request import (
+    get_chat_request_body,
+    get_chat_request_openapi_extra,
+)
+from open_webui.utils.model_registry import MODEL_REGISTRY
+from open_webui.utils.session_pool import CLIENT_SESSIONS, release_response
 from open_webui.utils.utils import get_admin_user, get_verified_user
 
 log = logging.getLogger(__name__)
@@ -62,11 +68,6 @@ app.state.config.OLLAMA_BASE_URLS = OLLAMA_BASE_URLS
 app.state.MODELS = {}
 
 
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
-
 @app.middleware("http")
 async def check_url(request: Request, call_next):
     if len(app.state.MODELS) == 0:
@@ -96,6 +97,7 @@ class OllamaConfigForm(BaseModel):
 @app.post("/config/update")
 async def update_config(form_data: OllamaConfigForm, user=Depends(get_admin_user)):
     app.state.config.ENABLE_OLLAMA_API = form_data.enable_ollama_api
+    MODEL_REGISTRY.invalidate()
     return {"ENABLE_OLLAMA_API": app.state.config.ENABLE_OLLAMA_API}
 
 
@@ -111,41 +113,57 @@ class UrlUpdateForm(BaseModel):
 @app.post("/urls/update")
 async def update_ollama_api_url(form_data: UrlUpdateForm, user=Depends(get_admin_user)):
     app.state.config.OLLAMA_BASE_URLS = form_data.urls
+    MODEL_REGISTRY.invalidate()
 
     log.info(f"app.state.config.OLLAMA_BASE_URLS: {app.state.config.OLLAMA_BASE_URLS}")
     return {"OLLAMA_BASE_URLS": app.state.config.OLLAMA_BASE_URLS}
 
 
+@app.get("/urls/stats")
+async def get_ollama_api_url_stats(user=Depends(get_admin_user)):
+    return OLLAMA_BALANCER.to_dict()
+
+
 async def fetch_url(url):
     timeout = aiohttp.ClientTimeout(total=5)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(url) as response:
-                return await response.json()
+        session = CLIENT_SESSIONS.get_session(url)
+        async with session.get(url, timeout=timeout) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+async def finish_streaming_response(
+    response: aiohttp.ClientResponse,
+    base_url: Optional[str] = None,
+    on_finish: Optional[Callable[[], None]] = None,
 ):
-    if response:
-        response.close()
-    if session:
-        await session.close()
+    await release_response(response)
+    if base_url:
+        OLLAMA_BALANCER.end(base_url)
+    if on_finish:
+        on_finish()
 
 
 async def post_streaming_url(
-    url: str, payload: Union[str, bytes], stream: bool = True, content_type=None
+    url: str,
+    payload: Union[str, bytes],
+    stream: bool = True,
+    content_type=None,
+    base_url: Optional[str] = None,
+    on_finish: Optional[Callable[[], None]] = None,
 ):
+    # `base_url` is the configured backend the request is routed to; when set,
+    # in-flight requests, latency and failures are tracked for load balancing.
+    # `on_finish` is called once a successful response has been fully read.
     r = None
+    start = OLLAMA_BALANCER.begin(base_url) if base_url else None
+    streaming = False
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = CLIENT_SESSIONS.get_session(url)
         r = await session.post(
             url,
             data=payload,
@@ -153,7 +171,11 @@ async def post_streaming_url(
         )
         r.raise_for_status()
 
+        if base_url:
+            OLLAMA_BALANCER.record_success(base_url, start)
+
         if stream:
+            streaming = True
             headers = dict(r.headers)
             if content_type:
                 headers["Content-Type"] = content_type
@@ -162,15 +184,23 @@ async def post_streaming_url(
                 status_code=r.status,
                 headers=headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    finish_streaming_response,
+                    response=r,
+                    base_url=base_url,
+                    on_finish=on_finish,
                 ),
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await release_response(r)
+            if on_finish:
+                on_finish()
             return res
 
     except Exception as e:
+        if base_url and (r is None or r.status >= 500):
+            OLLAMA_BALANCER.record_failure(base_url)
+
         error_detail = "Open WebUI: Server Connection Error"
         if r is not None:
             try:
@@ -179,11 +209,15 @@ async def post_streaming_url(
                     error_detail = f"Ollama: {res['error']}"
             except Exception:
                 error_detail = f"Ollama: {e}"
+            await release_response(r)
 
         raise HTTPException(
             status_code=r.status if r else 500,
             detail=error_detail,
         )
+    finally:
+        if base_url and not streaming:
+            OLLAMA_BALANCER.end(base_url)
 
 
 def merge_models_lists(model_lists):
@@ -342,7 +376,9 @@ async def pull_model(
     # Admin should be able to pull models from any source
     payload = {**form_data.model_dump(exclude_none=True), "insecure": True}
 
-    return await post_streaming_url(f"{url}/api/pull", json.dumps(payload))
+    return await post_streaming_url(
+        f"{url}/api/pull", json.dumps(payload), on_finish=MODEL_REGISTRY.invalidate
+    )
 
 
 class PushModelForm(BaseModel):
@@ -392,7 +428,9 @@ async def create_model(
     log.info(f"url: {url}")
 
     return await post_streaming_url(
-        f"{url}/api/create", form_data.model_dump_json(exclude_none=True).encode()
+        f"{url}/api/create",
+        form_data.model_dump_json(exclude_none=True).encode(),
+        on_finish=MODEL_REGISTRY.invalidate,
     )
 
 
@@ -431,6 +469,7 @@ async def copy_model(
 
         log.debug(f"r.text: {r.text}")
 
+        MODEL_REGISTRY.invalidate()
         return True
     except Exception as e:
         log.exception(e)
@@ -479,6 +518,7 @@ async def delete_model(
 
         log.debug(f"r.text: {r.text}")
 
+        MODEL_REGISTRY.invalidate()
         return True
     except Exception as e:
         log.exception(e)
@@ -505,8 +545,7 @@ async def show_model_info(form_data: ModelNameForm, user=Depends(get_verified_us
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(app.state.MODELS[form_data.name]["urls"])
-    url = app.state.config.OLLAMA_BASE_URLS[url_idx]
+    url = get_ollama_url(None, form_data.name)
     log.info(f"url: {url}")
 
     r = requests.request(
@@ -559,7 +598,7 @@ async def generate_embeddings(
             model = f"{model}:latest"
 
         if model in app.state.MODELS:
-            url_idx = random.choice(app.state.MODELS[model]["urls"])
+            url_idx = select_url_idx(model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -596,58 +635,57 @@ async def generate_embeddings(
         )
 
 
-def generate_ollama_embeddings(
-    form_data: GenerateEmbeddingsForm,
-    url_idx: Optional[int] = None,
-):
-    log.info(f"generate_ollama_embeddings {form_data}")
+class GenerateEmbedForm(BaseModel):
+    model: str
+    input: Union[str, list[str]]
+    truncate: Optional[bool] = None
+    options: Optional[dict] = None
+    keep_alive: Optional[Union[int, str]] = None
+
 
+async def generate_ollama_batch_embeddings(
+    form_data: GenerateEmbedForm,
+    session: aiohttp.ClientSession,
+    url_idx: Optional[int] = None,
+) -> list[list[float]]:
+    """
+    Embed one or more texts in a single request using the `/api/embed`
+    input list form. Raises on failure so callers can retry.
+    """
     if url_idx is None:
         model = form_data.model
 
         if ":" not in model:
             model = f"{model}:latest"
 
-        if model in app.state.MODELS:
-            url_idx = random.choice(app.state.MODELS[model]["urls"])
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.model),
-            )
-
-    url = app.state.config.OLLAMA_BASE_URLS[url_idx]
-    log.info(f"url: {url}")
+        url = get_ollama_url(url_idx, model)
+    else:
+        url = app.state.config.OLLAMA_BASE_URLS[url_idx]
 
-    r = requests.request(
-        method="POST",
-        url=f"{url}/api/embeddings",
-        headers={"Content-Type": "application/json"},
+    async with session.post(
+        f"{url}/api/embed",
         data=form_data.model_dump_json(exclude_none=True).encode(),
-    )
-    try:
-        r.raise_for_status()
-
-        data = r.json()
-
-        log.info(f"generate_ollama_embeddings {data}")
-
-        if "embedding" in data:
-            return data["embedding"]
-        else:
-            raise Exception("Something went wrong :/")
-    except Exception as e:
-        log.exception(e)
-        error_detail = "Open WebUI: Server Connection Error"
-        if r is not None:
+        headers={"Content-Type": "application/json"},
+    ) as r:
+        if r.status >= 400:
+            # Proxies answer 502/503 with an HTML body, keep the status
             try:
-                res = r.json()
-                if "error" in res:
-                    error_detail = f"Ollama: {res['error']}"
+                data = await r.json(content_type=None)
+                error_detail = data.get("error") if isinstance(data, dict) else None
             except Exception:
-                error_detail = f"Ollama: {e}"
+                error_detail = None
+            raise aiohttp.ClientResponseError(
+                r.request_info,
+                r.history,
+                status=r.status,
+                message=f"Ollama: {error_detail or r.reason}",
+            )
 
-        raise Exception(error_detail)
+        data = await r.json(content_type=None)
+        if "embeddings" in data:
+            return data["embeddings"]
+        else:
+            raise Exception("Ollama: embeddings missing from response")
 
 
 class GenerateCompletionForm(BaseModel):
@@ -678,7 +716,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in app.state.MODELS:
-            url_idx = random.choice(app.state.MODELS[model]["urls"])
+            url_idx = select_url_idx(model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -689,7 +727,9 @@ async def generate_completion(
     log.info(f"url: {url}")
 
     return await post_streaming_url(
-        f"{url}/api/generate", form_data.model_dump_json(exclude_none=True).encode()
+        f"{url}/api/generate",
+        form_data.model_dump_json(exclude_none=True).encode(),
+        base_url=url,
     )
 
 
@@ -709,22 +749,48 @@ class GenerateChatCompletionForm(BaseModel):
     keep_alive: Optional[Union[int, str]] = None
 
 
-def get_ollama_url(url_idx: Optional[int], model: str):
+async def get_chat_completion_form(
+    body: dict = Depends(get_chat_request_body),
+) -> GenerateChatCompletionForm:
+    # Validate the body already parsed by the chat middlewares
+    try:
+        return GenerateChatCompletionForm(**body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+def select_url_idx(model: str, chat_id: Optional[str] = None) -> int:
+    urls = app.state.config.OLLAMA_BASE_URLS
+    url_idxs = [idx for idx in app.state.MODELS[model]["urls"] if idx < len(urls)]
+
+    url = OLLAMA_BALANCER.select(
+        [urls[idx] for idx in url_idxs], model=model, chat_id=chat_id
+    )
+    return urls.index(url)
+
+
+def get_ollama_url(url_idx: Optional[int], model: str, chat_id: Optional[str] = None):
     if url_idx is None:
         if model not in app.state.MODELS:
             raise HTTPException(
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(app.state.MODELS[model]["urls"])
+        url_idx = select_url_idx(model, chat_id)
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url
 
 
-@app.post("/api/chat")
-@app.post("/api/chat/{url_idx}")
+@app.post(
+    "/api/chat",
+    openapi_extra=get_chat_request_openapi_extra(GenerateChatCompletionForm),
+)
+@app.post(
+    "/api/chat/{url_idx}",
+    openapi_extra=get_chat_request_openapi_extra(GenerateChatCompletionForm),
+)
 async def generate_chat_completion(
-    form_data: GenerateChatCompletionForm,
+    form_data: GenerateChatCompletionForm = Depends(get_chat_completion_form),
     url_idx: Optional[int] = None,
     user=Depends(get_verified_user),
 ):
@@ -767,7 +833,10 @@ async def generate_chat_completion(
     log.debug(payload)
 
     return await post_streaming_url(
-        f"{url}/api/chat", json.dumps(payload), content_type="application/x-ndjson"
+        f"{url}/api/chat",
+        json.dumps(payload),
+        content_type="application/x-ndjson",
+        base_url=url,
     )
 
 
@@ -791,10 +860,12 @@ class OpenAIChatCompletionForm(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
-@app.post("/v1/chat/completions")
-@app.post("/v1/chat/completions/{url_idx}")
+@app.post("/v1/chat/completions", openapi_extra=get_chat_request_openapi_extra())
+@app.post(
+    "/v1/chat/completions/{url_idx}", openapi_extra=get_chat_request_openapi_extra()
+)
 async def generate_openai_chat_completion(
-    form_data: dict,
+    form_data: dict = Depends(get_chat_request_body),
     url_idx: Optional[int] = None,
     user=Depends(get_verified_user),
 ):
@@ -827,13 +898,15 @@ async def generate_openai_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url = get_ollama_url(url_idx, payload["model"])
+    chat_id = (form_data.get("metadata") or {}).get("chat_id")
+    url = get_ollama_url(url_idx, payload["model"], chat_id)
     log.info(f"url: {url}")
 
     return await post_streaming_url(
         f"{url}/v1/chat/completions",
         json.dumps(payload),
         stream=payload.get("stream", False),
+        base_url=url,
     )
 
 
@@ -974,6 +1047,7 @@ async def download_file_stream(
                             "name": file_name,
                         }
                         os.remove(file_path)
+                        MODEL_REGISTRY.invalidate()
 
                         yield f"data: {json.dumps(res)}\n\n"
                     else:
@@ -1070,6 +1144,7 @@ def upload_model(
                             "name": file.filename,
                         }
                         os.remove(file_path)
+                        MODEL_REGISTRY.invalidate()
                         yield f"data: {json.dumps(res)}\n\n"
                     else:
                         raise Exception(
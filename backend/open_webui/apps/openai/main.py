@@ -9,7 +9,6 @@ import aiohttp
 import requests
 from open_webui.apps.webui.models.models import Models
 from open_webui.config import (
-    AIOHTTP_CLIENT_TIMEOUT,
     CACHE_DIR,
     CORS_ALLOW_ORIGIN,
     ENABLE_MODEL_FILTER,
@@ -33,6 +32,12 @@ from open_webui.utils.payload import (
     apply_model_system_prompt_to_body,
 )
 
+from open_webui.utils.chat_request import (
+    get_chat_request_body,
+    get_chat_request_openapi_extra,
+)
+from open_webui.utils.model_registry import MODEL_REGISTRY
+from open_webui.utils.session_pool import CLIENT_SESSIONS, release_response
 from open_webui.utils.utils import get_admin_user, get_verified_user
 
 log = logging.getLogger(__name__)
@@ -81,6 +86,7 @@ class OpenAIConfigForm(BaseModel):
 @app.post("/config/update")
 async def update_config(form_data: OpenAIConfigForm, user=Depends(get_admin_user)):
     app.state.config.ENABLE_OPENAI_API = form_data.enable_openai_api
+    MODEL_REGISTRY.invalidate()
     return {"ENABLE_OPENAI_API": app.state.config.ENABLE_OPENAI_API}
 
 
@@ -101,6 +107,7 @@ async def get_openai_urls(user=Depends(get_admin_user)):
 async def update_openai_urls(form_data: UrlsUpdateForm, user=Depends(get_admin_user)):
     await get_all_models()
     app.state.config.OPENAI_API_BASE_URLS = form_data.urls
+    MODEL_REGISTRY.invalidate()
     return {"OPENAI_API_BASE_URLS": app.state.config.OPENAI_API_BASE_URLS}
 
 
@@ -112,6 +119,7 @@ async def get_openai_keys(user=Depends(get_admin_user)):
 @app.post("/keys/update")
 async def update_openai_key(form_data: KeysUpdateForm, user=Depends(get_admin_user)):
     app.state.config.OPENAI_API_KEYS = form_data.keys
+    MODEL_REGISTRY.invalidate()
     return {"OPENAI_API_KEYS": app.state.config.OPENAI_API_KEYS}
 
 
@@ -183,25 +191,15 @@ async def fetch_url(url, key):
     timeout = aiohttp.ClientTimeout(total=5)
     try:
         headers = {"Authorization": f"Bearer {key}"}
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(url, headers=headers) as response:
-                return await response.json()
+        session = CLIENT_SESSIONS.get_session(url)
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
-    if response:
-        response.close()
-    if session:
-        await session.close()
-
-
 def merge_models_lists(model_lists):
     log.debug(f"merge_models_lists {model_lists}")
     merged_list = []
@@ -346,10 +344,10 @@ async def get_models(url_idx: Optional[int] = None, user=Depends(get_verified_us
             )
 
 
-@app.post("/chat/completions")
-@app.post("/chat/completions/{url_idx}")
+@app.post("/chat/completions", openapi_extra=get_chat_request_openapi_extra())
+@app.post("/chat/completions/{url_idx}", openapi_extra=get_chat_request_openapi_extra())
 async def generate_chat_completion(
-    form_data: dict,
+    form_data: dict = Depends(get_chat_request_body),
     url_idx: Optional[int] = None,
     user=Depends(get_verified_user),
 ):
@@ -397,13 +395,10 @@ async def generate_chat_completion(
         headers["X-Title"] = "Open WebUI"
 
     r = None
-    session = None
     streaming = False
 
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = CLIENT_SESSIONS.get_session(url)
         r = await session.request(
             method="POST",
             url=f"{url}/chat/completions",
@@ -420,9 +415,7 @@ async def generate_chat_completion(
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(release_response, response=r),
             )
         else:
             response_data = await r.json()
@@ -440,10 +433,8 @@ async def generate_chat_completion(
                 error_detail = f"External: {e}"
         raise HTTPException(status_code=r.status if r else 500, detail=error_detail)
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await release_response(r)
 
 
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -462,11 +453,10 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     headers["Content-Type"] = "application/json"
 
     r = None
-    session = None
     streaming = False
 
     try:
-        session = aiohttp.ClientSession(trust_env=True)
+        session = CLIENT_SESSIONS.get_session(target_url)
         r = await session.request(
             method=request.method,
             url=target_url,
@@ -483,9 +473,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(release_response, response=r),
             )
         else:
             response_data = await r.json()
@@ -503,7 +491,5 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
                 error_detail = f"External: {e}"
         raise HTTPException(status_code=r.status if r else 500, detail=error_detail)
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await release_response(r)
@@ -0,0 +1,225 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from open_webui.config import CACHE_DIR
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+BM25_INDEX_DIR = Path(CACHE_DIR) / "rag" / "bm25"
+BM25_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class BM25Index:
+    """
+    Inverted BM25 index for a single vector db collection.
+
+    Only postings and document lengths are kept; the document text and
+    metadata stay in the vector db and are fetched by id for the top hits.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        # term -> {doc_id: term frequency}
+        self.postings: dict[str, dict[str, int]] = {}
+        # doc_id -> document length in tokens
+        self.doc_lens: dict[str, int] = {}
+        # doc_id -> distinct terms, so removal only touches their postings.
+        # Derived from `postings`, not persisted.
+        self.doc_terms: dict[str, list[str]] = {}
+        self.total_len = 0
+
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    def add(self, ids: list[str], texts: list[str]):
+        with self.lock:
+            for doc_id, text in zip(ids, texts):
+                if doc_id in self.doc_lens:
+                    self.remove([doc_id])
+
+                tokens = tokenize(text)
+                self.doc_lens[doc_id] = len(tokens)
+                self.total_len += len(tokens)
+
+                counts = Counter(tokens)
+                self.doc_terms[doc_id] = list(counts)
+                for term, tf in counts.items():
+                    self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, ids: list[str]):
+        with self.lock:
+            for doc_id in set(ids) & self.doc_lens.keys():
+                for term in self.doc_terms.pop(doc_id, []):
+                    postings = self.postings.get(term)
+                    if postings is None:
+                        continue
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+                self.total_len -= self.doc_lens.pop(doc_id)
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        with self.lock:
+            n = len(self.doc_lens)
+            if n == 0 or k <= 0:
+                return []
+
+            avg_len = self.total_len / n if self.total_len else 1.0
+            scores: dict[str, float] = {}
+
+            # Only the postings of the query terms are scored
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+
+                df = len(postings)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+                for doc_id, tf in postings.items():
+                    doc_len = self.doc_lens[doc_id]
+                    norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                        tf * (self.k1 + 1) / (tf + norm)
+                    )
+
+        return heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "k1": self.k1,
+                "b": self.b,
+                "postings": self.postings,
+                "doc_lens": self.doc_lens,
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        index.postings = data.get("postings", {})
+        index.doc_lens = data.get("doc_lens", {})
+        index.total_len = sum(index.doc_lens.values())
+
+        for term, postings in index.postings.items():
+            for doc_id in postings:
+                index.doc_terms.setdefault(doc_id, []).append(term)
+        return index
+
+
+class BM25IndexRegistry:
+    """
+    Loads, updates and persists one BM25Index per collection under
+    `BM25_INDEX_DIR`. Indexes for collections that predate the registry
+    are built once from the collection contents on first use.
+    """
+
+    def __init__(self, index_dir: Path = BM25_INDEX_DIR):
+        self.index_dir = index_dir
+        self.indexes: dict[str, BM25Index] = {}
+        self.lock = threading.RLock()
+
+    def _get_path(self, collection_name: str) -> Path:
+        return self.index_dir / f"{collection_name}.json"
+
+    def _save(self, collection_name: str, index: BM25Index):
+        path = self._get_path(collection_name)
+        tmp_path = path.with_suffix(".json.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(index.to_dict(), f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            log.exception(f"Failed to persist bm25 index {collection_name}: {e}")
+
+    def _load(self, collection_name: str) -> Optional[BM25Index]:
+        path = self._get_path(collection_name)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                return BM25Index.from_dict(json.load(f))
+        except Exception as e:
+            log.warning(f"Discarding unreadable bm25 index {collection_name}: {e}")
+            return None
+
+    def _build(self, collection_name: str, collection) -> BM25Index:
+        log.info(f"building bm25 index for collection {collection_name}")
+        documents = collection.get(include=["documents"])
+
+        index = BM25Index()
+        index.add(documents.get("ids", []), documents.get("documents", []))
+        self._save(collection_name, index)
+        return index
+
+    def get(self, collection_name: str, collection) -> BM25Index:
+        with self.lock:
+            index = self.indexes.get(collection_name)
+            if index is None:
+                index = self._load(collection_name)
+
+            # Rebuild if the collection was written to outside of `add`
+            # (e.g. memories upserts) and the index no longer matches it.
+            if index is None or len(index) != collection.count():
+                index = self._build(collection_name, collection)
+
+            self.indexes[collection_name] = index
+            return index
+
+    def add(self, collection_name: str, ids: list[str], texts: list[str], save=True):
+        with self.lock:
+            index = self.indexes.get(collection_name)
+            if index is None:
+                index = self._load(collection_name) or BM25Index()
+
+            index.add(ids, texts)
+            self.indexes[collection_name] = index
+            if save:
+                self._save(collection_name, index)
+
+    def save(self, collection_name: str):
+        with self.lock:
+            index = self.indexes.get(collection_name)
+            if index is not None:
+                self._save(collection_name, index)
+
+    def delete(self, collection_name: str):
+        with self.lock:
+            self.indexes.pop(collection_name, None)
+            try:
+                self._get_path(collection_name).unlink(missing_ok=True)
+            except Exception as e:
+                log.exception(e)
+
+    def reset(self):
+        with self.lock:
+            self.indexes = {}
+            for path in self.index_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except Exception as e:
+                    log.exception(e)
+
+
+BM25_INDEXES = BM25IndexRegistry()
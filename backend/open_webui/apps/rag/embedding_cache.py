@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from open_webui.config import (
+    CACHE_DIR,
+    ENABLE_RAG_EMBEDDING_DISK_CACHE,
+    RAG_EMBEDDING_CACHE_SIZE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+EMBEDDING_CACHE_DB = Path(CACHE_DIR) / "rag" / "embeddings.db"
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU of embeddings keyed by engine, model and a hash of the text.
+    When `disk` is enabled, evicted and cold entries are also looked up in a
+    sqlite file so embeddings survive restarts.
+    """
+
+    def __init__(self, max_size: int, disk: bool = False, db_path=EMBEDDING_CACHE_DB):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, list[float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db: Optional[sqlite3.Connection] = None
+        if disk:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS embedding (key TEXT PRIMARY KEY, embedding TEXT)"
+                )
+                self.db.commit()
+            except Exception as e:
+                log.exception(f"Disabling embedding disk cache: {e}")
+                self.db = None
+
+    @staticmethod
+    def get_key(engine: str, model: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{engine}:{model}:{digest}"
+
+    def get(self, key: str) -> Optional[list[float]]:
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT embedding FROM embedding WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    embedding = json.loads(row[0])
+                    self._put(key, embedding)
+                    self.disk_hits += 1
+                    return embedding
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, embedding: list[float]):
+        with self.lock:
+            self._put(key, embedding)
+            if self.db is not None:
+                try:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO embedding (key, embedding) VALUES (?, ?)",
+                        (key, json.dumps(embedding)),
+                    )
+                    self.db.commit()
+                except Exception as e:
+                    log.exception(e)
+
+    def _put(self, key: str, embedding: list[float]):
+        self.entries[key] = embedding
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM embedding")
+                self.db.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "disk": self.db is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.hits + self.disk_hits) / lookups if lookups else 0.0
+                ),
+            }
+
+
+EMBEDDING_CACHE = EmbeddingCache(
+    RAG_EMBEDDING_CACHE_SIZE, disk=ENABLE_RAG_EMBEDDING_DISK_CACHE
+)
+
+
+def get_cached_embedding_function(
+    embedding_function,
+    embedding_engine: str,
+    embedding_model: str,
+    cache: EmbeddingCache = EMBEDDING_CACHE,
+):
+    """
+    Wrap an embedding function so identical texts are only embedded once.
+    Accepts a single text or a list of texts, like the wrapped function;
+    for lists only the uncached texts are sent to the engine, in one call,
+    and an engine failing to embed them all raises.
+    """
+    if embedding_function is None or cache.max_size <= 0:
+        return embedding_function
+
+    def get_key(text: str) -> str:
+        return cache.get_key(embedding_engine, embedding_model, text)
+
+    def func(query):
+        if isinstance(query, list):
+            keys = [get_key(text) for text in query]
+            embeddings = [cache.get(key) for key in keys]
+
+            missing = [idx for idx, e in enumerate(embeddings) if e is None]
+            if missing:
+                generated = embedding_function([query[idx] for idx in missing])
+                # Engines return None when the request failed
+                if generated is None or len(generated) != len(missing):
+                    raise Exception(
+                        f"{embedding_engine or 'sentence-transformers'} returned "
+                        f"{'no' if generated is None else len(generated)} "
+                        f"embeddings for {len(missing)} texts"
+                    )
+                for idx, embedding in zip(missing, generated):
+                    embeddings[idx] = embedding
+                    if embedding is not None:
+                        cache.set(keys[idx], embedding)
+            return embeddings
+
+        key = get_key(query)
+        embedding = cache.get(key)
+        if embedding is None:
+            embedding = embedding_function(query)
+            if embedding is not None:
+                cache.set(key, embedding)
+        return embedding
+
+    return func
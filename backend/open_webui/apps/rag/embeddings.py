@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+import aiohttp
+from open_webui.apps.ollama.main import (
+    GenerateEmbedForm,
+    generate_ollama_batch_embeddings,
+)
+from open_webui.config import (
+    AIOHTTP_CLIENT_TIMEOUT,
+    RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    RAG_EMBEDDING_MAX_RETRIES,
+    RAG_EMBEDDING_OLLAMA_BATCH_SIZE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+RETRY_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class EmbeddingClient:
+    """
+    Runs remote embedding requests on a dedicated event loop thread that owns
+    one pooled aiohttp session, so the sync embedding functions used across
+    RAG can be called from request handlers, worker threads and the event
+    loop alike while still reusing connections.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = RAG_EMBEDDING_CONCURRENT_REQUESTS,
+        max_retries: int = RAG_EMBEDDING_MAX_RETRIES,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.lock = threading.Lock()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="rag-embedding", daemon=True
+                ).start()
+                self.loop = loop
+            return self.loop
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._start()).result()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency * 2),
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                trust_env=True,
+            )
+        return self.session
+
+    async def with_retries(self, func, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(*args)
+            except Exception as e:
+                transient = isinstance(
+                    e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+                ) or (
+                    isinstance(e, aiohttp.ClientResponseError)
+                    and e.status in RETRY_STATUS_CODES
+                )
+                if not transient or attempt == self.max_retries:
+                    raise
+
+                delay = min(0.5 * 2**attempt, 8)
+                log.warning(
+                    f"embedding request failed ({e}), retrying in {delay}s "
+                    f"({attempt + 1}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
+
+    async def embed_batches(self, func, texts: list[str], batch_size: int):
+        """
+        Embed `texts` in batches of `batch_size`, keeping at most
+        `max_concurrency` batches in flight, and return them in input order.
+        """
+        batch_size = max(1, batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        session = await self.get_session()
+
+        async def run(batch):
+            async with semaphore:
+                return await self.with_retries(func, session, batch)
+
+        results = await asyncio.gather(
+            *[run(texts[i : i + batch_size]) for i in range(0, len(texts), batch_size)]
+        )
+        return [embedding for batch in results for embedding in batch]
+
+
+EMBEDDING_CLIENT = EmbeddingClient()
+
+
+async def generate_openai_batch_embeddings_async(
+    session: aiohttp.ClientSession,
+    model: str,
+    texts: list[str],
+    key: str,
+    url: str = "https://api.openai.com/v1",
+) -> list[list[float]]:
+    async with session.post(
+        f"{url}/embeddings",
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+        },
+        json={"input": texts, "model": model},
+    ) as r:
+        r.raise_for_status()
+        data = await r.json()
+
+        if "data" in data:
+            return [elem["embedding"] for elem in data["data"]]
+        else:
+            raise Exception("OpenAI: embeddings missing from response")
+
+
+def generate_openai_embeddings(
+    model: str,
+    texts: list[str],
+    key: str,
+    url: str,
+    batch_size: int,
+    client: EmbeddingClient = EMBEDDING_CLIENT,
+) -> list[list[float]]:
+    async def func(session, batch):
+        return await generate_openai_batch_embeddings_async(
+            session, model, batch, key, url
+        )
+
+    return client.run(client.embed_batches(func, texts, batch_size))
+
+
+def generate_ollama_embeddings(
+    model: str,
+    texts: list[str],
+    batch_size: int = RAG_EMBEDDING_OLLAMA_BATCH_SIZE,
+    client: EmbeddingClient = EMBEDDING_CLIENT,
+) -> list[list[float]]:
+    async def func(session, batch):
+        return await generate_ollama_batch_embeddings(
+            GenerateEmbedForm(**{"model": model, "input": batch}), session
+        )
+
+    return client.run(client.embed_batches(func, texts, batch_size))
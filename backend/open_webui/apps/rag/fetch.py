@@ -0,0 +1,237 @@
+import asyncio
+import codecs
+import logging
+import re
+import urllib.parse
+from collections import defaultdict
+from html.parser import HTMLParser
+from typing import Optional, Sequence
+
+import aiohttp
+from langchain_core.documents import Document
+from open_webui.config import (
+    RAG_WEB_FETCH_CONCURRENT_REQUESTS_PER_HOST,
+    RAG_WEB_FETCH_MAX_SIZE,
+    RAG_WEB_FETCH_TIMEOUT,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+CHUNK_SIZE = 64 * 1024
+# Bytes searched for a <meta charset> when Content-Type has no charset, as
+# browsers do
+SNIFF_SIZE = 1024
+
+META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE
+)
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def sniff_charset(head: bytes) -> Optional[str]:
+    """Encoding of an HTML page from a BOM or a <meta> charset in `head`."""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = META_CHARSET_RE.search(head[:SNIFF_SIZE])
+    return match.group(1).decode("ascii") if match else None
+
+
+def get_decoder(charset: Optional[str]):
+    try:
+        return codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Incremental HTML to text converter, fed as the page downloads.
+    Collects the same metadata SafeWebBaseLoader used to get from
+    BeautifulSoup, and the page text without scripts and styles, one line
+    per block element.
+    """
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg"}
+    # Ends a line, so text of adjacent blocks is not glued together
+    BLOCK_TAGS = {
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "br",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "footer",
+        "form",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "hr",
+        "li",
+        "main",
+        "nav",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "td",
+        "th",
+        "title",
+        "tr",
+        "ul",
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skip_depth = 0
+
+        self.in_title = False
+        self.title_parts: list[str] = []
+        self.description: Optional[str] = None
+        self.language: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+            return
+
+        if tag in self.BLOCK_TAGS and not self.skip_depth:
+            self.parts.append("\n")
+
+        attrs = dict(attrs)
+        if tag == "title":
+            self.in_title = True
+        elif tag == "meta" and self.description is None:
+            if (attrs.get("name") or "").lower() == "description":
+                self.description = attrs.get("content") or "No description found."
+        elif tag == "html" and self.language is None:
+            self.language = attrs.get("lang") or "No language found."
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == "title":
+            self.in_title = False
+
+        if tag in self.BLOCK_TAGS and not self.skip_depth:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.in_title:
+            self.title_parts.append(data)
+        self.parts.append(data)
+
+    def get_text(self) -> str:
+        lines = "".join(self.parts).splitlines()
+        return "\n".join(line.strip() for line in lines if line.strip())
+
+    def get_metadata(self, source: str) -> dict:
+        metadata = {"source": source}
+        if self.title_parts:
+            metadata["title"] = "".join(self.title_parts)
+        if self.description is not None:
+            metadata["description"] = self.description
+        if self.language is not None:
+            metadata["language"] = self.language
+        return metadata
+
+
+async def fetch_document(
+    session: aiohttp.ClientSession, url: str, max_size: int
+) -> Document:
+    async with session.get(url) as response:
+        response.raise_for_status()
+
+        parser = HTMLTextExtractor()
+        # Created once the first SNIFF_SIZE bytes are in, unless the
+        # Content-Type names the charset
+        decoder = get_decoder(response.charset) if response.charset else None
+        head = b""
+        received = 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+            truncated = received > max_size
+            if truncated:
+                chunk = chunk[: max_size - received]
+
+            if decoder is None:
+                head += chunk
+                if len(head) < SNIFF_SIZE and not truncated:
+                    continue
+                decoder = get_decoder(sniff_charset(head))
+                chunk, head = head, b""
+
+            parser.feed(decoder.decode(chunk))
+            if truncated:
+                log.debug(f"{url} is larger than {max_size} bytes, truncated")
+                break
+
+        if decoder is None:
+            # Page shorter than SNIFF_SIZE
+            decoder = get_decoder(sniff_charset(head))
+            parser.feed(decoder.decode(head))
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+
+    return Document(page_content=parser.get_text(), metadata=parser.get_metadata(url))
+
+
+async def fetch_documents(
+    urls: Sequence[str],
+    concurrency: int,
+    per_host: int = RAG_WEB_FETCH_CONCURRENT_REQUESTS_PER_HOST,
+    timeout: float = RAG_WEB_FETCH_TIMEOUT,
+    max_size: int = RAG_WEB_FETCH_MAX_SIZE,
+    headers: Optional[dict] = None,
+    verify_ssl: bool = True,
+) -> list[Document]:
+    """
+    Download and extract `urls` concurrently, at most `concurrency` at a
+    time and `per_host` per host. Each page gets `timeout` seconds once its
+    download starts and is cut off after `max_size` bytes. Pages that fail
+    are logged and left out; the rest keep the order of `urls`.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    host_semaphores = defaultdict(lambda: asyncio.Semaphore(max(1, per_host)))
+
+    async def fetch(session: aiohttp.ClientSession, url: str) -> Document:
+        host = urllib.parse.urlparse(url).netloc
+        # Wait for the host first, so a busy host does not hold global slots
+        async with host_semaphores[host], semaphore:
+            return await asyncio.wait_for(
+                fetch_document(session, url, max_size), timeout=timeout
+            )
+
+    connector = aiohttp.TCPConnector(ssl=verify_ssl)
+    async with aiohttp.ClientSession(
+        connector=connector, headers=headers, trust_env=True
+    ) as session:
+        results = await asyncio.gather(
+            *[fetch(session, url) for url in urls], return_exceptions=True
+        )
+
+    documents = []
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            # Log the error and continue with the next URL
+            log.error(f"Error loading {url}: {result!r}")
+            continue
+        documents.append(result)
+    return documents
@@ -0,0 +1,81 @@
+import itertools
+import logging
+import queue
+import threading
+from typing import Iterable, Iterator
+
+from langchain_core.documents import Document
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+_DONE = object()
+
+
+def load_documents_lazily(loader) -> Iterator[Document]:
+    """
+    Documents page by page (or row by row) when the loader supports
+    `lazy_load`, otherwise everything `load()` returns.
+    """
+    lazy_load = getattr(loader, "lazy_load", None)
+    if lazy_load is None:
+        return iter(loader.load())
+    return lazy_load()
+
+
+def split_documents_lazily(documents: Iterable[Document], text_splitter):
+    for document in documents:
+        yield from text_splitter.split_documents([document])
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, max(1, batch_size))):
+        yield batch
+
+
+def prefetch(items: Iterable, max_pending: int) -> Iterator:
+    """
+    Consume `items` on a background thread, keeping at most `max_pending`
+    of them buffered, so loading and splitting the next batch overlaps with
+    embedding the current one without reading the whole file ahead.
+    """
+    if max_pending <= 0:
+        yield from items
+        return
+
+    buffer = queue.Queue(maxsize=max_pending)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    threading.Thread(target=produce, name="rag-ingest", daemon=True).start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Unblock the producer if the consumer stops early
+        stopped.set()
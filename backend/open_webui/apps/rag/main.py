@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import json
 import logging
 import mimetypes
@@ -8,7 +10,7 @@ import urllib.parse
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator, Optional, Sequence, Union
+from typing import AsyncIterator, Iterator, Optional, Sequence, Union
 
 import requests
 import validators
@@ -23,6 +25,28 @@ from open_webui.apps.rag.search.serper import search_serper
 from open_webui.apps.rag.search.serply import search_serply
 from open_webui.apps.rag.search.serpstack import search_serpstack
 from open_webui.apps.rag.search.tavily import search_tavily
+from open_webui.apps.rag.bm25 import BM25_INDEXES
+from open_webui.apps.rag.embedding_cache import (
+    EMBEDDING_CACHE,
+    EmbeddingCache,
+    get_cached_embedding_function,
+)
+from open_webui.apps.rag.fetch import fetch_documents
+from open_webui.apps.rag.ingest import (
+    iter_batches,
+    load_documents_lazily,
+    prefetch,
+    split_documents_lazily,
+)
+from open_webui.apps.rag.rerank import RERANK_SCORE_CACHE
+from open_webui.apps.rag.scan import DOCS_DIR_SCANNER
+from open_webui.apps.rag.web_cache import (
+    WEB_EMBEDDING_CACHE,
+    WEB_PAGE_CACHE,
+    WEB_SEARCH_CACHE,
+    WEB_SEARCH_COLLECTIONS,
+    normalize_query,
+)
 from open_webui.apps.rag.utils import (
     get_embedding_function,
     get_model_path,
@@ -33,9 +57,12 @@ from open_webui.apps.rag.utils import (
 )
 from open_webui.apps.webui.models.documents import DocumentForm, Documents
 from open_webui.apps.webui.models.files import Files
+from open_webui.apps.webui.models.jobs import Jobs, JobStatus
+from open_webui.apps.webui.models.users import Users
 from chromadb.utils.batch_utils import create_batches
 from open_webui.config import (
     BRAVE_SEARCH_API_KEY,
+    CACHE_DIR,
     CHROMA_CLIENT,
     CHUNK_OVERLAP,
     CHUNK_SIZE,
@@ -58,6 +85,8 @@ from open_webui.config import (
     RAG_EMBEDDING_OPENAI_BATCH_SIZE,
     RAG_FILE_MAX_COUNT,
     RAG_FILE_MAX_SIZE,
+    RAG_INGESTION_BATCH_SIZE,
+    RAG_INGESTION_PREFETCH_BATCHES,
     RAG_OPENAI_API_BASE_URL,
     RAG_OPENAI_API_KEY,
     RAG_RELEVANCE_THRESHOLD,
@@ -87,6 +116,7 @@ from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import (
     BSHTMLLoader,
@@ -193,6 +223,9 @@ def update_reranking_model(
     reranking_model: str,
     update_model: bool = False,
 ):
+    # Scores from the previous model are not comparable
+    RERANK_SCORE_CACHE.clear()
+
     if reranking_model:
         import sentence_transformers
 
@@ -216,13 +249,17 @@ update_reranking_model(
 )
 
 
-app.state.EMBEDDING_FUNCTION = get_embedding_function(
+app.state.EMBEDDING_FUNCTION = get_cached_embedding_function(
+    get_embedding_function(
+        app.state.config.RAG_EMBEDDING_ENGINE,
+        app.state.config.RAG_EMBEDDING_MODEL,
+        app.state.sentence_transformer_ef,
+        app.state.config.OPENAI_API_KEY,
+        app.state.config.OPENAI_API_BASE_URL,
+        app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
+    ),
     app.state.config.RAG_EMBEDDING_ENGINE,
     app.state.config.RAG_EMBEDDING_MODEL,
-    app.state.sentence_transformer_ef,
-    app.state.config.OPENAI_API_KEY,
-    app.state.config.OPENAI_API_BASE_URL,
-    app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
 )
 
 app.add_middleware(
@@ -274,6 +311,41 @@ async def get_embedding_config(user=Depends(get_admin_user)):
     }
 
 
+@app.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    return {"status": True, **EMBEDDING_CACHE.stats()}
+
+
+@app.post("/embedding/cache/reset")
+async def reset_embedding_cache(user=Depends(get_admin_user)):
+    EMBEDDING_CACHE.clear()
+    return {"status": True, **EMBEDDING_CACHE.stats()}
+
+
+@app.get("/web/search/cache")
+async def get_web_search_cache_stats(user=Depends(get_admin_user)):
+    return {
+        "status": True,
+        "results": WEB_SEARCH_CACHE.stats(),
+        "pages": WEB_PAGE_CACHE.stats(),
+        "embeddings": WEB_EMBEDDING_CACHE.stats(),
+    }
+
+
+@app.post("/web/search/cache/reset")
+async def reset_web_search_cache(user=Depends(get_admin_user)):
+    WEB_SEARCH_CACHE.clear()
+    WEB_PAGE_CACHE.clear()
+    WEB_SEARCH_COLLECTIONS.clear()
+    WEB_EMBEDDING_CACHE.clear()
+    return {"status": True}
+
+
+@app.get("/reranking/cache")
+async def get_reranking_cache_stats(user=Depends(get_admin_user)):
+    return {"status": True, **RERANK_SCORE_CACHE.stats()}
+
+
 @app.get("/reranking")
 async def get_reraanking_config(user=Depends(get_admin_user)):
     return {
@@ -317,13 +389,17 @@ async def update_embedding_config(
 
         update_embedding_model(app.state.config.RAG_EMBEDDING_MODEL)
 
-        app.state.EMBEDDING_FUNCTION = get_embedding_function(
+        app.state.EMBEDDING_FUNCTION = get_cached_embedding_function(
+            get_embedding_function(
+                app.state.config.RAG_EMBEDDING_ENGINE,
+                app.state.config.RAG_EMBEDDING_MODEL,
+                app.state.sentence_transformer_ef,
+                app.state.config.OPENAI_API_KEY,
+                app.state.config.OPENAI_API_BASE_URL,
+                app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
+            ),
             app.state.config.RAG_EMBEDDING_ENGINE,
             app.state.config.RAG_EMBEDDING_MODEL,
-            app.state.sentence_transformer_ef,
-            app.state.config.OPENAI_API_KEY,
-            app.state.config.OPENAI_API_BASE_URL,
-            app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
         )
 
         return {
@@ -755,7 +831,7 @@ def get_web_loader(url: Union[str, Sequence[str]], verify_ssl: bool = True):
     return SafeWebBaseLoader(
         url,
         verify_ssl=verify_ssl,
-        requests_per_second=RAG_WEB_SEARCH_CONCURRENT_REQUESTS,
+        requests_per_second=app.state.config.RAG_WEB_SEARCH_CONCURRENT_REQUESTS,
         continue_on_failure=True,
     )
 
@@ -795,6 +871,29 @@ def resolve_hostname(hostname):
     return ipv4_addresses, ipv6_addresses
 
 
+def search_web_cached(engine: str, query: str) -> list[SearchResult]:
+    """`search_web`, reusing the results of the same (normalized) query for RAG_WEB_SEARCH_CACHE_TTL seconds."""
+    key = (
+        engine,
+        normalize_query(query),
+        app.state.config.RAG_WEB_SEARCH_RESULT_COUNT,
+        tuple(app.state.config.RAG_WEB_SEARCH_DOMAIN_FILTER_LIST or []),
+    )
+    web_results = WEB_SEARCH_CACHE.get(key)
+    if web_results is None:
+        web_results = search_web(engine, query)
+        WEB_SEARCH_CACHE.set(key, web_results)
+    return web_results
+
+
+def collection_exists(collection_name: str) -> bool:
+    try:
+        CHROMA_CLIENT.get_collection(name=collection_name)
+        return True
+    except Exception:
+        return False
+
+
 def search_web(engine: str, query: str) -> list[SearchResult]:
     """Search the web using a search engine and return the results as a list of SearchResult objects.
     Will look for a search engine API key in environment variables in the following order:
@@ -916,7 +1015,7 @@ def store_web_search(form_data: SearchForm, user=Depends(get_verified_user)):
         logging.info(
             f"trying to web search with {app.state.config.RAG_WEB_SEARCH_ENGINE, form_data.query}"
         )
-        web_results = search_web(
+        web_results = search_web_cached(
             app.state.config.RAG_WEB_SEARCH_ENGINE, form_data.query
         )
     except Exception as e:
@@ -930,14 +1029,28 @@ def store_web_search(form_data: SearchForm, user=Depends(get_verified_user)):
 
     try:
         urls = [result.link for result in web_results]
-        loader = get_web_loader(urls)
-        data = loader.load()
 
         collection_name = form_data.collection_name
         if collection_name == "":
             collection_name = calculate_sha256_string(form_data.query)[:63]
 
-        store_data_in_vector_db(data, collection_name, overwrite=True)
+        # Built from the same pages a moment ago: nothing to fetch or embed
+        if WEB_SEARCH_COLLECTIONS.get(collection_name) == urls and collection_exists(
+            collection_name
+        ):
+            return {
+                "status": True,
+                "collection_name": collection_name,
+                "filenames": urls,
+            }
+
+        loader = get_web_loader(urls)
+        data = loader.load()
+
+        store_data_in_vector_db(
+            data, collection_name, overwrite=True, embedding_cache=WEB_EMBEDDING_CACHE
+        )
+        WEB_SEARCH_COLLECTIONS.set(collection_name, urls)
         return {
             "status": True,
             "collection_name": collection_name,
@@ -952,7 +1065,11 @@ def store_web_search(form_data: SearchForm, user=Depends(get_verified_user)):
 
 
 def store_data_in_vector_db(
-    data, collection_name, metadata: Optional[dict] = None, overwrite: bool = False
+    data,
+    collection_name,
+    metadata: Optional[dict] = None,
+    overwrite: bool = False,
+    embedding_cache: Optional[EmbeddingCache] = None,
 ) -> bool:
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=app.state.config.CHUNK_SIZE,
@@ -960,11 +1077,19 @@ def store_data_in_vector_db(
         add_start_index=True,
     )
 
-    docs = text_splitter.split_documents(data)
-
-    if len(docs) > 0:
-        log.info(f"store_data_in_vector_db {docs}")
-        return store_docs_in_vector_db(docs, collection_name, metadata, overwrite), None
+    # `data` may be a lazy iterator; split it document by document
+    docs = split_documents_lazily(data, text_splitter)
+
+    first_doc = next(docs, None)
+    if first_doc is not None:
+        log.info(f"store_data_in_vector_db {collection_name}")
+        docs = itertools.chain([first_doc], docs)
+        return (
+            store_docs_in_vector_db(
+                docs, collection_name, metadata, overwrite, embedding_cache
+            ),
+            None,
+        )
     else:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
@@ -982,26 +1107,28 @@ def store_text_in_vector_db(
 
 
 def store_docs_in_vector_db(
-    docs, collection_name, metadata: Optional[dict] = None, overwrite: bool = False
+    docs,
+    collection_name,
+    metadata: Optional[dict] = None,
+    overwrite: bool = False,
+    embedding_cache: Optional[EmbeddingCache] = None,
 ) -> bool:
-    log.info(f"store_docs_in_vector_db {docs} {collection_name}")
-
-    texts = [doc.page_content for doc in docs]
-    metadatas = [{**doc.metadata, **(metadata if metadata else {})} for doc in docs]
-
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
-            if isinstance(value, datetime):
-                metadata[key] = str(value)
+    """
+    Embed and add `docs` (any iterable, consumed lazily) in batches of
+    RAG_INGESTION_BATCH_SIZE chunks, so memory is bounded by the batch size
+    and earlier batches are searchable while later ones are being embedded.
+    Chunks found in `embedding_cache` are not embedded again.
+    """
+    log.info(f"store_docs_in_vector_db {collection_name}")
 
+    collection = None
     try:
         if overwrite:
-            for collection in CHROMA_CLIENT.list_collections():
-                if collection_name == collection.name:
+            for existing_collection in CHROMA_CLIENT.list_collections():
+                if collection_name == existing_collection.name:
                     log.info(f"deleting existing collection {collection_name}")
                     CHROMA_CLIENT.delete_collection(name=collection_name)
+                    BM25_INDEXES.delete(collection_name)
 
         collection = CHROMA_CLIENT.create_collection(name=collection_name)
 
@@ -1013,18 +1140,46 @@ def store_docs_in_vector_db(
             app.state.config.OPENAI_API_BASE_URL,
             app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
         )
+        if embedding_cache is not None:
+            embedding_func = get_cached_embedding_function(
+                embedding_func,
+                app.state.config.RAG_EMBEDDING_ENGINE,
+                app.state.config.RAG_EMBEDDING_MODEL,
+                cache=embedding_cache,
+            )
 
-        embedding_texts = list(map(lambda x: x.replace("\n", " "), texts))
-        embeddings = embedding_func(embedding_texts)
-
-        for batch in create_batches(
-            api=CHROMA_CLIENT,
-            ids=[str(uuid.uuid4()) for _ in texts],
-            metadatas=metadatas,
-            embeddings=embeddings,
-            documents=texts,
+        for docs_batch in prefetch(
+            iter_batches(docs, RAG_INGESTION_BATCH_SIZE),
+            RAG_INGESTION_PREFETCH_BATCHES,
         ):
-            collection.add(*batch)
+            texts = [doc.page_content for doc in docs_batch]
+            metadatas = [
+                {**doc.metadata, **(metadata if metadata else {})} for doc in docs_batch
+            ]
+
+            # ChromaDB does not like datetime formats
+            # for meta-data so convert them to string.
+            for doc_metadata in metadatas:
+                for key, value in doc_metadata.items():
+                    if isinstance(value, datetime):
+                        doc_metadata[key] = str(value)
+
+            embedding_texts = list(map(lambda x: x.replace("\n", " "), texts))
+            embeddings = embedding_func(embedding_texts)
+
+            ids = [str(uuid.uuid4()) for _ in texts]
+            for batch in create_batches(
+                api=CHROMA_CLIENT,
+                ids=ids,
+                metadatas=metadatas,
+                embeddings=embeddings,
+                documents=texts,
+            ):
+                collection.add(*batch)
+
+            BM25_INDEXES.add(collection_name, ids, texts, save=False)
+
+        BM25_INDEXES.save(collection_name)
 
         return True
     except Exception as e:
@@ -1033,6 +1188,14 @@ def store_docs_in_vector_db(
 
         log.exception(e)
 
+        if collection is not None:
+            # Don't leave a partially ingested collection behind
+            try:
+                CHROMA_CLIENT.delete_collection(name=collection_name)
+            except Exception as e:
+                log.exception(e)
+            BM25_INDEXES.delete(collection_name)
+
         return False
 
 
@@ -1210,7 +1373,7 @@ def store_doc(
         f.close()
 
         loader, known_type = get_loader(filename, file.content_type, file_path)
-        data = loader.load()
+        data = load_documents_lazily(loader)
 
         try:
             result = store_data_in_vector_db(data, collection_name)
@@ -1253,6 +1416,28 @@ def process_doc(
 ):
     try:
         file = Files.get_file_by_id(form_data.file_id)
+
+        # Uploads that need extraction are processed by a background job, so
+        # the extracted text is indexed rather than the raw upload. Until it
+        # is done, answer 202 with the job id; the client follows it through
+        # /files/jobs/{id} or the ingestion-job socket event and posts again
+        if job_id := file.meta.get("job_id"):
+            job = Jobs.get_job_by_id(job_id)
+            if job is None:
+                raise Exception(f"Ingestion job {job_id} not found")
+            if job.status == JobStatus.FAILED:
+                raise Exception(job.error or "Ingestion job failed")
+            if job.status != JobStatus.COMPLETED:
+                return JSONResponse(
+                    status_code=status.HTTP_202_ACCEPTED,
+                    content={
+                        "status": False,
+                        "job_id": job.id,
+                        "job_status": job.status,
+                        "progress": job.progress,
+                    },
+                )
+
         file_path = file.meta.get("path", f"{UPLOAD_DIR}/{file.filename}")
 
         f = open(file_path, "rb")
@@ -1265,7 +1450,7 @@ def process_doc(
         loader, known_type = get_loader(
             file.filename, file.meta.get("content_type"), file_path
         )
-        data = loader.load()
+        data = load_documents_lazily(loader)
 
         try:
             result = store_data_in_vector_db(
@@ -1278,6 +1463,11 @@ def process_doc(
             )
 
             if result:
+                # Lets the last upload of this content drop the collection
+                Files.update_file_by_id(
+                    file.id,
+                    {"meta": {**file.meta, "collection_name": collection_name}},
+                )
                 return {
                     "status": True,
                     "collection_name": collection_name,
@@ -1333,70 +1523,156 @@ def store_text(
         )
 
 
-@app.get("/scan")
-def scan_docs_dir(user=Depends(get_admin_user)):
-    for path in Path(DOCS_DIR).rglob("./**/*"):
-        try:
-            if path.is_file() and not path.name.startswith("."):
-                tags = extract_folders_after_data_docs(path)
-                filename = path.name
-                file_content_type = mimetypes.guess_type(path)
+def index_docs_dir_file(path: Path, collection_name: str, user_id: str) -> bool:
+    tags = extract_folders_after_data_docs(path)
+    filename = path.name
+    file_content_type = mimetypes.guess_type(path)
 
-                f = open(path, "rb")
-                collection_name = calculate_sha256(f)[:63]
-                f.close()
+    loader, known_type = get_loader(filename, file_content_type[0], str(path))
+    data = load_documents_lazily(loader)
 
-                loader, known_type = get_loader(
-                    filename, file_content_type[0], str(path)
-                )
-                data = loader.load()
+    result = store_data_in_vector_db(data, collection_name)
+    if not result:
+        return False
 
-                try:
-                    result = store_data_in_vector_db(data, collection_name)
-
-                    if result:
-                        sanitized_filename = sanitize_filename(filename)
-                        doc = Documents.get_doc_by_name(sanitized_filename)
-
-                        if doc is None:
-                            doc = Documents.insert_new_doc(
-                                user.id,
-                                DocumentForm(
-                                    **{
-                                        "name": sanitized_filename,
-                                        "title": filename,
-                                        "collection_name": collection_name,
-                                        "filename": filename,
-                                        "content": (
-                                            json.dumps(
-                                                {
-                                                    "tags": list(
-                                                        map(
-                                                            lambda name: {"name": name},
-                                                            tags,
-                                                        )
-                                                    )
-                                                }
-                                            )
-                                            if len(tags)
-                                            else "{}"
-                                        ),
-                                    }
-                                ),
-                            )
-                except Exception as e:
-                    log.exception(e)
-                    pass
+    sanitized_filename = sanitize_filename(filename)
+    doc = Documents.get_doc_by_name(sanitized_filename)
+
+    if doc is None:
+        Documents.insert_new_doc(
+            user_id,
+            DocumentForm(
+                **{
+                    "name": sanitized_filename,
+                    "title": filename,
+                    "collection_name": collection_name,
+                    "filename": filename,
+                    "content": (
+                        json.dumps(
+                            {
+                                "tags": list(
+                                    map(
+                                        lambda name: {"name": name},
+                                        tags,
+                                    )
+                                )
+                            }
+                        )
+                        if len(tags)
+                        else "{}"
+                    ),
+                }
+            ),
+        )
+    elif doc.collection_name != collection_name:
+        Documents.update_doc_collection_name_by_name(
+            sanitized_filename, collection_name
+        )
+
+    return True
+
+
+def remove_docs_dir_file(path: Path, collection_name: str):
+    sanitized_filename = sanitize_filename(path.name)
+    doc = Documents.get_doc_by_name(sanitized_filename)
+
+    # Leave documents of the same name that were uploaded some other way
+    if doc and doc.collection_name == collection_name:
+        Documents.delete_doc_by_name(sanitized_filename)
+
+
+def remove_docs_dir_collection(collection_name: str):
+    # Documents uploaded through /doc share collections by content hash too
+    if any(doc.collection_name == collection_name for doc in Documents.get_docs()):
+        return
+
+    try:
+        CHROMA_CLIENT.delete_collection(name=collection_name)
+    except Exception as e:
+        log.debug(f"collection {collection_name} not deleted: {e}")
+    BM25_INDEXES.delete(collection_name)
+
+
+def scan_docs(user_id: str, paths: Optional[list[Path]] = None) -> dict:
+    return DOCS_DIR_SCANNER.scan(
+        index_file=lambda path, collection_name: index_docs_dir_file(
+            path, collection_name, user_id
+        ),
+        remove_file=remove_docs_dir_file,
+        remove_collection=remove_docs_dir_collection,
+        paths=paths,
+    )
 
+
+def start_docs_dir_watch():
+    def on_change(paths: list[Path]):
+        # Files indexed without a request are owned by the first (admin) user
+        user = Users.get_first_user()
+        if user:
+            scan_docs(user.id, paths)
+
+    DOCS_DIR_SCANNER.start_watching(on_change)
+
+
+async def stop_docs_dir_watch():
+    await DOCS_DIR_SCANNER.stop_watching()
+
+
+OLLAMA_EMBED_NORMALIZED_MARKER = Path(CACHE_DIR) / "rag" / "ollama_embed_normalized"
+
+
+def normalize_ollama_collections(batch_size: int = 1000):
+    """
+    Ollama embeddings come from /api/embed, which L2-normalizes them, while
+    collections indexed through the former /api/embeddings hold the raw
+    vectors. Normalize the stored vectors once, so they are ranked against
+    queries the same way as newly indexed ones.
+    """
+    if (
+        app.state.config.RAG_EMBEDDING_ENGINE != "ollama"
+        or OLLAMA_EMBED_NORMALIZED_MARKER.exists()
+    ):
+        return
+
+    failed = False
+    for collection in CHROMA_CLIENT.list_collections():
+        try:
+            offset = 0
+            while True:
+                result = collection.get(
+                    include=["embeddings"], limit=batch_size, offset=offset
+                )
+                if not result["ids"]:
+                    break
+
+                embeddings = []
+                for embedding in result["embeddings"]:
+                    norm = sum(x * x for x in embedding) ** 0.5
+                    embeddings.append(
+                        [float(x) / norm for x in embedding] if norm else embedding
+                    )
+                collection.update(ids=result["ids"], embeddings=embeddings)
+                offset += len(result["ids"])
         except Exception as e:
-            log.exception(e)
+            log.exception(f"Failed to normalize collection {collection.name}: {e}")
+            failed = True
+
+    if not failed:
+        OLLAMA_EMBED_NORMALIZED_MARKER.parent.mkdir(parents=True, exist_ok=True)
+        OLLAMA_EMBED_NORMALIZED_MARKER.touch()
+        log.info("normalized the stored Ollama embeddings")
 
+
+@app.get("/scan")
+def scan_docs_dir(user=Depends(get_admin_user)):
+    scan_docs(user.id)
     return True
 
 
 @app.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     CHROMA_CLIENT.reset()
+    BM25_INDEXES.reset()
 
 
 @app.post("/reset/uploads")
@@ -1438,6 +1714,7 @@ def reset(user=Depends(get_admin_user)) -> bool:
 
     try:
         CHROMA_CLIENT.reset()
+        BM25_INDEXES.reset()
     except Exception as e:
         log.exception(e)
 
@@ -1445,30 +1722,50 @@ def reset(user=Depends(get_admin_user)) -> bool:
 
 
 class SafeWebBaseLoader(WebBaseLoader):
-    """WebBaseLoader with enhanced error handling for URLs."""
+    """WebBaseLoader that fetches all of its URLs concurrently and skips the ones that fail."""
+
+    async def afetch_documents(self) -> list[Document]:
+        # Pages fetched within RAG_WEB_SEARCH_CACHE_TTL are reused
+        cached = {path: WEB_PAGE_CACHE.get(path) for path in self.web_paths}
+        missing = [path for path, document in cached.items() if document is None]
+
+        if missing:
+            for document in await fetch_documents(
+                missing,
+                concurrency=self.requests_per_second,
+                headers=dict(self.session.headers),
+                verify_ssl=self.session.verify,
+            ):
+                cached[document.metadata["source"]] = document
+                WEB_PAGE_CACHE.set(document.metadata["source"], document)
+
+        return [
+            Document(page_content=document.page_content, metadata={**document.metadata})
+            for document in cached.values()
+            if document is not None
+        ]
+
+    async def aload(self) -> list[Document]:
+        """Load text from the url(s) in web_path, for callers on an event loop."""
+        return await self.afetch_documents()
+
+    async def alazy_load(self) -> AsyncIterator[Document]:
+        for document in await self.afetch_documents():
+            yield document
 
     def lazy_load(self) -> Iterator[Document]:
-        """Lazy load text from the url(s) in web_path with error handling."""
-        for path in self.web_paths:
-            try:
-                soup = self._scrape(path, bs_kwargs=self.bs_kwargs)
-                text = soup.get_text(**self.bs_get_text_kwargs)
-
-                # Build metadata
-                metadata = {"source": path}
-                if title := soup.find("title"):
-                    metadata["title"] = title.get_text()
-                if description := soup.find("meta", attrs={"name": "description"}):
-                    metadata["description"] = description.get(
-                        "content", "No description found."
-                    )
-                if html := soup.find("html"):
-                    metadata["language"] = html.get("lang", "No language found.")
-
-                yield Document(page_content=text, metadata=metadata)
-            except Exception as e:
-                # Log the error and continue with the next URL
-                log.error(f"Error loading {path}: {e}")
+        """Load text from the url(s) in web_path with error handling."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Sync callers (e.g. the sync endpoints, on a threadpool worker)
+            yield from asyncio.run(self.afetch_documents())
+            return
+
+        raise RuntimeError(
+            "SafeWebBaseLoader.lazy_load() cannot run on an event loop, "
+            "use `await loader.aload()` instead"
+        )
 
 
 if ENV == "dev":
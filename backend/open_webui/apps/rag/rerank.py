@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from open_webui.config import (
+    RAG_RERANKING_BATCH_SIZE,
+    RAG_RERANKING_SCORE_CACHE_SIZE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def get_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RerankScoreCache:
+    """
+    Bounded LRU of reranking scores keyed by a hash of the query and the
+    chunk id (or a hash of the chunk text when it has no id).
+    Clear it whenever the reranking model changes.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.scores: OrderedDict[str, float] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(query_hash: str, document) -> str:
+        chunk_id = getattr(document, "id", None) or get_hash(document.page_content)
+        return f"{query_hash}:{chunk_id}"
+
+    def get(self, key: str) -> Optional[float]:
+        with self.lock:
+            if key in self.scores:
+                self.scores.move_to_end(key)
+                self.hits += 1
+                return self.scores[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, score: float):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.scores[key] = score
+            self.scores.move_to_end(key)
+            while len(self.scores) > self.max_size:
+                self.scores.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.scores.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.scores),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+RERANK_SCORE_CACHE = RerankScoreCache(RAG_RERANKING_SCORE_CACHE_SIZE)
+
+
+def predict_rerank_scores(
+    reranking_function,
+    query: str,
+    documents: list,
+    batch_size: int = RAG_RERANKING_BATCH_SIZE,
+    cache: RerankScoreCache = RERANK_SCORE_CACHE,
+) -> list[float]:
+    """
+    Score `documents` against `query`, only sending the pairs missing from
+    the cache to the cross-encoder, in a single batched `predict` call.
+    """
+    query_hash = get_hash(query)
+    keys = [cache.get_key(query_hash, doc) for doc in documents]
+    scores = [cache.get(key) for key in keys]
+
+    missing = [idx for idx, score in enumerate(scores) if score is None]
+    if missing:
+        log.debug(f"reranking {len(missing)}/{len(documents)} uncached pairs")
+        predicted = reranking_function.predict(
+            [(query, documents[idx].page_content) for idx in missing],
+            batch_size=max(1, batch_size),
+        )
+        for idx, score in zip(missing, predicted):
+            scores[idx] = float(score)
+            cache.set(keys[idx], scores[idx])
+
+    return scores
@@ -0,0 +1,334 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from open_webui.config import CACHE_DIR, DOCS_DIR, DOCS_DIR_SCAN_WORKERS
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    from watchfiles import awatch
+except ImportError:
+    awatch = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+DOCS_DIR_MANIFEST_PATH = Path(CACHE_DIR) / "rag" / "docs_manifest.json"
+DOCS_DIR_MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+# Seconds between attempts of the other worker processes to take over watching
+WATCH_LOCK_RETRY_INTERVAL = 10
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, shared by the worker processes of a
+    host. The OS releases it if the holding process dies. Without fcntl
+    (Windows) it always succeeds, as with a single worker.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if fcntl is None:
+            return True
+
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def calculate_file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_in_scope(path: str, roots: list[str]) -> bool:
+    return any(path == root or path.startswith(root + os.sep) for root in roots)
+
+
+class DocsDirScanner:
+    """
+    Incrementally indexes a directory of documents.
+
+    A manifest of every indexed file (size, mtime, content hash and
+    collection name) is kept on disk. Files whose size and mtime are
+    unchanged are skipped without being read; files that were touched but
+    hash the same only get their manifest entry refreshed. New and changed
+    files are indexed concurrently on `workers` threads, one at a time per
+    collection, and files that disappeared are removed. A collection is
+    released once no manifest entry references it anymore.
+
+    Every worker process has its own scanner, so scans take a file lock
+    next to the manifest and reload it, and only the process holding the
+    watch lock watches the docs dir.
+
+    Indexing and removal are done by the callbacks passed to `scan`:
+        index_file(path, collection_name) -> bool
+        remove_file(path, collection_name)
+        remove_collection(collection_name)
+    """
+
+    def __init__(
+        self,
+        docs_dir: str = DOCS_DIR,
+        manifest_path: Path = DOCS_DIR_MANIFEST_PATH,
+        workers: int = DOCS_DIR_SCAN_WORKERS,
+    ):
+        self.docs_dir = Path(docs_dir)
+        self.manifest_path = manifest_path
+        self.workers = max(1, workers)
+
+        # Serializes scans from the /scan endpoint and the watcher, within
+        # this process and across worker processes
+        self.lock = threading.Lock()
+        self.manifest_lock = FileLock(manifest_path.with_suffix(".lock"))
+        self.watch_lock = FileLock(manifest_path.with_suffix(".watch.lock"))
+        self.manifest: Optional[dict[str, dict]] = None
+
+        self.watch_task: Optional[asyncio.Task] = None
+        self.watch_stop: Optional[asyncio.Event] = None
+
+    def _load_manifest(self) -> dict[str, dict]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning(f"Discarding unreadable docs manifest: {e}")
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            log.exception(f"Failed to persist docs manifest: {e}")
+
+    def _list_files(self, root: Path) -> Iterable[Path]:
+        if root.is_file():
+            paths = [root]
+        elif root.is_dir():
+            paths = sorted(root.rglob("*"))
+        else:
+            paths = []
+
+        for path in paths:
+            if path.is_file() and not path.name.startswith("."):
+                yield path
+
+    def scan(
+        self,
+        index_file: Callable[[Path, str], bool],
+        remove_file: Callable[[Path, str], None],
+        remove_collection: Callable[[str], None],
+        paths: Optional[list[Path]] = None,
+    ) -> dict:
+        """
+        Scan `paths` (files or directories, the whole docs dir by default)
+        and bring the index in line with them.
+        """
+        roots = [Path(path) for path in paths] if paths else [self.docs_dir]
+        scope = [str(root) for root in roots]
+
+        with self.lock, self.manifest_lock:
+            # Another worker process may have scanned since
+            self.manifest = self._load_manifest()
+
+            result = {
+                "added": 0,
+                "updated": 0,
+                "deleted": 0,
+                "unchanged": 0,
+                "failed": 0,
+            }
+            released: set[str] = set()
+
+            found: set[str] = set()
+            pending: dict[str, tuple[Path, dict]] = {}
+            for root in roots:
+                for path in self._list_files(root):
+                    key = str(path)
+                    if key in found:
+                        continue
+                    found.add(key)
+
+                    try:
+                        stat = path.stat()
+                        entry = self.manifest.get(key)
+                        if (
+                            entry
+                            and entry["size"] == stat.st_size
+                            and entry["mtime"] == stat.st_mtime_ns
+                        ):
+                            result["unchanged"] += 1
+                            continue
+
+                        file_hash = calculate_file_sha256(path)
+                        if entry and entry["hash"] == file_hash:
+                            entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+                            result["unchanged"] += 1
+                            continue
+
+                        pending[key] = (
+                            path,
+                            {
+                                "size": stat.st_size,
+                                "mtime": stat.st_mtime_ns,
+                                "hash": file_hash,
+                                "collection_name": file_hash[:63],
+                            },
+                        )
+                    except Exception as e:
+                        log.exception(f"Failed to scan {path}: {e}")
+                        result["failed"] += 1
+
+            # Files with the same content share a collection; index those
+            # one after the other and different collections concurrently
+            collections: dict[str, list[str]] = defaultdict(list)
+            for key, (_, entry) in pending.items():
+                collections[entry["collection_name"]].append(key)
+
+            def index_collection(keys: list[str]) -> dict[str, bool]:
+                indexed = {}
+                for key in keys:
+                    path, entry = pending[key]
+                    try:
+                        indexed[key] = index_file(path, entry["collection_name"])
+                    except Exception as e:
+                        log.exception(f"Failed to index {path}: {e}")
+                        indexed[key] = False
+                return indexed
+
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="docs-scan"
+            ) as executor:
+                futures = [
+                    executor.submit(index_collection, keys)
+                    for keys in collections.values()
+                ]
+                for future in as_completed(futures):
+                    for key, indexed in future.result().items():
+                        if not indexed:
+                            result["failed"] += 1
+                            continue
+
+                        previous = self.manifest.get(key)
+                        if previous:
+                            released.add(previous["collection_name"])
+                            result["updated"] += 1
+                        else:
+                            result["added"] += 1
+                        self.manifest[key] = pending[key][1]
+
+            # Files that were indexed before but are gone now
+            for key in [
+                key
+                for key in self.manifest
+                if key not in found and is_in_scope(key, scope)
+            ]:
+                entry = self.manifest.pop(key)
+                try:
+                    remove_file(Path(key), entry["collection_name"])
+                except Exception as e:
+                    log.exception(f"Failed to remove {key}: {e}")
+                released.add(entry["collection_name"])
+                result["deleted"] += 1
+
+            in_use = {entry["collection_name"] for entry in self.manifest.values()}
+            for collection_name in released - in_use:
+                try:
+                    remove_collection(collection_name)
+                except Exception as e:
+                    log.exception(f"Failed to remove collection {collection_name}: {e}")
+
+            self._save_manifest()
+
+        log.info(f"scanned {', '.join(scope)}: {result}")
+        return result
+
+    def start_watching(self, on_change: Callable[[list[Path]], None]):
+        """
+        Call `on_change` (on a worker thread) with the paths that changed
+        under the docs dir, batched by watchfiles, until `stop_watching`.
+        Only one worker process watches at a time; the others wait to take
+        over if it exits.
+        """
+        if awatch is None:
+            log.warning("watchfiles is not installed, DOCS_DIR will not be watched")
+            return
+        if self.watch_task is None or self.watch_task.done():
+            self.watch_stop = asyncio.Event()
+            self.watch_task = asyncio.create_task(self._watch(on_change))
+
+    async def _watch(self, on_change: Callable[[list[Path]], None]):
+        while not self.watch_lock.acquire(blocking=False):
+            try:
+                await asyncio.wait_for(
+                    self.watch_stop.wait(), WATCH_LOCK_RETRY_INTERVAL
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+
+        try:
+            log.info(f"watching {self.docs_dir} for changes")
+            async for changes in awatch(self.docs_dir, stop_event=self.watch_stop):
+                paths = sorted({Path(path) for _, path in changes})
+                try:
+                    await asyncio.to_thread(on_change, paths)
+                except Exception as e:
+                    log.exception(f"Failed to index changes in {self.docs_dir}: {e}")
+        finally:
+            self.watch_lock.release()
+
+    async def stop_watching(self):
+        if self.watch_task and not self.watch_task.done():
+            self.watch_stop.set()
+            self.watch_task.cancel()
+            try:
+                await self.watch_task
+            except asyncio.CancelledError:
+                pass
+
+
+DOCS_DIR_SCANNER = DocsDirScanner()
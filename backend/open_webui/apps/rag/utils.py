@@ -1,33 +1,58 @@
+import asyncio
+import functools
+import heapq
+import itertools
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union
 
-import requests
-from open_webui.apps.ollama.main import (
-    GenerateEmbeddingsForm,
+from open_webui.apps.rag.bm25 import BM25_INDEXES
+from open_webui.apps.rag.embeddings import (
     generate_ollama_embeddings,
+    generate_openai_embeddings,
+)
+from open_webui.apps.rag.rerank import predict_rerank_scores
+from open_webui.config import (
+    CHROMA_CLIENT,
+    RAG_QUERY_MAX_WORKERS,
+    RAG_RERANKING_BATCH_SIZE,
+    RAG_RERANKING_MAX_CANDIDATES,
+    RAG_RETRIEVAL_MAX_WORKERS,
 )
-from open_webui.config import CHROMA_CLIENT
 from open_webui.env import SRC_LOG_LEVELS
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
+from langchain.retrievers import EnsembleRetriever
 from langchain_core.documents import Document
 from open_webui.utils.misc import get_last_user_message
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# Shared pool so concurrent chats cannot fan out past RAG_QUERY_MAX_WORKERS
+QUERY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RAG_QUERY_MAX_WORKERS, thread_name_prefix="rag-query"
+)
+
+# Runs whole retrievals for chat requests so they never block the event loop.
+# Kept apart from QUERY_EXECUTOR, which these retrievals submit work to.
+RETRIEVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RAG_RETRIEVAL_MAX_WORKERS, thread_name_prefix="rag-retrieval"
+)
+
 
 def query_doc(
     collection_name: str,
     query: str,
     embedding_function,
     k: int,
+    query_embeddings: Optional[list[float]] = None,
 ):
     try:
         collection = CHROMA_CLIENT.get_collection(name=collection_name)
-        query_embeddings = embedding_function(query)
+        if query_embeddings is None:
+            query_embeddings = embedding_function(query)
 
         result = collection.query(
             query_embeddings=[query_embeddings],
@@ -40,51 +65,76 @@ def query_doc(
         raise e
 
 
-def query_doc_with_hybrid_search(
+def get_hybrid_search_candidates(
     collection_name: str,
     query: str,
     embedding_function,
     k: int,
-    reranking_function,
-    r: float,
-):
-    try:
-        collection = CHROMA_CLIENT.get_collection(name=collection_name)
-        documents = collection.get()  # get all documents
+) -> list[Document]:
+    # BM25 and vector hits fused by the ensemble, not reranked yet
+    collection = CHROMA_CLIENT.get_collection(name=collection_name)
 
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=documents.get("documents"),
-            metadatas=documents.get("metadatas"),
-        )
-        bm25_retriever.k = k
+    bm25_retriever = BM25IndexRetriever(
+        collection=collection,
+        index=BM25_INDEXES.get(collection_name, collection),
+        top_n=k,
+    )
 
-        chroma_retriever = ChromaRetriever(
-            collection=collection,
-            embedding_function=embedding_function,
-            top_n=k,
-        )
+    chroma_retriever = ChromaRetriever(
+        collection=collection,
+        embedding_function=embedding_function,
+        top_n=k,
+    )
 
-        ensemble_retriever = EnsembleRetriever(
-            retrievers=[bm25_retriever, chroma_retriever], weights=[0.5, 0.5]
-        )
+    ensemble_retriever = EnsembleRetriever(
+        retrievers=[bm25_retriever, chroma_retriever], weights=[0.5, 0.5]
+    )
 
+    return ensemble_retriever.invoke(query)
+
+
+def rerank_documents(
+    documents: list[Document],
+    query: str,
+    embedding_function,
+    k: int,
+    reranking_function,
+    r: float,
+) -> dict:
+    if documents:
         compressor = RerankCompressor(
             embedding_function=embedding_function,
             top_n=k,
             reranking_function=reranking_function,
             r_score=r,
         )
+        documents = compressor.compress_documents(documents, query)
+
+    return {
+        "distances": [[d.metadata.get("score") for d in documents]],
+        "documents": [[d.page_content for d in documents]],
+        "metadatas": [[d.metadata for d in documents]],
+    }
 
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
+
+def query_doc_with_hybrid_search(
+    collection_name: str,
+    query: str,
+    embedding_function,
+    k: int,
+    reranking_function,
+    r: float,
+):
+    try:
+        documents = get_hybrid_search_candidates(
+            collection_name, query, embedding_function, k
         )
+        if RAG_RERANKING_MAX_CANDIDATES > 0:
+            documents = documents[:RAG_RERANKING_MAX_CANDIDATES]
 
-        result = compression_retriever.invoke(query)
-        result = {
-            "distances": [[d.metadata.get("score") for d in result]],
-            "documents": [[d.page_content for d in result]],
-            "metadatas": [[d.metadata for d in result]],
-        }
+        result = rerank_documents(
+            documents, query, embedding_function, k, reranking_function, r
+        )
 
         log.info(f"query_doc_with_hybrid_search:result {result}")
         return result
@@ -93,35 +143,25 @@ def query_doc_with_hybrid_search(
 
 
 def merge_and_sort_query_results(query_results, k, reverse=False):
-    # Initialize lists to store combined data
-    combined_distances = []
-    combined_documents = []
-    combined_metadatas = []
-
-    for data in query_results:
-        combined_distances.extend(data["distances"][0])
-        combined_documents.extend(data["documents"][0])
-        combined_metadatas.extend(data["metadatas"][0])
-
-    # Create a list of tuples (distance, document, metadata)
-    combined = list(zip(combined_distances, combined_documents, combined_metadatas))
-
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=reverse)
+    # Keep only the k best (distance, document, metadata) tuples
+    # instead of sorting every result of every collection
+    combined = (
+        item
+        for data in query_results
+        for item in zip(
+            data["distances"][0], data["documents"][0], data["metadatas"][0]
+        )
+    )
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    top_k = select(k, combined, key=lambda x: x[0])
 
     # We don't have anything :-(
-    if not combined:
+    if not top_k:
         sorted_distances = []
         sorted_documents = []
         sorted_metadatas = []
     else:
-        # Unzip the sorted list
-        sorted_distances, sorted_documents, sorted_metadatas = zip(*combined)
-
-        # Slicing the lists to include only k elements
-        sorted_distances = list(sorted_distances)[:k]
-        sorted_documents = list(sorted_documents)[:k]
-        sorted_metadatas = list(sorted_metadatas)[:k]
+        sorted_distances, sorted_documents, sorted_metadatas = map(list, zip(*top_k))
 
     # Create the output dictionary
     result = {
@@ -133,27 +173,57 @@ def merge_and_sort_query_results(query_results, k, reverse=False):
     return result
 
 
+def get_query_embedding_function(query: str, embedding_function):
+    """
+    Embed the query once and serve that embedding for every collection,
+    falling back to `embedding_function` for any other input.
+    """
+    query_embeddings = embedding_function(query)
+
+    def func(text):
+        if isinstance(text, str) and text == query:
+            return query_embeddings
+        return embedding_function(text)
+
+    return func
+
+
+def query_collections_concurrently(collection_names, query_fn) -> list[dict]:
+    collection_names = [name for name in collection_names if name]
+
+    def run(collection_name):
+        try:
+            return query_fn(collection_name)
+        except Exception as e:
+            log.debug(f"query on collection {collection_name} failed: {e}")
+            return None
+
+    if len(collection_names) == 1:
+        results = [run(collection_names[0])]
+    else:
+        results = QUERY_EXECUTOR.map(run, collection_names)
+
+    return [result for result in results if result is not None]
+
+
 def query_collection(
     collection_names: list[str],
     query: str,
     embedding_function,
     k: int,
 ):
-    results = []
-    for collection_name in collection_names:
-        if collection_name:
-            try:
-                result = query_doc(
-                    collection_name=collection_name,
-                    query=query,
-                    k=k,
-                    embedding_function=embedding_function,
-                )
-                results.append(result)
-            except Exception:
-                pass
-        else:
-            pass
+    query_embeddings = embedding_function(query)
+
+    results = query_collections_concurrently(
+        collection_names,
+        lambda collection_name: query_doc(
+            collection_name=collection_name,
+            query=query,
+            k=k,
+            embedding_function=embedding_function,
+            query_embeddings=query_embeddings,
+        ),
+    )
 
     return merge_and_sort_query_results(results, k=k)
 
@@ -166,21 +236,43 @@ def query_collection_with_hybrid_search(
     reranking_function,
     r: float,
 ):
-    results = []
-    for collection_name in collection_names:
-        try:
-            result = query_doc_with_hybrid_search(
-                collection_name=collection_name,
-                query=query,
-                embedding_function=embedding_function,
-                k=k,
-                reranking_function=reranking_function,
-                r=r,
-            )
-            results.append(result)
-        except Exception:
-            pass
-    return merge_and_sort_query_results(results, k=k, reverse=True)
+    query_embedding_function = get_query_embedding_function(query, embedding_function)
+
+    candidates = query_collections_concurrently(
+        collection_names,
+        lambda collection_name: get_hybrid_search_candidates(
+            collection_name=collection_name,
+            query=query,
+            embedding_function=query_embedding_function,
+            k=k,
+        ),
+    )
+
+    # Rerank once across all collections instead of once per collection
+    documents = interleave_candidates(candidates, RAG_RERANKING_MAX_CANDIDATES)
+    return rerank_documents(
+        documents, query, query_embedding_function, k, reranking_function, r
+    )
+
+
+def interleave_candidates(
+    candidates: list[list[Document]], max_candidates: int
+) -> list[Document]:
+    """
+    Merge per-collection candidate lists rank by rank, dropping duplicate
+    chunks, so a cap on the total still keeps each collection's best hits.
+    """
+    seen = set()
+    documents = []
+    for docs in itertools.zip_longest(*candidates):
+        for doc in docs:
+            if doc is None or doc.page_content in seen:
+                continue
+            seen.add(doc.page_content)
+            documents.append(doc)
+            if 0 < max_candidates <= len(documents):
+                return documents
+    return documents
 
 
 def rag_template(template: str, context: str, query: str):
@@ -200,36 +292,27 @@ def get_embedding_function(
     if embedding_engine == "":
         return lambda query: embedding_function.encode(query).tolist()
     elif embedding_engine in ["ollama", "openai"]:
-        if embedding_engine == "ollama":
-            func = lambda query: generate_ollama_embeddings(
-                GenerateEmbeddingsForm(
-                    **{
-                        "model": embedding_model,
-                        "prompt": query,
-                    }
-                )
-            )
-        elif embedding_engine == "openai":
-            func = lambda query: generate_openai_embeddings(
-                model=embedding_model,
-                text=query,
-                key=openai_key,
-                url=openai_url,
-            )
 
-        def generate_multiple(query, f):
-            if isinstance(query, list):
-                if embedding_engine == "openai":
-                    embeddings = []
-                    for i in range(0, len(query), batch_size):
-                        embeddings.extend(f(query[i : i + batch_size]))
-                    return embeddings
-                else:
-                    return [f(q) for q in query]
+        def func(query):
+            texts = query if isinstance(query, list) else [query]
+
+            if embedding_engine == "ollama":
+                embeddings = generate_ollama_embeddings(
+                    model=embedding_model,
+                    texts=texts,
+                )
             else:
-                return f(query)
+                embeddings = generate_openai_embeddings(
+                    model=embedding_model,
+                    texts=texts,
+                    key=openai_key,
+                    url=openai_url,
+                    batch_size=batch_size,
+                )
 
-        return lambda query: generate_multiple(query, func)
+            return embeddings if isinstance(query, list) else embeddings[0]
+
+        return func
 
 
 def get_rag_context(
@@ -240,6 +323,7 @@ def get_rag_context(
     reranking_function,
     r,
     hybrid_search,
+    cancel_event: Optional[threading.Event] = None,
 ):
     log.debug(f"files: {files} {messages} {embedding_function} {reranking_function}")
     query = get_last_user_message(messages)
@@ -248,6 +332,10 @@ def get_rag_context(
     relevant_contexts = []
 
     for file in files:
+        if cancel_event is not None and cancel_event.is_set():
+            log.debug("retrieval cancelled")
+            return [], []
+
         context = None
 
         collection_names = (
@@ -316,6 +404,23 @@ def get_rag_context(
     return contexts, citations
 
 
+async def get_rag_context_async(**kwargs):
+    """
+    Run `get_rag_context` on RETRIEVAL_EXECUTOR. Cancelling the awaiting
+    task stops the retrieval before its next file.
+    """
+    cancel_event = threading.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            RETRIEVAL_EXECUTOR,
+            functools.partial(get_rag_context, **kwargs, cancel_event=cancel_event),
+        )
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+
+
 def get_model_path(model: str, update_model: bool = False):
     # Construct huggingface_hub kwargs with local_files_only to return the snapshot path
     cache_dir = os.getenv("SENTENCE_TRANSFORMERS_HOME")
@@ -354,43 +459,6 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
-def generate_openai_embeddings(
-    model: str,
-    text: Union[str, list[str]],
-    key: str,
-    url: str = "https://api.openai.com/v1",
-):
-    if isinstance(text, list):
-        embeddings = generate_openai_batch_embeddings(model, text, key, url)
-    else:
-        embeddings = generate_openai_batch_embeddings(model, [text], key, url)
-
-    return embeddings[0] if isinstance(text, str) else embeddings
-
-
-def generate_openai_batch_embeddings(
-    model: str, texts: list[str], key: str, url: str = "https://api.openai.com/v1"
-) -> Optional[list[list[float]]]:
-    try:
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-            },
-            json={"input": texts, "model": model},
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        print(e)
-        return None
-
-
 from typing import Any
 
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
@@ -423,6 +491,7 @@ class ChromaRetriever(BaseRetriever):
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -430,6 +499,44 @@ class ChromaRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    collection: Any
+    index: Any
+    top_n: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        hits = self.index.search(query, self.top_n)
+        if not hits:
+            return []
+
+        results = self.collection.get(
+            ids=[doc_id for doc_id, _ in hits],
+            include=["documents", "metadatas"],
+        )
+        docs = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        }
+
+        # Chroma does not preserve the order of the requested ids
+        return [
+            Document(
+                id=doc_id,
+                metadata=docs[doc_id][1] or {},
+                page_content=docs[doc_id][0],
+            )
+            for doc_id, _ in hits
+            if doc_id in docs
+        ]
+
+
 import operator
 from typing import Optional, Sequence
 
@@ -443,6 +550,7 @@ class RerankCompressor(BaseDocumentCompressor):
     top_n: int
     reranking_function: Any
     r_score: float
+    batch_size: int = RAG_RERANKING_BATCH_SIZE
 
     class Config:
         extra = Extra.forbid
@@ -457,8 +565,8 @@ class RerankCompressor(BaseDocumentCompressor):
         reranking = self.reranking_function is not None
 
         if reranking:
-            scores = self.reranking_function.predict(
-                [(query, doc.page_content) for doc in documents]
+            scores = predict_rerank_scores(
+                self.reranking_function, query, documents, self.batch_size
             )
         else:
             from sentence_transformers import util
@@ -467,9 +575,9 @@ class RerankCompressor(BaseDocumentCompressor):
             document_embedding = self.embedding_function(
                 [doc.page_content for doc in documents]
             )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+            scores = util.cos_sim(query_embedding, document_embedding)[0].tolist()
 
-        docs_with_scores = list(zip(documents, scores.tolist()))
+        docs_with_scores = list(zip(documents, scores))
         if self.r_score:
             docs_with_scores = [
                 (d, s) for d, s in docs_with_scores if s >= self.r_score
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from open_webui.apps.rag.embedding_cache import EmbeddingCache
+from open_webui.config import (
+    RAG_WEB_EMBEDDING_CACHE_SIZE,
+    RAG_WEB_SEARCH_CACHE_SIZE,
+    RAG_WEB_SEARCH_CACHE_TTL,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class TTLCache:
+    """
+    Bounded LRU whose entries expire `ttl` seconds after they were set.
+    A `ttl` or `max_size` of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Engine results, keyed by engine, normalized query and result settings
+WEB_SEARCH_CACHE = TTLCache(RAG_WEB_SEARCH_CACHE_TTL, RAG_WEB_SEARCH_CACHE_SIZE)
+# Fetched and extracted pages, keyed by url
+WEB_PAGE_CACHE = TTLCache(RAG_WEB_SEARCH_CACHE_TTL, RAG_WEB_SEARCH_CACHE_SIZE)
+# The urls each web search collection was last built from
+WEB_SEARCH_COLLECTIONS = TTLCache(RAG_WEB_SEARCH_CACHE_TTL, RAG_WEB_SEARCH_CACHE_SIZE)
+# Embeddings of web page chunks; chunk text does not go stale, so no TTL
+WEB_EMBEDDING_CACHE = EmbeddingCache(RAG_WEB_EMBEDDING_CACHE_SIZE)
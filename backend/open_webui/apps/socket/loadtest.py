@@ -0,0 +1,110 @@
+"""
+Load test for the socket server: connects N simulated clients to a running
+instance, has each of them send `usage` events like a client generating a
+response, and reports the messages per second the server sent back.
+
+    python -m open_webui.apps.socket.loadtest --token <jwt> --clients 200
+
+Every client connects with the same token, so the user count stays at one;
+the broadcast volume comes from the usage events.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import socketio
+
+MODELS = ["llama3.1:latest", "mistral:latest", "qwen2.5:latest", "gemma2:latest"]
+
+
+async def run_client(
+    url: str,
+    token: str,
+    usage_interval: float,
+    duration: float,
+    received: Counter,
+    sent: Counter,
+):
+    client = socketio.AsyncClient(reconnection=False)
+
+    @client.on("*")
+    async def on_event(event, data):
+        received[event] += 1
+
+    await client.connect(
+        url,
+        socketio_path="/ws/socket.io",
+        transports=["websocket"],
+        auth={"token": token},
+    )
+
+    model = random.choice(MODELS)
+    deadline = time.monotonic() + duration
+    # Spread the clients' first events over one interval
+    await asyncio.sleep(random.uniform(0, usage_interval))
+    try:
+        while time.monotonic() < deadline:
+            await client.emit(
+                "usage", {"action": "chat", "model": model, "chat_id": ""}
+            )
+            sent["usage"] += 1
+            await asyncio.sleep(usage_interval)
+    finally:
+        await client.disconnect()
+
+
+async def run(args):
+    received = Counter()
+    sent = Counter()
+
+    started_at = time.monotonic()
+    results = await asyncio.gather(
+        *[
+            run_client(
+                args.url,
+                args.token,
+                args.usage_interval,
+                args.duration,
+                received,
+                sent,
+            )
+            for _ in range(args.clients)
+        ],
+        return_exceptions=True,
+    )
+    elapsed = time.monotonic() - started_at
+
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        print(f"{len(failed)} clients failed, first error: {failed[0]!r}")
+
+    print(f"clients: {args.clients - len(failed)}, elapsed: {elapsed:.1f}s")
+    print(f"sent: {sum(sent.values())} ({sum(sent.values()) / elapsed:.1f}/s)")
+    print(
+        f"received: {sum(received.values())} "
+        f"({sum(received.values()) / elapsed:.1f}/s)"
+    )
+    for event, count in sorted(received.items()):
+        print(f"  {event}: {count} ({count / elapsed:.1f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--token", required=True, help="JWT of an existing user")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument(
+        "--usage-interval",
+        type=float,
+        default=1,
+        help="seconds between usage events of each client",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
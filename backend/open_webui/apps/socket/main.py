@@ -1,41 +1,76 @@
-import asyncio
-
 import socketio
+from open_webui.apps.socket.presence import LocalPresence, RedisPresence
 from open_webui.apps.webui.models.users import Users
+from open_webui.env import (
+    WEBSOCKET_BROADCAST_INTERVAL,
+    WEBSOCKET_MANAGER,
+    WEBSOCKET_PRESENCE_TTL,
+    WEBSOCKET_REDIS_URL,
+)
 from open_webui.utils.utils import decode_token
 
-sio = socketio.AsyncServer(cors_allowed_origins=[], async_mode="asgi")
+# Timeout duration in seconds
+TIMEOUT_DURATION = 3
+
+if WEBSOCKET_MANAGER == "redis":
+    # Events, rooms and presence are shared by every worker and replica
+    sio = socketio.AsyncServer(
+        cors_allowed_origins=[],
+        async_mode="asgi",
+        client_manager=socketio.AsyncRedisManager(WEBSOCKET_REDIS_URL),
+    )
+    PRESENCE = RedisPresence(
+        WEBSOCKET_REDIS_URL,
+        TIMEOUT_DURATION,
+        WEBSOCKET_PRESENCE_TTL,
+        WEBSOCKET_BROADCAST_INTERVAL,
+    )
+else:
+    sio = socketio.AsyncServer(cors_allowed_origins=[], async_mode="asgi")
+    PRESENCE = LocalPresence(TIMEOUT_DURATION, WEBSOCKET_BROADCAST_INTERVAL)
+
 app = socketio.ASGIApp(sio, socketio_path="/ws/socket.io")
 
-# Dictionary to maintain the user pool
 
-SESSION_POOL = {}
-USER_POOL = {}
-USAGE_POOL = {}
-# Timeout duration in seconds
-TIMEOUT_DURATION = 3
+def get_user_room(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+# Broadcasts to every client are coalesced by the presence loop, once per
+# WEBSOCKET_BROADCAST_INTERVAL and only on change; events answer the
+# session that sent them with the current state
+async def emit_user_count(count: int, to=None):
+    await sio.emit("user-count", {"count": count}, to=to)
+
+
+async def emit_usage(models: list[str], to=None):
+    await sio.emit("usage", {"models": models}, to=to)
+
+
+async def join_user(sid, token):
+    data = decode_token(token)
+    if data is None or "id" not in data:
+        return None
+
+    user = Users.get_cached_user_by_id(data["id"])
+    if not user:
+        return None
+
+    await PRESENCE.add_session(sid, user.id)
+    await sio.enter_room(sid, get_user_room(user.id))
+
+    print(f"user {user.name}({user.id}) connected with session ID {sid}")
+    return user
 
 
 @sio.event
 async def connect(sid, environ, auth):
-    user = None
     if auth and "token" in auth:
-        data = decode_token(auth["token"])
-
-        if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+        user = await join_user(sid, auth["token"])
 
         if user:
-            SESSION_POOL[sid] = user.id
-            if user.id in USER_POOL:
-                USER_POOL[user.id].append(sid)
-            else:
-                USER_POOL[user.id] = [sid]
-
-            print(f"user {user.name}({user.id}) connected with session ID {sid}")
-
-            await sio.emit("user-count", {"count": len(set(USER_POOL))})
-            await sio.emit("usage", {"models": get_models_in_use()})
+            await emit_user_count(await PRESENCE.get_user_count(), to=sid)
+            await emit_usage(await PRESENCE.get_models_in_use(), to=sid)
 
 
 @sio.on("user-join")
@@ -46,97 +81,49 @@ async def user_join(sid, data):
     if not auth or "token" not in auth:
         return
 
-    data = decode_token(auth["token"])
-    if data is None or "id" not in data:
-        return
-
-    user = Users.get_user_by_id(data["id"])
+    user = await join_user(sid, auth["token"])
     if not user:
         return
 
-    SESSION_POOL[sid] = user.id
-    if user.id in USER_POOL:
-        USER_POOL[user.id].append(sid)
-    else:
-        USER_POOL[user.id] = [sid]
-
-    print(f"user {user.name}({user.id}) connected with session ID {sid}")
-
-    await sio.emit("user-count", {"count": len(set(USER_POOL))})
+    await emit_user_count(await PRESENCE.get_user_count(), to=sid)
 
 
 @sio.on("user-count")
 async def user_count(sid):
-    await sio.emit("user-count", {"count": len(set(USER_POOL))})
-
+    await emit_user_count(await PRESENCE.get_user_count(), to=sid)
 
-def get_models_in_use():
-    # Aggregate all models in use
-    models_in_use = []
-    for model_id, data in USAGE_POOL.items():
-        models_in_use.append(model_id)
 
-    return models_in_use
+async def get_models_in_use():
+    return await PRESENCE.get_models_in_use()
 
 
 @sio.on("usage")
 async def usage(sid, data):
     model_id = data["model"]
 
-    # Cancel previous callback if there is one
-    if model_id in USAGE_POOL:
-        USAGE_POOL[model_id]["callback"].cancel()
-
-    # Store the new usage data and task
-
-    if model_id in USAGE_POOL:
-        USAGE_POOL[model_id]["sids"].append(sid)
-        USAGE_POOL[model_id]["sids"] = list(set(USAGE_POOL[model_id]["sids"]))
+    # Usage expires TIMEOUT_DURATION seconds after the last event; the
+    # presence loop broadcasts the models in use when they change
+    await PRESENCE.touch_usage(model_id, sid)
 
-    else:
-        USAGE_POOL[model_id] = {"sids": [sid]}
 
-    # Schedule a task to remove the usage data after TIMEOUT_DURATION
-    USAGE_POOL[model_id]["callback"] = asyncio.create_task(
-        remove_after_timeout(sid, model_id)
-    )
-
-    # Broadcast the usage data to all clients
-    await sio.emit("usage", {"models": get_models_in_use()})
-
-
-async def remove_after_timeout(sid, model_id):
-    try:
-        await asyncio.sleep(TIMEOUT_DURATION)
-        if model_id in USAGE_POOL:
-            print(USAGE_POOL[model_id]["sids"])
-            USAGE_POOL[model_id]["sids"].remove(sid)
-            USAGE_POOL[model_id]["sids"] = list(set(USAGE_POOL[model_id]["sids"]))
-
-            if len(USAGE_POOL[model_id]["sids"]) == 0:
-                del USAGE_POOL[model_id]
+@sio.event
+async def disconnect(sid):
+    user_id = await PRESENCE.remove_session(sid)
+    if not user_id:
+        print(f"Unknown session ID {sid} disconnected")
 
-            # Broadcast the usage data to all clients
-            await sio.emit("usage", {"models": get_models_in_use()})
-    except asyncio.CancelledError:
-        # Task was cancelled due to new 'usage' event
-        pass
 
+def start_presence():
+    PRESENCE.start(emit_user_count, emit_usage)
 
-@sio.event
-async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user_id = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
 
-        USER_POOL[user_id].remove(sid)
+async def stop_presence():
+    await PRESENCE.stop()
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
 
-        await sio.emit("user-count", {"count": len(USER_POOL)})
-    else:
-        print(f"Unknown session ID {sid} disconnected")
+async def emit_to_user(user_id, event, data):
+    # Send to every connected session of the user, on any worker
+    await sio.emit(event, data, room=get_user_room(user_id))
 
 
 def get_event_emitter(request_info):
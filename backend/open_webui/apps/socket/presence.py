@@ -0,0 +1,364 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+from redis import asyncio as aioredis
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
+
+class LocalPresence:
+    """
+    Connected sessions and model usage of this process only. The default
+    for single worker deployments, and a stand-in for RedisPresence in tests.
+
+    Usage entries expire `usage_ttl` seconds after they were last touched.
+    Events only update state; `start` runs a loop that, every
+    `broadcast_interval` seconds, reports the user count and the models in
+    use if they changed since the last tick.
+    """
+
+    def __init__(self, usage_ttl: float, broadcast_interval: float = 1):
+        self.usage_ttl = usage_ttl
+        self.broadcast_interval = max(broadcast_interval, 0.1)
+
+        self.sessions: dict[str, str] = {}
+        self.user_sessions: Counter[str] = Counter()
+
+        # Latest expiry of each (model, sid), plus a heap of expiries to drop
+        # them in order; heap entries superseded by a later touch are skipped
+        self.usage: dict[tuple[str, str], float] = {}
+        self.usage_heap: list[tuple[float, str, str]] = []
+        self.model_sessions: Counter[str] = Counter()
+
+        self.broadcasts: dict[str, Any] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    async def add_session(self, sid: str, user_id: str):
+        previous = self.sessions.get(sid)
+        if previous == user_id:
+            return
+        if previous is not None:
+            self._remove_user_session(previous)
+        self.sessions[sid] = user_id
+        self.user_sessions[user_id] += 1
+
+    async def remove_session(self, sid: str) -> Optional[str]:
+        user_id = self.sessions.pop(sid, None)
+        if user_id is not None:
+            self._remove_user_session(user_id)
+        return user_id
+
+    def _remove_user_session(self, user_id: str):
+        self.user_sessions[user_id] -= 1
+        if self.user_sessions[user_id] <= 0:
+            del self.user_sessions[user_id]
+
+    async def get_user_count(self) -> int:
+        return len(self.user_sessions)
+
+    async def touch_usage(self, model_id: str, sid: str):
+        key = (model_id, sid)
+        expires_at = time.monotonic() + self.usage_ttl
+        if key not in self.usage:
+            self.model_sessions[model_id] += 1
+        self.usage[key] = expires_at
+        heapq.heappush(self.usage_heap, (expires_at, model_id, sid))
+
+        # Keep superseded entries from piling up under frequent touches
+        if len(self.usage_heap) > 2 * len(self.usage) + 64:
+            self.usage_heap = [
+                (expires_at, model_id, sid)
+                for (model_id, sid), expires_at in self.usage.items()
+            ]
+            heapq.heapify(self.usage_heap)
+
+    def _expire_usage(self):
+        now = time.monotonic()
+        while self.usage_heap and self.usage_heap[0][0] <= now:
+            expires_at, model_id, sid = heapq.heappop(self.usage_heap)
+            if self.usage.get((model_id, sid)) != expires_at:
+                continue
+            del self.usage[(model_id, sid)]
+            self.model_sessions[model_id] -= 1
+            if self.model_sessions[model_id] <= 0:
+                del self.model_sessions[model_id]
+
+    async def get_models_in_use(self) -> list[str]:
+        self._expire_usage()
+        return sorted(self.model_sessions)
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        """Whether this worker should run the periodic `name` job now."""
+        return True
+
+    async def refresh(self):
+        pass
+
+    async def changed(self, name: str, value) -> bool:
+        """Record `value` as last broadcast for `name`, and whether it differs."""
+        previous = self.broadcasts.get(name)
+        self.broadcasts[name] = value
+        return previous != value
+
+    async def _run(
+        self,
+        on_user_count_change: Callable[[int], Awaitable[None]],
+        on_usage_change: Callable[[list[str]], Awaitable[None]],
+    ):
+        while True:
+            await asyncio.sleep(self.broadcast_interval)
+            try:
+                await self.refresh()
+
+                if not await self.acquire("broadcast", self.broadcast_interval):
+                    continue
+
+                user_count = await self.get_user_count()
+                if await self.changed("user-count", user_count):
+                    await on_user_count_change(user_count)
+
+                models = await self.get_models_in_use()
+                if await self.changed("usage", models):
+                    await on_usage_change(models)
+            except Exception as e:
+                log.exception(f"presence update failed: {e}")
+
+    def start(
+        self,
+        on_user_count_change: Callable[[int], Awaitable[None]],
+        on_usage_change: Callable[[list[str]], Awaitable[None]],
+    ):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(
+                self._run(on_user_count_change, on_usage_change)
+            )
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+
+# KEYS: worker users set, users hash, workers zset
+# ARGV: user id, worker id, now
+JOIN_SCRIPT = """
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+if redis.call('SADD', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+end
+"""
+
+# KEYS: worker users set, users hash
+# ARGV: user id
+LEAVE_SCRIPT = """
+if redis.call('SREM', KEYS[1], ARGV[1]) == 1 then
+    if redis.call('HINCRBY', KEYS[2], ARGV[1], -1) <= 0 then
+        redis.call('HDEL', KEYS[2], ARGV[1])
+    end
+end
+"""
+
+# Heartbeat, and bring the worker's users in line with its sessions
+# KEYS: worker users set, users hash, workers zset
+# ARGV: worker id, now, user ids...
+SYNC_SCRIPT = """
+redis.call('ZADD', KEYS[3], ARGV[2], ARGV[1])
+local current = {}
+for i = 3, #ARGV do
+    current[ARGV[i]] = true
+end
+for _, user_id in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    if not current[user_id] then
+        redis.call('SREM', KEYS[1], user_id)
+        if redis.call('HINCRBY', KEYS[2], user_id, -1) <= 0 then
+            redis.call('HDEL', KEYS[2], user_id)
+        end
+    end
+end
+for i = 3, #ARGV do
+    if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+        redis.call('HINCRBY', KEYS[2], ARGV[i], 1)
+    end
+end
+"""
+
+# Drop a worker and its users, unless it sent a heartbeat after `cutoff`
+# KEYS: worker users set, users hash, workers zset
+# ARGV: worker id, cutoff
+REMOVE_WORKER_SCRIPT = """
+local seen = redis.call('ZSCORE', KEYS[3], ARGV[1])
+if seen and tonumber(seen) > tonumber(ARGV[2]) then
+    return 0
+end
+for _, user_id in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    if redis.call('HINCRBY', KEYS[2], user_id, -1) <= 0 then
+        redis.call('HDEL', KEYS[2], user_id)
+    end
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+class RedisPresence(LocalPresence):
+    """
+    Presence shared by every worker through redis.
+
+    Connected users are one hash of user id -> number of workers the user
+    has sessions on, so the user count is an HLEN. A worker only updates it
+    when a user's first session on it connects or their last one leaves,
+    and records its own users in a set. Workers heartbeat into a sorted
+    set; the users of a worker whose heartbeat is older than `ttl` seconds
+    (it died without disconnecting them) are subtracted by the others.
+    Usage is one sorted set of "model\\nsid" members scored by expiry time.
+    Only the worker holding the broadcast lock reports changes on a tick.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        usage_ttl: float,
+        ttl: float,
+        broadcast_interval: float = 1,
+        prefix="open-webui",
+    ):
+        super().__init__(usage_ttl, broadcast_interval)
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.ttl = max(1, int(ttl))
+        self.prefix = prefix
+        self.worker_id = uuid.uuid4().hex
+
+        self.join_script = self.redis.register_script(JOIN_SCRIPT)
+        self.leave_script = self.redis.register_script(LEAVE_SCRIPT)
+        self.sync_script = self.redis.register_script(SYNC_SCRIPT)
+        self.remove_worker_script = self.redis.register_script(REMOVE_WORKER_SCRIPT)
+
+        self.refreshed_at = 0.0
+
+    @property
+    def users_key(self) -> str:
+        return f"{self.prefix}:users"
+
+    @property
+    def workers_key(self) -> str:
+        return f"{self.prefix}:workers"
+
+    def get_worker_users_key(self, worker_id: str) -> str:
+        return f"{self.prefix}:workers:{worker_id}:users"
+
+    @property
+    def usage_key(self) -> str:
+        return f"{self.prefix}:usage"
+
+    async def add_session(self, sid: str, user_id: str):
+        previous = self.sessions.get(sid)
+        await super().add_session(sid, user_id)
+        if previous == user_id:
+            return
+
+        worker_users_key = self.get_worker_users_key(self.worker_id)
+        if previous is not None and previous not in self.user_sessions:
+            await self.leave_script(
+                keys=[worker_users_key, self.users_key], args=[previous]
+            )
+        if self.user_sessions[user_id] == 1:
+            await self.join_script(
+                keys=[worker_users_key, self.users_key, self.workers_key],
+                args=[user_id, self.worker_id, time.time()],
+            )
+
+    async def remove_session(self, sid: str) -> Optional[str]:
+        user_id = await super().remove_session(sid)
+        if user_id is not None and user_id not in self.user_sessions:
+            await self.leave_script(
+                keys=[self.get_worker_users_key(self.worker_id), self.users_key],
+                args=[user_id],
+            )
+        return user_id
+
+    async def get_user_count(self) -> int:
+        return await self.redis.hlen(self.users_key)
+
+    async def touch_usage(self, model_id: str, sid: str):
+        await self.redis.zadd(
+            self.usage_key, {f"{model_id}\n{sid}": time.time() + self.usage_ttl}
+        )
+
+    async def get_models_in_use(self) -> list[str]:
+        await self.redis.zremrangebyscore(self.usage_key, "-inf", time.time())
+        members = await self.redis.zrange(self.usage_key, 0, -1)
+        return sorted({member.split("\n", 1)[0] for member in members})
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        return bool(
+            await self.redis.set(
+                f"{self.prefix}:lock:{name}",
+                self.worker_id,
+                nx=True,
+                px=max(1, int(ttl * 1000)),
+            )
+        )
+
+    async def changed(self, name: str, value) -> bool:
+        # Shared, so a worker taking over the lock compares against what
+        # the previous holder broadcast rather than its own last broadcast
+        value = json.dumps(value)
+        previous = await self.redis.set(
+            f"{self.prefix}:broadcast:{name}", value, ex=self.ttl, get=True
+        )
+        return previous != value
+
+    async def remove_worker(self, worker_id: str, cutoff: float) -> bool:
+        return bool(
+            await self.remove_worker_script(
+                keys=[
+                    self.get_worker_users_key(worker_id),
+                    self.users_key,
+                    self.workers_key,
+                ],
+                args=[worker_id, cutoff],
+            )
+        )
+
+    async def refresh(self):
+        # Heartbeat well before other workers consider this one dead
+        if time.monotonic() - self.refreshed_at < self.ttl / 3:
+            return
+        self.refreshed_at = time.monotonic()
+
+        now = time.time()
+        await self.sync_script(
+            keys=[
+                self.get_worker_users_key(self.worker_id),
+                self.users_key,
+                self.workers_key,
+            ],
+            args=[self.worker_id, now, *self.user_sessions],
+        )
+
+        cutoff = now - self.ttl
+        for worker_id in await self.redis.zrangebyscore(
+            self.workers_key, "-inf", cutoff
+        ):
+            if await self.remove_worker(worker_id, cutoff):
+                log.info(f"removed the sessions of stale worker {worker_id}")
+
+    async def stop(self):
+        await super().stop()
+        try:
+            await self.remove_worker(self.worker_id, time.time())
+            await self.redis.aclose()
+        except Exception as e:
+            log.debug(f"failed to clean up presence: {e}")
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from open_webui.apps.socket.main import emit_to_user
+from open_webui.apps.webui.models.files import FileModel, Files
+from open_webui.apps.webui.models.jobs import JobModel, Jobs, JobStatus
+from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
+from open_webui.apps.webui.routers.loader.classes.DOCXLoader import DOCXLoader
+from open_webui.apps.webui.routers.loader.classes.MSGLoader import MSGLoader
+from open_webui.apps.webui.routers.loader.classes.PDFLoader import PDFLoader
+from open_webui.apps.webui.routers.loader.classes.PPTXLoader import PPTXLoader
+from open_webui.config import (
+    INGESTION_JOB_CLAIM_TIMEOUT,
+    INGESTION_JOB_MAX_RETRIES,
+    INGESTION_JOB_WORKERS,
+    UPLOAD_DIR,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+LOADERS = {
+    "docx": DOCXLoader,
+    "pptx": PPTXLoader,
+    # "xlsx": XLSXLoader,
+    "pdf": PDFLoader,
+    "msg": MSGLoader,
+}
+
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 300
+
+
+def format_chunks(chunks: list[Chunk]) -> str:
+    if not chunks:
+        return ""
+
+    # 假設所有 chunks 的 metadata['page_title'] 和 metadata['source'] 都相同
+    # title = chunks[0].metadata['page_title']
+    source = chunks[0].metadata["source"]
+
+    # 組合內文
+    content = "\n".join(chunk.content for chunk in chunks)
+
+    # 組合完整輸出
+    formatted_output = f"檔名 {source}\n\n內文:\n{content}"
+
+    return formatted_output
+
+
+def get_job_files(job: JobModel, file: FileModel) -> list[FileModel]:
+    # Uploads of the same content by the same user share one job
+    if not file.hash:
+        return [file]
+    return [
+        shared_file
+        for shared_file in Files.get_files_by_hash(file.hash, user_id=job.user_id)
+        if shared_file.meta.get("job_id") == job.id
+    ]
+
+
+def process_ingestion_job(job: JobModel, on_progress: Callable[[int], None]):
+    """
+    Extract the text of an uploaded document with its loader, save it next
+    to the upload as a .txt file and point the file record at it.
+    """
+    file = Files.get_file_by_id(job.file_id)
+    if file is None:
+        raise Exception(f"File {job.file_id} not found")
+
+    file_path = file.meta["path"]
+    name = file.meta.get("name", file.filename)
+    ext = os.path.splitext(name)[1].lower().lstrip(".")
+
+    LoaderClass = LOADERS.get(ext)
+    if LoaderClass is None:
+        raise Exception(f"Unsupported file format: {ext}")
+
+    on_progress(10)
+    loader = LoaderClass(directory=f"{UPLOAD_DIR}")
+    loader._load_file(file_path=file_path)
+
+    chunks = loader.loaded_files.get(file_path)
+    if not chunks:
+        raise Exception(f"No content could be extracted from {name}")
+
+    on_progress(80)
+    content = format_chunks(list(chunks))
+
+    # Save extracted content as a .txt file
+    base_filename = os.path.splitext(name)[0]
+    extracted_filename = f"{file.id}_{base_filename}.txt"
+    extracted_file_path = f"{UPLOAD_DIR}/{extracted_filename}"
+    with open(extracted_file_path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+    # Update path in the database for the new .txt file, for every upload
+    # of the same content that is waiting on this job
+    for shared_file in get_job_files(job, file):
+        shared_name = shared_file.meta.get("name", shared_file.filename)
+        Files.update_file_by_id(
+            shared_file.id,
+            {
+                "filename": extracted_filename,
+                "meta": {
+                    **shared_file.meta,
+                    "name": f"{os.path.splitext(shared_name)[0]}.txt",
+                    "content_type": "text/plain",
+                    "size": len(content),
+                    "path": extracted_file_path,
+                    "status": JobStatus.COMPLETED,
+                },
+            },
+        )
+
+
+class IngestionQueue:
+    """
+    Background queue for document ingestion jobs.
+
+    Jobs are persisted in the `ingestion_job` table and processed by
+    `workers` asyncio workers, each running the blocking extraction on a
+    thread pool. Several processes may run a queue against the same
+    database: a job only runs once a worker has claimed it, and the claim is
+    renewed while it runs. A periodic sweep picks up pending jobs and jobs
+    whose claim went stale, e.g. because their worker died.
+
+    Failed jobs are retried with exponential backoff up to `max_retries`
+    times. Every state change is pushed to the job owner's socket.io
+    sessions as an `ingestion-job` event.
+    """
+
+    def __init__(
+        self,
+        workers: int = INGESTION_JOB_WORKERS,
+        max_retries: int = INGESTION_JOB_MAX_RETRIES,
+        claim_timeout: int = INGESTION_JOB_CLAIM_TIMEOUT,
+    ):
+        self.num_workers = max(1, workers)
+        self.max_retries = max(0, max_retries)
+        self.claim_timeout = max(1, claim_timeout)
+        self.worker_id = uuid.uuid4().hex
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.queued: set[str] = set()
+        self.tasks: set[asyncio.Task] = set()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.num_workers, thread_name_prefix="ingestion"
+        )
+
+    @property
+    def sweep_interval(self) -> float:
+        return max(1, self.claim_timeout / 3)
+
+    def start(self):
+        if self.loop is not None:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.queued = set()
+
+        self._create_task(self._sweep())
+        for _ in range(self.num_workers):
+            self._create_task(self._worker())
+
+    async def stop(self):
+        tasks, self.tasks = self.tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop = None
+        self.queue = None
+
+    def enqueue(self, job_id: str):
+        """Thread safe; may be called from sync route handlers."""
+        if self.loop is None:
+            log.warning(f"ingestion queue not running, job {job_id} left pending")
+            return
+        self.loop.call_soon_threadsafe(self._put, job_id)
+
+    def _put(self, job_id: str):
+        if job_id not in self.queued:
+            self.queued.add(job_id)
+            self.queue.put_nowait(job_id)
+
+    def _create_task(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _emit(self, job: JobModel):
+        try:
+            await emit_to_user(job.user_id, "ingestion-job", job.model_dump())
+        except Exception as e:
+            log.debug(f"failed to emit ingestion job update: {e}")
+
+    async def _update(self, job_id: str, updated: dict) -> Optional[JobModel]:
+        # Only while this worker still holds the claim
+        job = Jobs.update_job_by_id(job_id, updated, worker=self.worker_id)
+        if job:
+            await self._emit(job)
+        return job
+
+    async def _sweep(self):
+        while True:
+            try:
+                for job_id in Jobs.get_claimable_job_ids(self.claim_timeout):
+                    self._put(job_id)
+            except Exception as e:
+                log.exception(f"failed to look up ingestion jobs: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _renew_claim(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            if not Jobs.renew_claim(job_id, self.worker_id):
+                log.warning(f"lost the claim on ingestion job {job_id}")
+                return
+
+    async def _retry_later(self, job_id: str, delay: float):
+        await asyncio.sleep(delay)
+        self._put(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            self.queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                log.exception(f"ingestion job {job_id} crashed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = Jobs.claim_job(job_id, self.worker_id, self.claim_timeout)
+        if job is None:
+            # Finished, backing off, or held by another worker
+            return
+        if job.attempts > 1:
+            log.info(f"running ingestion job {job_id}, attempt {job.attempts}")
+        await self._emit(job)
+
+        def on_progress(progress: int):
+            # Called from the worker thread
+            asyncio.run_coroutine_threadsafe(
+                self._update(job_id, {"progress": progress}), self.loop
+            )
+
+        renew_claim = self._create_task(self._renew_claim(job_id))
+        try:
+            await self.loop.run_in_executor(
+                self.executor, process_ingestion_job, job, on_progress
+            )
+            await self._update(
+                job_id,
+                {"status": JobStatus.COMPLETED, "progress": 100, "error": None},
+            )
+        except Exception as e:
+            log.exception(f"ingestion job {job_id} failed: {e}")
+
+            if job.attempts <= self.max_retries:
+                delay = min(RETRY_BASE_DELAY * 2 ** (job.attempts - 1), RETRY_MAX_DELAY)
+                await self._update(
+                    job_id,
+                    {
+                        "status": JobStatus.PENDING,
+                        "error": str(e),
+                        "worker": None,
+                        "claimed_at": None,
+                        "available_at": int(time.time() + delay),
+                    },
+                )
+                self._create_task(self._retry_later(job_id, delay))
+            else:
+                await self._update(
+                    job_id, {"status": JobStatus.FAILED, "error": str(e)}
+                )
+
+                # Its upload may have been deleted and the job handed over
+                job = Jobs.get_job_by_id(job_id) or job
+                file = Files.get_file_by_id(job.file_id)
+                if file:
+                    for shared_file in get_job_files(job, file):
+                        Files.update_file_by_id(
+                            shared_file.id,
+                            {"meta": {**shared_file.meta, "status": JobStatus.FAILED}},
+                        )
+        finally:
+            renew_claim.cancel()
+
+
+INGESTION_QUEUE = IngestionQueue()
@@ -1,11 +1,21 @@
+import hashlib
 import json
 import time
 import uuid
 from typing import Optional
 
-from open_webui.apps.webui.internal.db import Base, get_db
+from open_webui.apps.webui.internal.db import Base, JSONField, get_db
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    String,
+    Text,
+    and_,
+    or_,
+    select,
+)
 
 ####################
 # Chat DB Schema
@@ -42,6 +52,127 @@ class ChatModel(BaseModel):
     archived: bool = False
 
 
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    parent_id = Column(String, nullable=True)
+    content = Column(Text, nullable=True)
+    meta = Column(JSONField)  # Every other field of the message
+    hash = Column(String)  # Digest of the whole message, to skip unchanged ones
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+####################
+# Chat Messages
+####################
+
+# The chat column holds the chat JSON without history.messages (and without
+# the derived messages list); each message of history.messages is a row of
+# chat_message, so saving a chat only writes the messages that changed.
+# Chats without a history, like those stored before the split, stay whole.
+
+
+def get_history_messages(chat: dict) -> Optional[dict]:
+    history = chat.get("history")
+    if isinstance(history, dict) and isinstance(history.get("messages"), dict):
+        return history["messages"]
+    return None
+
+
+def split_chat(chat: dict) -> tuple[dict, Optional[dict]]:
+    """The chat without its messages, and the messages by id."""
+    messages = get_history_messages(chat)
+    if messages is None:
+        return chat, None
+
+    skeleton = {key: value for key, value in chat.items() if key != "messages"}
+    skeleton["history"] = {
+        key: value for key, value in chat["history"].items() if key != "messages"
+    }
+    return skeleton, messages
+
+
+def is_split_chat(chat: dict) -> bool:
+    history = chat.get("history")
+    return isinstance(history, dict) and "messages" not in history
+
+
+def join_chat(skeleton: dict, messages: dict) -> dict:
+    """Inverse of split_chat, rebuilding the messages of the current branch."""
+    if not is_split_chat(skeleton):
+        return skeleton
+
+    history = skeleton["history"]
+    branch = []
+    message_id = history.get("currentId")
+    while message_id in messages and len(branch) < len(messages):
+        branch.append(messages[message_id])
+        message_id = messages[message_id].get("parentId")
+
+    return {
+        **skeleton,
+        "history": {**history, "messages": messages},
+        "messages": branch[::-1],
+    }
+
+
+def get_message_values(message: dict) -> dict:
+    content = message.get("content")
+    if not isinstance(content, str):
+        content = None
+
+    return {
+        "parent_id": message.get("parentId"),
+        "content": content,
+        "meta": {
+            key: value
+            for key, value in message.items()
+            if key != "content" or content is None
+        },
+        "hash": hashlib.sha256(
+            json.dumps(message, sort_keys=True).encode()
+        ).hexdigest(),
+    }
+
+
+def get_message_timestamp(message: dict, default: int) -> int:
+    """The message's own creation time, which orders the messages of a chat."""
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return int(timestamp)
+    return default
+
+
+def get_message(message: ChatMessage) -> dict:
+    if message.content is None:
+        return {**message.meta}
+    return {**message.meta, "content": message.content}
+
+
+####################
+# Pagination
+####################
+
+# Chat lists are ordered by (updated_at, id) descending. A cursor is the
+# "<updated_at>:<id>" of the last chat of the previous page, returned by the
+# list endpoints in the X-Next-Cursor header when a page is full.
+
+
+def get_chat_cursor(updated_at: int, id: str) -> str:
+    return f"{updated_at}:{id}"
+
+
+def parse_chat_cursor(cursor: str) -> tuple[int, str]:
+    updated_at, separator, id = cursor.partition(":")
+    if not separator or not id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(updated_at), id
+
+
 ####################
 # Forms
 ####################
@@ -55,6 +186,15 @@ class ChatTitleForm(BaseModel):
     title: str
 
 
+class ChatMessagesForm(BaseModel):
+    messages: dict[str, dict]
+    current_id: Optional[str] = None
+
+
+class ChatMessageForm(BaseModel):
+    message: dict
+
+
 class ChatResponse(BaseModel):
     id: str
     user_id: str
@@ -74,9 +214,99 @@ class ChatTitleIdResponse(BaseModel):
 
 
 class ChatTable:
+    def _write_messages(
+        self, db, chat_id: str, messages: dict, replace: bool = False
+    ) -> int:
+        """
+        Insert or update the given messages of a chat, skipping those whose
+        hash did not change. With `replace`, messages not given are deleted.
+        Returns the number of messages written.
+        """
+        hashes = dict(
+            db.query(ChatMessage.id, ChatMessage.hash).filter_by(chat_id=chat_id).all()
+        )
+
+        now = int(time.time())
+        written = 0
+        for message_id, message in messages.items():
+            values = get_message_values(message)
+            if message_id not in hashes:
+                db.add(
+                    ChatMessage(
+                        chat_id=chat_id,
+                        id=message_id,
+                        created_at=get_message_timestamp(message, now),
+                        updated_at=now,
+                        **values,
+                    )
+                )
+            elif hashes[message_id] != values["hash"]:
+                db.query(ChatMessage).filter_by(chat_id=chat_id, id=message_id).update(
+                    {**values, "updated_at": now}
+                )
+            else:
+                continue
+            written += 1
+
+        if replace:
+            removed = set(hashes) - set(messages)
+            if removed:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id == chat_id, ChatMessage.id.in_(removed)
+                ).delete(synchronize_session=False)
+
+        return written
+
+    def _get_messages(self, db, chat_ids: list[str]) -> dict[str, dict]:
+        messages = {chat_id: {} for chat_id in chat_ids}
+        for message in (
+            db.query(ChatMessage)
+            .filter(ChatMessage.chat_id.in_(chat_ids))
+            .order_by(ChatMessage.created_at, ChatMessage.id)
+        ):
+            messages[message.chat_id][message.id] = get_message(message)
+        return messages
+
+    def _delete_messages(self, db, chat_ids):
+        db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete(
+            synchronize_session=False
+        )
+
+    def get_chat_content(
+        self, chat: ChatModel, messages: Optional[dict] = None
+    ) -> dict:
+        """
+        The full chat JSON of `chat`. `messages` can be passed when the
+        caller already has them, e.g. right after writing them.
+        """
+        content = json.loads(chat.chat)
+        if not is_split_chat(content):
+            return content
+
+        if messages is None:
+            with get_db() as db:
+                messages = self._get_messages(db, [chat.id])[chat.id]
+        return join_chat(content, messages)
+
+    def get_chat_contents(self, chats: list[ChatModel]) -> list[dict]:
+        contents = [json.loads(chat.chat) for chat in chats]
+        split_ids = [
+            chat.id for chat, content in zip(chats, contents) if is_split_chat(content)
+        ]
+        if not split_ids:
+            return contents
+
+        with get_db() as db:
+            messages = self._get_messages(db, split_ids)
+        return [
+            join_chat(content, messages[chat.id]) if chat.id in messages else content
+            for chat, content in zip(chats, contents)
+        ]
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
+            skeleton, messages = split_chat(form_data.chat)
             chat = ChatModel(
                 **{
                     "id": id,
@@ -86,7 +316,7 @@ class ChatTable:
                         if "title" in form_data.chat
                         else "New Chat"
                     ),
-                    "chat": json.dumps(form_data.chat),
+                    "chat": json.dumps(skeleton),
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
                 }
@@ -94,15 +324,26 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            if messages:
+                self._write_messages(db, id, messages)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
+        """
+        Merge the top level fields of `chat` into the stored chat. A history
+        with messages replaces the stored messages, writing only changed ones.
+        """
         try:
             with get_db() as db:
                 chat_obj = db.get(Chat, id)
-                chat_obj.chat = json.dumps(chat)
+                chat = {**json.loads(chat_obj.chat), **chat}
+                skeleton, messages = split_chat(chat)
+
+                if messages is not None:
+                    self._write_messages(db, id, messages, replace=True)
+                chat_obj.chat = json.dumps(skeleton)
                 chat_obj.title = chat["title"] if "title" in chat else "New Chat"
                 chat_obj.updated_at = int(time.time())
                 db.commit()
@@ -112,6 +353,84 @@ class ChatTable:
         except Exception:
             return None
 
+    def upsert_messages_by_chat_id(
+        self, id: str, messages: dict, current_id: Optional[str] = None
+    ) -> Optional[ChatModel]:
+        """
+        Add or replace some messages of a chat, leaving the others as they
+        are. New messages are also added to the childrenIds of their parent.
+        """
+        try:
+            with get_db() as db:
+                chat_obj = db.get(Chat, id)
+                skeleton = json.loads(chat_obj.chat)
+                if not is_split_chat(skeleton):
+                    # Stored whole, split it first
+                    skeleton, stored = split_chat(skeleton)
+                    if stored is None:
+                        return None
+                    self._write_messages(db, id, stored)
+
+                existing = {
+                    message_id
+                    for (message_id,) in db.query(ChatMessage.id).filter(
+                        ChatMessage.chat_id == id,
+                        ChatMessage.id.in_(list(messages)),
+                    )
+                }
+                parents = {}
+                for message_id, message in messages.items():
+                    parent_id = message.get("parentId")
+                    if message_id in existing or not parent_id:
+                        continue
+                    if parent_id in messages:
+                        parent = messages[parent_id]
+                    elif parent_id in parents:
+                        parent = parents[parent_id]
+                    else:
+                        parent = self._get_message(db, id, parent_id)
+                        if parent is None:
+                            continue
+                        parents[parent_id] = parent
+                    children = parent.setdefault("childrenIds", [])
+                    if message_id not in children:
+                        children.append(message_id)
+
+                self._write_messages(db, id, {**parents, **messages})
+
+                if current_id is not None:
+                    skeleton["history"]["currentId"] = current_id
+                chat_obj.chat = json.dumps(skeleton)
+                chat_obj.updated_at = int(time.time())
+                db.commit()
+                db.refresh(chat_obj)
+
+                return ChatModel.model_validate(chat_obj)
+        except Exception:
+            return None
+
+    def _get_message(self, db, chat_id: str, message_id: str) -> Optional[dict]:
+        message = db.get(ChatMessage, (chat_id, message_id))
+        return get_message(message) if message else None
+
+    def update_message_by_id(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[dict]:
+        """Merge the fields of `message` into a stored message."""
+        try:
+            with get_db() as db:
+                stored = self._get_message(db, id, message_id)
+                if stored is None:
+                    return None
+
+                message = {**stored, **message}
+                self._write_messages(db, id, {message_id: message})
+                db.query(Chat).filter_by(id=id).update({"updated_at": int(time.time())})
+                db.commit()
+                return message
+        except Exception:
+            return None
+
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
@@ -132,6 +451,19 @@ class ChatTable:
             )
             shared_result = Chat(**shared_chat.model_dump())
             db.add(shared_result)
+            for message in db.query(ChatMessage).filter_by(chat_id=chat_id):
+                db.add(
+                    ChatMessage(
+                        chat_id=shared_chat.id,
+                        id=message.id,
+                        parent_id=message.parent_id,
+                        content=message.content,
+                        meta=message.meta,
+                        hash=message.hash,
+                        created_at=message.created_at,
+                        updated_at=message.updated_at,
+                    )
+                )
             db.commit()
             db.refresh(shared_result)
 
@@ -162,6 +494,9 @@ class ChatTable:
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_messages(
+                    db, select(Chat.id).where(Chat.user_id == f"shared-{chat_id}")
+                )
                 db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
                 db.commit()
 
@@ -202,36 +537,59 @@ class ChatTable:
         except Exception:
             return False
 
-    def get_archived_chat_list_by_user_id(
-        self, user_id: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
-        with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id, archived=True)
-                .order_by(Chat.updated_at.desc())
-                # .limit(limit).offset(skip)
-                .all()
+    def _paginate(self, query, cursor: Optional[str], limit: Optional[int]):
+        """Newest first, continuing after `cursor` when given."""
+        query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+        if cursor:
+            updated_at, id = parse_chat_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Chat.updated_at < updated_at,
+                    and_(Chat.updated_at == updated_at, Chat.id < id),
+                )
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+        if limit:
+            query = query.limit(limit)
+        return query
 
-    def get_chat_list_by_user_id(
+    def _get_title_id_list(
+        self,
+        query,
+        cursor: Optional[str] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatTitleIdResponse]:
+        # Only the listed columns, never the chat JSON
+        query = self._paginate(
+            query.with_entities(Chat.id, Chat.title, Chat.updated_at, Chat.created_at),
+            cursor,
+            limit,
+        )
+        if skip:
+            query = query.offset(skip)
+
+        # result has to be destrctured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
+        return [
+            ChatTitleIdResponse.model_validate(
+                {
+                    "id": chat[0],
+                    "title": chat[1],
+                    "updated_at": chat[2],
+                    "created_at": chat[3],
+                }
+            )
+            for chat in query.all()
+        ]
+
+    def get_archived_chat_list_by_user_id(
         self,
         user_id: str,
-        include_archived: bool = False,
-        skip: int = 0,
-        limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
-            if not include_archived:
-                query = query.filter_by(archived=False)
-            all_chats = (
-                query.order_by(Chat.updated_at.desc())
-                # .limit(limit).offset(skip)
-                .all()
-            )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            query = db.query(Chat).filter_by(user_id=user_id, archived=True)
+            return self._get_title_id_list(query, cursor=cursor, limit=limit)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -239,48 +597,25 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
-
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
-            )
-
-            if limit:
-                query = query.limit(limit)
-            if skip:
-                query = query.offset(skip)
-
-            all_chats = query.all()
-
-            # result has to be destrctured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
-            return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
-            ]
+            return self._get_title_id_list(query, cursor=cursor, skip=skip, limit=limit)
 
     def get_chat_list_by_chat_ids(
-        self, chat_ids: list[str], skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+        self,
+        chat_ids: list[str],
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter(Chat.id.in_(chat_ids))
-                .filter_by(archived=False)
-                .order_by(Chat.updated_at.desc())
-                .all()
+            query = (
+                db.query(Chat).filter(Chat.id.in_(chat_ids)).filter_by(archived=False)
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._get_title_id_list(query, cursor=cursor, limit=limit)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
@@ -310,36 +645,43 @@ class ChatTable:
         except Exception:
             return None
 
-    def get_chats(self, skip: int = 0, limit: int = 50) -> list[ChatModel]:
+    def get_chats(
+        self, cursor: Optional[str] = None, limit: Optional[int] = None
+    ) -> list[ChatModel]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                # .limit(limit).offset(skip)
-                .order_by(Chat.updated_at.desc())
-            )
+            all_chats = self._paginate(db.query(Chat), cursor, limit)
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
-    def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def get_chats_by_user_id(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatModel]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id)
-                .order_by(Chat.updated_at.desc())
+            all_chats = self._paginate(
+                db.query(Chat).filter_by(user_id=user_id), cursor, limit
             )
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
-    def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def get_archived_chats_by_user_id(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatModel]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id, archived=True)
-                .order_by(Chat.updated_at.desc())
+            all_chats = self._paginate(
+                db.query(Chat).filter_by(user_id=user_id, archived=True),
+                cursor,
+                limit,
             )
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_messages(db, [id])
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -350,7 +692,8 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    self._delete_messages(db, [id])
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -362,6 +705,9 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                self._delete_messages(
+                    db, select(Chat.id).where(Chat.user_id == user_id)
+                )
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -375,6 +721,9 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
+                self._delete_messages(
+                    db, select(Chat.id).where(Chat.user_id.in_(shared_chat_ids))
+                )
                 db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
                 db.commit()
 
@@ -144,6 +144,23 @@ class DocumentsTable:
             log.exception(e)
             return None
 
+    def update_doc_collection_name_by_name(
+        self, name: str, collection_name: str
+    ) -> Optional[DocumentModel]:
+        try:
+            with get_db() as db:
+                db.query(Document).filter_by(name=name).update(
+                    {
+                        "collection_name": collection_name,
+                        "timestamp": int(time.time()),
+                    }
+                )
+                db.commit()
+                return self.get_doc_by_name(name)
+        except Exception as e:
+            log.exception(e)
+            return None
+
     def delete_doc_by_name(self, name: str) -> bool:
         try:
             with get_db() as db:
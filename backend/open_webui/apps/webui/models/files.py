@@ -21,6 +21,8 @@ class File(Base):
     id = Column(String, primary_key=True)
     user_id = Column(String)
     filename = Column(Text)
+    # sha256 of the uploaded bytes; uploads with the same hash share storage
+    hash = Column(Text, nullable=True)
     meta = Column(JSONField)
     created_at = Column(BigInteger)
 
@@ -29,6 +31,7 @@ class FileModel(BaseModel):
     id: str
     user_id: str
     filename: str
+    hash: Optional[str] = None
     meta: dict
     created_at: int  # timestamp in epoch
 
@@ -51,6 +54,7 @@ class FileModelResponse(BaseModel):
 class FileForm(BaseModel):
     id: str
     filename: str
+    hash: Optional[str] = None
     meta: dict = {}
 
 
@@ -90,6 +94,25 @@ class FilesTable:
         with get_db() as db:
             return [FileModel.model_validate(file) for file in db.query(File).all()]
 
+    def get_file_by_hash(self, file_hash: str, user_id: str) -> Optional[FileModel]:
+        with get_db() as db:
+            file = (
+                db.query(File)
+                .filter_by(hash=file_hash, user_id=user_id)
+                .order_by(File.created_at)
+                .first()
+            )
+            return FileModel.model_validate(file) if file else None
+
+    def get_files_by_hash(
+        self, file_hash: str, user_id: Optional[str] = None
+    ) -> list[FileModel]:
+        with get_db() as db:
+            query = db.query(File).filter_by(hash=file_hash)
+            if user_id is not None:
+                query = query.filter_by(user_id=user_id)
+            return [FileModel.model_validate(file) for file in query.all()]
+
     def get_files_by_user_id(self, user_id: str) -> list[FileModel]:
         with get_db() as db:
             return [
@@ -97,6 +120,18 @@ class FilesTable:
                 for file in db.query(File).filter_by(user_id=user_id).all()
             ]
 
+    def update_file_by_id(self, id: str, updated: dict) -> Optional[FileModel]:
+        try:
+            with get_db() as db:
+                db.query(File).filter_by(id=id).update(updated)
+                db.commit()
+
+                file = db.get(File, id)
+                db.refresh(file)
+                return FileModel.model_validate(file)
+        except Exception:
+            return None
+
     def delete_file_by_id(self, id: str) -> bool:
         with get_db() as db:
             try:
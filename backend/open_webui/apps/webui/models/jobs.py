@@ -0,0 +1,208 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.apps.webui.internal.db import Base, JSONField, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Integer, String, Text, and_, or_
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Jobs DB Schema
+####################
+
+
+class JobStatus:
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class Job(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+    file_id = Column(String)
+    status = Column(String)
+    progress = Column(Integer)
+    attempts = Column(Integer)
+    error = Column(Text, nullable=True)
+    meta = Column(JSONField, nullable=True)
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    # Worker process running the job, and when it last renewed its claim
+    worker = Column(String, nullable=True)
+    claimed_at = Column(BigInteger, nullable=True)
+    # Pending jobs are not claimed before this time, e.g. while backing off
+    available_at = Column(BigInteger, nullable=True)
+
+
+class JobModel(BaseModel):
+    id: str
+    user_id: str
+    file_id: str
+    status: str
+    progress: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    meta: Optional[dict] = None
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+    worker: Optional[str] = None
+    claimed_at: Optional[int] = None
+    available_at: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+####################
+# Forms
+####################
+
+
+class JobForm(BaseModel):
+    id: Optional[str] = None
+    file_id: str
+    meta: dict = {}
+
+
+class JobsTable:
+    def insert_new_job(self, user_id: str, form_data: JobForm) -> Optional[JobModel]:
+        with get_db() as db:
+            job = JobModel(
+                **{
+                    **form_data.model_dump(),
+                    "id": form_data.id or str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "status": JobStatus.PENDING,
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+
+            try:
+                result = Job(**job.model_dump())
+                db.add(result)
+                db.commit()
+                db.refresh(result)
+                if result:
+                    return JobModel.model_validate(result)
+                else:
+                    return None
+            except Exception as e:
+                log.exception(f"Error creating job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[JobModel]:
+        with get_db() as db:
+            try:
+                job = db.get(Job, id)
+                return JobModel.model_validate(job)
+            except Exception:
+                return None
+
+    def get_jobs_by_user_id(self, user_id: str) -> list[JobModel]:
+        with get_db() as db:
+            return [
+                JobModel.model_validate(job)
+                for job in db.query(Job)
+                .filter_by(user_id=user_id)
+                .order_by(Job.created_at.desc())
+                .all()
+            ]
+
+    def _claimable(self, claim_timeout: int):
+        now = int(time.time())
+        return or_(
+            and_(
+                Job.status == JobStatus.PENDING,
+                or_(Job.available_at.is_(None), Job.available_at <= now),
+            ),
+            # Claimed by a worker that stopped renewing it
+            and_(
+                Job.status == JobStatus.PROCESSING,
+                or_(Job.claimed_at.is_(None), Job.claimed_at < now - claim_timeout),
+            ),
+        )
+
+    def get_claimable_job_ids(self, claim_timeout: int) -> list[str]:
+        with get_db() as db:
+            return [
+                id
+                for (id,) in db.query(Job.id)
+                .filter(self._claimable(claim_timeout))
+                .order_by(Job.created_at)
+                .all()
+            ]
+
+    def claim_job(self, id: str, worker: str, claim_timeout: int) -> Optional[JobModel]:
+        """
+        Atomically mark the job as processing by `worker`, if it is pending
+        or its previous claim went stale. Returns None when another worker
+        holds it or it has finished.
+        """
+        with get_db() as db:
+            now = int(time.time())
+            claimed = (
+                db.query(Job)
+                .filter(Job.id == id, self._claimable(claim_timeout))
+                .update(
+                    {
+                        "status": JobStatus.PROCESSING,
+                        "worker": worker,
+                        "claimed_at": now,
+                        "progress": 0,
+                        "attempts": Job.attempts + 1,
+                        "updated_at": now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if not claimed:
+                return None
+
+            return JobModel.model_validate(db.get(Job, id))
+
+    def renew_claim(self, id: str, worker: str) -> bool:
+        with get_db() as db:
+            renewed = (
+                db.query(Job)
+                .filter_by(id=id, worker=worker, status=JobStatus.PROCESSING)
+                .update({"claimed_at": int(time.time())}, synchronize_session=False)
+            )
+            db.commit()
+            return bool(renewed)
+
+    def update_job_by_id(
+        self, id: str, updated: dict, worker: Optional[str] = None
+    ) -> Optional[JobModel]:
+        """With `worker`, only updates the job while that worker holds it."""
+        try:
+            with get_db() as db:
+                query = db.query(Job).filter_by(id=id)
+                if worker is not None:
+                    query = query.filter_by(worker=worker)
+                if not query.update(
+                    {**updated, "updated_at": int(time.time())},
+                    synchronize_session=False,
+                ):
+                    return None
+                db.commit()
+
+                job = db.get(Job, id)
+                db.refresh(job)
+                return JobModel.model_validate(job)
+        except Exception:
+            return None
+
+
+Jobs = JobsTable()
@@ -1,8 +1,10 @@
+import threading
 import time
 from typing import Optional
 
 from open_webui.apps.webui.internal.db import Base, JSONField, get_db
 from open_webui.apps.webui.models.chats import Chats
+from open_webui.env import WEBUI_AUTH_USER_CACHE_TTL
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
 
@@ -74,6 +76,71 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+class UserCache:
+    """
+    Short-lived copies of users for the authentication path, by id and by
+    api key. Writes through UsersTable invalidate the user's entries; other
+    workers see the change once their copy is `ttl` seconds old.
+    """
+
+    # Expired entries are dropped once there are more than this many
+    PRUNE_SIZE = 10000
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.users: dict[str, tuple[float, UserModel]] = {}
+        self.api_keys: dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def get(self, id: str) -> Optional[UserModel]:
+        with self.lock:
+            entry = self.users.get(id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self.users[id]
+                return None
+            return user.model_copy()
+
+    def get_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        with self.lock:
+            id = self.api_keys.get(api_key)
+        return self.get(id) if id else None
+
+    def set(self, user: UserModel):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if len(self.users) > self.PRUNE_SIZE:
+                self.users = {
+                    id: entry for id, entry in self.users.items() if entry[0] > now
+                }
+                self.api_keys = {
+                    key: id for key, id in self.api_keys.items() if id in self.users
+                }
+
+            self.users[user.id] = (now + self.ttl, user.model_copy())
+            if user.api_key:
+                self.api_keys[user.api_key] = user.id
+
+    def invalidate(self, id: str):
+        with self.lock:
+            self.users.pop(id, None)
+            self.api_keys = {
+                key: user_id for key, user_id in self.api_keys.items() if user_id != id
+            }
+
+    def clear(self):
+        with self.lock:
+            self.users = {}
+            self.api_keys = {}
+
+
+USER_CACHE = UserCache(WEBUI_AUTH_USER_CACHE_TTL)
+
+
 class UsersTable:
     def insert_new_user(
         self,
@@ -115,6 +182,22 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        user = USER_CACHE.get(id)
+        if user is None:
+            user = self.get_user_by_id(id)
+            if user:
+                USER_CACHE.set(user)
+        return user
+
+    def get_cached_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        user = USER_CACHE.get_by_api_key(api_key)
+        if user is None:
+            user = self.get_user_by_api_key(api_key)
+            if user:
+                USER_CACHE.set(user)
+        return user
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -165,6 +248,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                USER_CACHE.invalidate(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -179,6 +263,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -198,6 +283,22 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_users_last_active(self, last_active: dict[str, int]) -> bool:
+        """Write many users' last_active_at (id -> timestamp) in one transaction."""
+        try:
+            with get_db() as db:
+                db.bulk_update_mappings(
+                    User,
+                    [
+                        {"id": id, "last_active_at": last_active_at}
+                        for id, last_active_at in last_active.items()
+                    ],
+                )
+                db.commit()
+                return True
+        except Exception:
+            return False
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -205,6 +306,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -216,6 +318,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -233,6 +336,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    USER_CACHE.invalidate(id)
 
                 return True
             else:
@@ -245,6 +349,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                USER_CACHE.invalidate(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -1,12 +1,16 @@
-import json
 import logging
 from typing import Optional
 
 from open_webui.apps.webui.models.chats import (
     ChatForm,
+    ChatMessageForm,
+    ChatMessagesForm,
     ChatResponse,
     Chats,
     ChatTitleIdResponse,
+    get_chat_cursor,
+    get_history_messages,
+    parse_chat_cursor,
 )
 from open_webui.apps.webui.models.tags import (
     ChatIdTagForm,
@@ -17,8 +21,16 @@ from open_webui.apps.webui.models.tags import (
 from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from pydantic import BaseModel, Field
 from open_webui.utils.utils import get_admin_user, get_verified_user
 
 log = logging.getLogger(__name__)
@@ -26,6 +38,26 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def validate_cursor(cursor: Optional[str]):
+    if cursor:
+        try:
+            parse_chat_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ERROR_MESSAGES.DEFAULT(e),
+            )
+
+
+def set_next_cursor(response: Response, chats: list, limit: Optional[int]):
+    # A full page may be followed by more, point the client past its last chat
+    if limit and len(chats) == limit:
+        response.headers["X-Next-Cursor"] = get_chat_cursor(
+            chats[-1].updated_at, chats[-1].id
+        )
+
+
 ############################
 # GetChatList
 ############################
@@ -34,15 +66,30 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    response: Response,
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
 ):
+    if page is not None and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Use either page or cursor, not both"),
+        )
+    validate_cursor(cursor)
+
     if page is not None:
         limit = 60
         skip = (page - 1) * limit
 
         return Chats.get_chat_title_id_list_by_user_id(user.id, skip=skip, limit=limit)
     else:
-        return Chats.get_chat_title_id_list_by_user_id(user.id)
+        chats = Chats.get_chat_title_id_list_by_user_id(
+            user.id, cursor=cursor, limit=limit
+        )
+        set_next_cursor(response, chats, limit)
+        return chats
 
 
 ############################
@@ -73,18 +120,22 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 @router.get("/list/user/{user_id}", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_user_id(
     user_id: str,
+    response: Response,
     user=Depends(get_admin_user),
-    skip: int = 0,
-    limit: int = 50,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
 ):
     if not ENABLE_ADMIN_CHAT_ACCESS:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, skip=skip, limit=limit
+    validate_cursor(cursor)
+    chats = Chats.get_chat_title_id_list_by_user_id(
+        user_id, include_archived=True, cursor=cursor, limit=limit
     )
+    set_next_cursor(response, chats, limit)
+    return chats
 
 
 ############################
@@ -96,7 +147,14 @@ async def get_user_chat_list_by_user_id(
 async def create_new_chat(form_data: ChatForm, user=Depends(get_verified_user)):
     try:
         chat = Chats.insert_new_chat(user.id, form_data)
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(
+            **{
+                **chat.model_dump(),
+                "chat": Chats.get_chat_content(
+                    chat, get_history_messages(form_data.chat)
+                ),
+            }
+        )
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -110,10 +168,18 @@ async def create_new_chat(form_data: ChatForm, user=Depends(get_verified_user)):
 
 
 @router.get("/all", response_model=list[ChatResponse])
-async def get_user_chats(user=Depends(get_verified_user)):
+async def get_user_chats(
+    response: Response,
+    user=Depends(get_verified_user),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    validate_cursor(cursor)
+    chats = Chats.get_chats_by_user_id(user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, chats, limit)
     return [
-        ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
-        for chat in Chats.get_chats_by_user_id(user.id)
+        ChatResponse(**{**chat.model_dump(), "chat": content})
+        for chat, content in zip(chats, Chats.get_chat_contents(chats))
     ]
 
 
@@ -123,10 +189,18 @@ async def get_user_chats(user=Depends(get_verified_user)):
 
 
 @router.get("/all/archived", response_model=list[ChatResponse])
-async def get_user_archived_chats(user=Depends(get_verified_user)):
+async def get_user_archived_chats(
+    response: Response,
+    user=Depends(get_verified_user),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    validate_cursor(cursor)
+    chats = Chats.get_archived_chats_by_user_id(user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, chats, limit)
     return [
-        ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
-        for chat in Chats.get_archived_chats_by_user_id(user.id)
+        ChatResponse(**{**chat.model_dump(), "chat": content})
+        for chat, content in zip(chats, Chats.get_chat_contents(chats))
     ]
 
 
@@ -136,15 +210,23 @@ async def get_user_archived_chats(user=Depends(get_verified_user)):
 
 
 @router.get("/all/db", response_model=list[ChatResponse])
-async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
+async def get_all_user_chats_in_db(
+    response: Response,
+    user=Depends(get_admin_user),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
     if not ENABLE_ADMIN_EXPORT:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
+    validate_cursor(cursor)
+    chats = Chats.get_chats(cursor=cursor, limit=limit)
+    set_next_cursor(response, chats, limit)
     return [
-        ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
-        for chat in Chats.get_chats()
+        ChatResponse(**{**chat.model_dump(), "chat": content})
+        for chat, content in zip(chats, Chats.get_chat_contents(chats))
     ]
 
 
@@ -155,9 +237,15 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
 
 @router.get("/archived", response_model=list[ChatTitleIdResponse])
 async def get_archived_session_user_chat_list(
-    user=Depends(get_verified_user), skip: int = 0, limit: int = 50
+    response: Response,
+    user=Depends(get_verified_user),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
 ):
-    return Chats.get_archived_chat_list_by_user_id(user.id, skip, limit)
+    validate_cursor(cursor)
+    chats = Chats.get_archived_chat_list_by_user_id(user.id, cursor=cursor, limit=limit)
+    set_next_cursor(response, chats, limit)
+    return chats
 
 
 ############################
@@ -188,7 +276,9 @@ async def get_shared_chat_by_id(share_id: str, user=Depends(get_verified_user)):
         chat = Chats.get_chat_by_id(share_id)
 
     if chat:
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(
+            **{**chat.model_dump(), "chat": Chats.get_chat_content(chat)}
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
@@ -202,13 +292,13 @@ async def get_shared_chat_by_id(share_id: str, user=Depends(get_verified_user)):
 
 class TagNameForm(BaseModel):
     name: str
-    skip: Optional[int] = 0
-    limit: Optional[int] = 50
+    cursor: Optional[str] = None
+    limit: Optional[int] = Field(None, ge=1)
 
 
 @router.post("/tags", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_tag_name(
-    form_data: TagNameForm, user=Depends(get_verified_user)
+    form_data: TagNameForm, response: Response, user=Depends(get_verified_user)
 ):
     chat_ids = [
         chat_id_tag.chat_id
@@ -217,11 +307,15 @@ async def get_user_chat_list_by_tag_name(
         )
     ]
 
-    chats = Chats.get_chat_list_by_chat_ids(chat_ids, form_data.skip, form_data.limit)
+    validate_cursor(form_data.cursor)
+    chats = Chats.get_chat_list_by_chat_ids(
+        chat_ids, cursor=form_data.cursor, limit=form_data.limit
+    )
 
-    if len(chats) == 0:
+    if len(chats) == 0 and not form_data.cursor:
         Tags.delete_tag_by_tag_name_and_user_id(form_data.name, user.id)
 
+    set_next_cursor(response, chats, form_data.limit)
     return chats
 
 
@@ -252,7 +346,9 @@ async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
 
     if chat:
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(
+            **{**chat.model_dump(), "chat": Chats.get_chat_content(chat)}
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
@@ -270,10 +366,70 @@ async def update_chat_by_id(
 ):
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
-        updated_chat = {**json.loads(chat.chat), **form_data.chat}
+        chat = Chats.update_chat_by_id(id, form_data.chat)
+        return ChatResponse(
+            **{
+                **chat.model_dump(),
+                "chat": Chats.get_chat_content(
+                    chat, get_history_messages(form_data.chat)
+                ),
+            }
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+
 
-        chat = Chats.update_chat_by_id(id, updated_chat)
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+############################
+# UpsertChatMessagesById
+############################
+
+
+@router.post("/{id}/messages", response_model=Optional[ChatTitleIdResponse])
+async def upsert_chat_messages_by_id(
+    id: str, form_data: ChatMessagesForm, user=Depends(get_verified_user)
+):
+    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    if chat:
+        chat = Chats.upsert_messages_by_chat_id(
+            id, form_data.messages, form_data.current_id
+        )
+        if chat:
+            return ChatTitleIdResponse(**chat.model_dump())
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT()
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+
+
+############################
+# UpdateChatMessageById
+############################
+
+
+@router.post("/{id}/messages/{message_id}", response_model=Optional[dict])
+async def update_chat_message_by_id(
+    id: str,
+    message_id: str,
+    form_data: ChatMessageForm,
+    user=Depends(get_verified_user),
+):
+    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    if chat:
+        message = Chats.update_message_by_id(id, message_id, form_data.message)
+        if message:
+            return message
+
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=ERROR_MESSAGES.NOT_FOUND
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -311,7 +467,7 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
 async def clone_chat_by_id(id: str, user=Depends(get_verified_user)):
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
-        chat_body = json.loads(chat.chat)
+        chat_body = Chats.get_chat_content(chat)
         updated_chat = {
             **chat_body,
             "originalChatId": chat.id,
@@ -320,7 +476,14 @@ async def clone_chat_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         chat = Chats.insert_new_chat(user.id, ChatForm(**{"chat": updated_chat}))
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(
+            **{
+                **chat.model_dump(),
+                "chat": Chats.get_chat_content(
+                    chat, get_history_messages(updated_chat)
+                ),
+            }
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.DEFAULT()
@@ -337,7 +500,9 @@ async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         chat = Chats.toggle_chat_archive_by_id(id)
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(
+            **{**chat.model_dump(), "chat": Chats.get_chat_content(chat)}
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.DEFAULT()
@@ -356,7 +521,10 @@ async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
         if chat.share_id:
             shared_chat = Chats.update_shared_chat_by_chat_id(chat.id)
             return ChatResponse(
-                **{**shared_chat.model_dump(), "chat": json.loads(shared_chat.chat)}
+                **{
+                    **shared_chat.model_dump(),
+                    "chat": Chats.get_chat_content(shared_chat),
+                }
             )
 
         shared_chat = Chats.insert_shared_chat_by_chat_id(chat.id)
@@ -367,7 +535,10 @@ async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
             )
 
         return ChatResponse(
-            **{**shared_chat.model_dump(), "chat": json.loads(shared_chat.chat)}
+            **{
+                **shared_chat.model_dump(),
+                "chat": Chats.get_chat_content(shared_chat),
+            }
         )
     else:
         raise HTTPException(
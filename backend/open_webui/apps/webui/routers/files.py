@@ -20,6 +20,7 @@ from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
 from pydantic import BaseModel
 import json
 
+from open_webui.apps.webui.models.documents import Documents
 from open_webui.apps.webui.models.files import (
     Files,
     FileForm,
@@ -30,12 +31,14 @@ from open_webui.utils.utils import get_verified_user, get_admin_user
 from open_webui.constants import ERROR_MESSAGES
 
 from importlib import util
+import hashlib
 import os
 import uuid
 import os, shutil, logging, re
 
 
-from open_webui.config import UPLOAD_DIR
+from open_webui.apps.rag.bm25 import BM25_INDEXES
+from open_webui.config import CHROMA_CLIENT, UPLOAD_DIR
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -48,35 +51,22 @@ router = APIRouter()
 # Upload File
 ############################
 
-from open_webui.apps.webui.routers.loader.classes.PDFLoader import PDFLoader
-from open_webui.apps.webui.routers.loader.classes.DOCXLoader import DOCXLoader
-from open_webui.apps.webui.routers.loader.classes.XLSXLoader import XLSXLoader
-from open_webui.apps.webui.routers.loader.classes.PPTXLoader import PPTXLoader
-from open_webui.apps.webui.routers.loader.classes.MSGLoader import MSGLoader
+from open_webui.apps.webui.ingestion import INGESTION_QUEUE, LOADERS, get_job_files
+from open_webui.apps.webui.models.jobs import JobForm, JobModel, Jobs, JobStatus
 
 from typing import Dict, List, Union
-from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
 
 import os
 import asyncio
 import traceback
 
 
-def format_chunks(chunks: List[Chunk]) -> str:
-    if not chunks:
-        return ""
-    
-    # 假設所有 chunks 的 metadata['page_title'] 和 metadata['source'] 都相同
-    #title = chunks[0].metadata['page_title']
-    source = chunks[0].metadata['source']
-    
-    # 組合內文
-    content = "\n".join(chunk.content for chunk in chunks)
-    
-    # 組合完整輸出
-    formatted_output = f"檔名 {source}\n\n內文:\n{content}"
-    
-    return formatted_output
+def get_shared_file_meta(existing: FileModel, name: str) -> dict:
+    if existing.meta.get("status") == JobStatus.COMPLETED:
+        # Points at the extracted text
+        name = f"{os.path.splitext(name)[0]}.txt"
+    return {**existing.meta, "name": name}
+
 
 @router.post("/")
 def upload_file(file: UploadFile = File(...), user=Depends(get_verified_user)):
@@ -104,13 +94,46 @@ def upload_file(file: UploadFile = File(...), user=Depends(get_verified_user)):
         filename = f"{id}_{filename}"
         file_path = f"{UPLOAD_DIR}/{filename}"
 
+        contents = file.file.read()
+        file_hash = hashlib.sha256(contents).hexdigest()
+
+        # The user uploaded the same bytes before: share the stored upload and
+        # its extracted text, and through the identical text its collection
+        # and embeddings, instead of running the loader again. Only the
+        # user's own uploads are reused, so nothing leaks between users.
+        existing = Files.get_file_by_hash(file_hash, user.id)
+        if existing and existing.meta.get("status") != JobStatus.FAILED:
+            log.info(f"reusing upload {existing.id} for {name}")
+            file = Files.insert_new_file(
+                user.id,
+                FileForm(
+                    **{
+                        "id": id,
+                        "filename": existing.filename,
+                        "hash": file_hash,
+                        "meta": get_shared_file_meta(existing, name),
+                    }
+                ),
+            )
+
+            # A pending job updates every upload sharing it when it finishes,
+            # but it may have finished between the lookup and the insert
+            job_id = existing.meta.get("job_id")
+            if file and job_id and existing.meta.get("status") == JobStatus.PENDING:
+                job = Jobs.get_job_by_id(job_id)
+                if job and job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                    existing = Files.get_file_by_id(existing.id) or existing
+                    file = Files.update_file_by_id(
+                        file.id,
+                        {
+                            "filename": existing.filename,
+                            "meta": get_shared_file_meta(existing, name),
+                        },
+                    )
+
         # Handling .txt and .md files
-        if ext in ['.txt', '.md']:
+        elif ext in ['.txt', '.md']:
             # Process as text-based content (original handling)    
-            # Validate file size
-            contents = file.file.read()
-
-            
             # Save file to disk
             with open(file_path, "wb") as f:
                 f.write(contents)
@@ -124,6 +147,7 @@ def upload_file(file: UploadFile = File(...), user=Depends(get_verified_user)):
                     **{
                         "id": id,
                         "filename": filename,
+                        "hash": file_hash,
                         "meta": {
                             "name": name,
                             "content_type": file.content_type,
@@ -134,67 +158,45 @@ def upload_file(file: UploadFile = File(...), user=Depends(get_verified_user)):
                 ),
             )
         else:
-            
-            loaders = {
-                'docx': DOCXLoader,
-                'pptx': PPTXLoader,
-                #'xlsx': XLSXLoader,
-                'pdf': PDFLoader,
-                'msg': MSGLoader
-            }
-
             # Handling other file types with loaders
-            LoaderClass = loaders.get(ext.lstrip('.'))  # Get loader class based on extension
-         
-            if LoaderClass:
+            LoaderClass = LOADERS.get(ext.lstrip('.'))  # Get loader class based on extension
 
-                raw_content = file.file.read()
-                
+            if LoaderClass:
                 # Save file to disk
                 with open(file_path, "wb") as f:
-                    f.write(raw_content)
+                    f.write(contents)
                     f.close()
 
-                loader = LoaderClass(directory=f"{UPLOAD_DIR}")
-                loader._load_file(file_path=file_path)
-                chunks = loader.loaded_files[file_path]
-
-                all_chunks = []
-
-                for chunk in chunks:
-                    all_chunks.append(chunk)
-
-                # Format the loaded content
-                content = format_chunks(all_chunks)
-
-                 # Validate file extension
-                filename = os.path.basename(name)
-                ext = os.path.splitext(filename)[1].lower()
-                base_filename = os.path.splitext(filename)[0]  # Original filename without extension
-
-
-                # Save extracted content as a .txt file
-                extracted_filename = f"{id}_{base_filename}.txt"
-                extracted_file_path = f"{UPLOAD_DIR}/{extracted_filename}"
-                with open(extracted_file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-
-                # Update path in the database for the new .txt file
+                # Extraction (e.g. hi_res PDF partitioning) can take minutes, so
+                # it runs as a background job; the record is updated in place.
+                job_id = str(uuid.uuid4())
                 file = Files.insert_new_file(
                     user.id,
                     FileForm(
                         **{
                             "id": id,
-                            "filename": extracted_filename,
+                            "filename": filename,
+                            "hash": file_hash,
                             "meta": {
-                                "name": f"{base_filename}.txt",
-                                "content_type": "text/plain",
-                                "size": len(content),
-                                "path": extracted_file_path,
+                                "name": name,
+                                "content_type": file.content_type,
+                                "size": len(contents),
+                                "path": file_path,
+                                "raw_path": file_path,
+                                "job_id": job_id,
+                                "status": JobStatus.PENDING,
                             },
                         }
                     ),
                 )
+
+                if file:
+                    job = Jobs.insert_new_job(
+                        user.id, JobForm(id=job_id, file_id=file.id)
+                    )
+                    if job is None:
+                        raise Exception("Error creating ingestion job")
+                    INGESTION_QUEUE.enqueue(job.id)
             else:
                 file = None
 
@@ -263,6 +265,29 @@ async def delete_all_files(user=Depends(get_admin_user)):
         )
 
 
+############################
+# Get Ingestion Jobs
+############################
+
+
+@router.get("/jobs", response_model=list[JobModel])
+async def get_ingestion_jobs(user=Depends(get_verified_user)):
+    return Jobs.get_jobs_by_user_id(user.id)
+
+
+@router.get("/jobs/{job_id}", response_model=Optional[JobModel])
+async def get_ingestion_job_by_id(job_id: str, user=Depends(get_verified_user)):
+    job = Jobs.get_job_by_id(job_id)
+
+    if job and (job.user_id == user.id or user.role == "admin"):
+        return job
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # Get File By Id
 ############################
@@ -337,13 +362,75 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
 ############################
 
 
+def release_file_storage(file: FileModel):
+    """
+    Remove what a deleted upload stored on disk and in the vector db, unless
+    another upload of the same content (same hash) still references it.
+    """
+    if not file.hash:
+        return
+
+    others = Files.get_files_by_hash(file.hash)
+
+    in_use = {
+        path
+        for other in others
+        for path in (other.meta.get("path"), other.meta.get("raw_path"))
+    }
+    for path in {file.meta.get("path"), file.meta.get("raw_path")} - in_use:
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                log.exception(e)
+
+    # Documents uploaded through /doc share collections by content hash too
+    collection_name = file.meta.get("collection_name")
+    if (
+        collection_name
+        and not others
+        and not any(
+            doc.collection_name == collection_name for doc in Documents.get_docs()
+        )
+    ):
+        try:
+            CHROMA_CLIENT.delete_collection(name=collection_name)
+        except Exception as e:
+            log.debug(f"collection {collection_name} not deleted: {e}")
+        BM25_INDEXES.delete(collection_name)
+
+
+def hand_over_file_job(file: FileModel):
+    """
+    Uploads of the same content wait on the job of the first one. When that
+    upload is deleted before the job ran, point the job at another upload
+    waiting on it, so the job can still load the file and update them.
+    """
+    job_id = file.meta.get("job_id")
+    if not job_id or file.meta.get("status") != JobStatus.PENDING:
+        return
+
+    job = Jobs.get_job_by_id(job_id)
+    if job is None or job.file_id != file.id:
+        return
+
+    for shared_file in get_job_files(job, file):
+        if shared_file.id != file.id:
+            Jobs.update_job_by_id(job.id, {"file_id": shared_file.id})
+            return
+
+
 @router.delete("/{id}")
 async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
     file = Files.get_file_by_id(id)
 
-    if file:
+    if file and (file.user_id == user.id or user.role == "admin"):
         result = Files.delete_file_by_id(id)
         if result:
+            hand_over_file_job(file)
+            release_file_storage(file)
             return {"message": "File deleted successfully"}
         else:
             raise HTTPException(
@@ -12,6 +12,7 @@ from open_webui.apps.webui.utils import load_function_module_by_id, replace_impo
 from open_webui.config import CACHE_DIR, FUNCTIONS_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from open_webui.utils.model_registry import MODEL_REGISTRY
 from open_webui.utils.utils import get_admin_user, get_verified_user
 
 router = APIRouter()
@@ -72,6 +73,7 @@ async def create_new_function(
             function_cache_dir.mkdir(parents=True, exist_ok=True)
 
             if function:
+                MODEL_REGISTRY.invalidate()
                 return function
             else:
                 raise HTTPException(
@@ -123,6 +125,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_REGISTRY.invalidate()
             return function
         else:
             raise HTTPException(
@@ -150,6 +153,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_REGISTRY.invalidate()
             return function
         else:
             raise HTTPException(
@@ -188,6 +192,7 @@ async def update_function_by_id(
         function = Functions.update_function_by_id(id, updated)
 
         if function:
+            MODEL_REGISTRY.invalidate()
             return function
         else:
             raise HTTPException(
@@ -218,6 +223,8 @@ async def delete_function_by_id(
         if id in FUNCTIONS:
             del FUNCTIONS[id]
 
+        MODEL_REGISTRY.invalidate()
+
     return result
 
 
@@ -2,14 +2,86 @@ import os
 import json
 import asyncio
 import nest_asyncio
+import inspect
+import multiprocessing
+import multiprocessing.connection
+import time
 import traceback
+from collections import deque
 from typing import Optional
 from rich import print as rprint
 from abc import ABC, abstractmethod
-from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Union
 from pydantic import BaseModel, field_validator, model_validator, PositiveInt, HttpUrl
 from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
+from open_webui.apps.webui.routers.loader.utils.nlp import get_sentencizer
+
+# 子行程內的 loader, 由 _init_worker 設定
+_worker_loader: Optional["BaseLoader"] = None
+
+
+def _init_worker(loader: "BaseLoader"):
+    global _worker_loader
+    _worker_loader = loader
+
+
+def _load_file_in_worker(file_path: str) -> Optional[List[Chunk]]:
+    _worker_loader.loaded_files = {}
+    result = _worker_loader._load_file(file_path=file_path)
+    if inspect.isawaitable(result):
+        asyncio.run(result)
+    return _worker_loader.loaded_files.get(file_path)
+
+
+def _worker_main(loader: "BaseLoader", conn):
+    """子行程: 依序載入 parent 送來的檔案, 直到收到 None."""
+    _init_worker(loader)
+    while True:
+        try:
+            file_path = conn.recv()
+        except EOFError:
+            return
+        if file_path is None:
+            return
+
+        # 告知 parent 開始處理, timeout 從這裡開始計算
+        conn.send(("started", file_path, None))
+        try:
+            conn.send(("done", file_path, _load_file_in_worker(file_path)))
+        except Exception as e:
+            conn.send(("error", file_path, str(e)))
+
+
+class _LoaderWorker:
+    """A worker process of `BaseLoader.load_parallel`, fed one file at a time."""
+
+    def __init__(self, context, loader: "BaseLoader"):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(loader, child_conn), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.file_path: Optional[str] = None
+        self.deadline: Optional[float] = None
+
+    def submit(self, file_path: str):
+        self.conn.send(file_path)
+        self.file_path = file_path
+        self.deadline = None
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join()
+        self.conn.close()
+
 
 class BaseLoader(ABC):
     def __init__(self,
@@ -19,6 +91,7 @@ class BaseLoader(ABC):
                  encoding: str = 'utf-8',
                  exclude_files: list[str] = None,
                  num_threads: int = 1,
+                 file_timeout: Optional[float] = None,
                  aiil: bool = False,
                  restructure_system: str | None = None,
                  hitl: bool = False,
@@ -33,6 +106,7 @@ class BaseLoader(ABC):
         self.encoding = encoding
         self.exclude_files = exclude_files
         self.num_threads = num_threads
+        self.file_timeout = file_timeout
         self.aiil = aiil
         self.restructure_system = restructure_system
         self.hitl = hitl
@@ -43,6 +117,11 @@ class BaseLoader(ABC):
 
         self.loaded_files: Dict[str, List[Chunk]] = {}
 
+    @property
+    def nlp(self):
+        # 共用的 sentencizer, 不必每個 loader 各建一個
+        return get_sentencizer()
+
     # 定義一個內部函式來讀取文件內容
     @abstractmethod
     async def _load_file(self, file_path, temp_file_dir: Optional[str] = None):
@@ -58,12 +137,9 @@ class BaseLoader(ABC):
         return True
 
 
-    def load_nonsyn(self):
-        """根據給定的參數從指定目錄載入檔案.
-
-        Returns:
-            Dict[str, List[Chunk]]: 一個字典, 其中key是檔案路徑, value是檔案的各個分塊.
-        """
+    def _collect_files(self) -> List[str]:
+        """要載入的檔案路徑, 依路徑排序, 讓輸出順序固定."""
+        file_paths = []
 
         # 如果包含子目錄，則遞歸遍歷目錄中的所有文件
         if self.recursive:
@@ -71,16 +147,125 @@ class BaseLoader(ABC):
                 for file in files:
                     file_path = os.path.join(root, file)
                     if self._should_load_file(file_path):
-                        #print(file_path)
-                        self._load_file(file_path=file_path)
+                        file_paths.append(file_path)
         # 如果不包含子目錄，則直接遍歷當前目錄中的所有文件
         else:
             for file in os.listdir(self.directory):
                 file_path = os.path.join(self.directory, file)
                 if os.path.isfile(file_path) and self._should_load_file(file_path):
-                        self._load_file(file_path=file_path)
+                    file_paths.append(file_path)
+
+        return sorted(file_paths)
 
 
+    def load_nonsyn(self):
+        """根據給定的參數從指定目錄載入檔案.
+
+        Returns:
+            Dict[str, List[Chunk]]: 一個字典, 其中key是檔案路徑, value是檔案的各個分塊.
+        """
+        if self.num_threads > 1:
+            return self.load_parallel()
+
+        for file_path in self._collect_files():
+            try:
+                self._load_file(file_path=file_path)
+            except Exception as e:
+                print(f"\n***** Error reading {file_path}: {e} *****\n")
+
+        return self.loaded_files
+
+
+    def load_parallel(self):
+        """用 `num_threads` 個子行程平行載入檔案.
+
+        Parsing (partition_pdf, spaCy, python-docx) is CPU bound, so files
+        are loaded in worker processes instead of threads. Each worker gets a
+        copy of this loader once, at startup, and is sent one file at a time.
+        A file that raises or crashes its worker is skipped without affecting
+        the others. `file_timeout` counts from when a worker starts the file;
+        a worker still busy after it is terminated and replaced, so it does
+        not hold its slot. Results are stored in path order, whatever order
+        the workers finish in.
+
+        Returns:
+            Dict[str, List[Chunk]]: 一個字典, 其中key是檔案路徑, value是檔案的各個分塊.
+        """
+        file_paths = self._collect_files()
+        if not file_paths:
+            return self.loaded_files
+
+        # spawn: forking a process that runs threads (the web server) is unsafe
+        context = multiprocessing.get_context("spawn")
+        pending = deque(file_paths)
+        results = {}
+
+        def submit_next(worker: _LoaderWorker):
+            worker.file_path = None
+            if pending:
+                worker.submit(pending.popleft())
+
+        workers = [
+            _LoaderWorker(context, self)
+            for _ in range(min(self.num_threads, len(file_paths)))
+        ]
+        try:
+            for worker in workers:
+                submit_next(worker)
+
+            while True:
+                busy = [worker for worker in workers if worker.file_path is not None]
+                if not busy:
+                    break
+
+                deadlines = [
+                    worker.deadline for worker in busy if worker.deadline is not None
+                ]
+                timeout = (
+                    max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                )
+                ready = multiprocessing.connection.wait(
+                    [worker.conn for worker in busy], timeout
+                )
+
+                for index, worker in enumerate(workers):
+                    if worker.file_path is None:
+                        continue
+
+                    if worker.conn in ready:
+                        try:
+                            status, file_path, value = worker.conn.recv()
+                        except (EOFError, OSError):
+                            print(f"\n***** Worker crashed reading {worker.file_path} *****\n")
+                            worker.stop(kill=True)
+                            workers[index] = worker = _LoaderWorker(context, self)
+                            submit_next(worker)
+                            continue
+
+                        if status == "started":
+                            if self.file_timeout:
+                                worker.deadline = time.monotonic() + self.file_timeout
+                            continue
+                        if status == "done":
+                            results[file_path] = value
+                        else:
+                            print(f"\n***** Error reading {file_path}: {value} *****\n")
+                        submit_next(worker)
+
+                    elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                        print(f"\n***** Timed out reading {worker.file_path} after {self.file_timeout}s *****\n")
+                        # A worker stuck on a file would never return, replace it
+                        worker.stop(kill=True)
+                        workers[index] = worker = _LoaderWorker(context, self)
+                        submit_next(worker)
+        finally:
+            for worker in workers:
+                worker.stop(kill=worker.file_path is not None)
+
+        for file_path in file_paths:
+            if results.get(file_path):
+                self.loaded_files[file_path] = results[file_path]
+
         return self.loaded_files
 
 
@@ -90,41 +275,27 @@ class BaseLoader(ABC):
         Returns:
             Dict[str, List[Chunk]]: 一個字典, 其中key是檔案路徑, value是檔案的各個分塊.
         """
+        if self.num_threads > 1:
+            return await asyncio.to_thread(self.load_parallel)
 
-        # 如果包含子目錄，則遞歸遍歷目錄中的所有文件
-        if self.recursive:
-            print('base loader load.')
-            for root, _, files in os.walk(self.directory):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if self._should_load_file(file_path):
-                        print(file_path)
-                        await self._load_file(file_path=file_path)
-        # 如果不包含子目錄，則直接遍歷當前目錄中的所有文件
-        else:
-            for file in os.listdir(self.directory):
-                file_path = os.path.join(self.directory, file)
-                if os.path.isfile(file_path) and self._should_load_file(file_path):
-                        await self._load_file(file_path=file_path)
+        for file_path in self._collect_files():
+            try:
+                result = self._load_file(file_path=file_path)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"\n***** Error reading {file_path}: {e} *****\n")
 
-        # 如果需要多線程，則使用 ThreadPoolExecutor 來並行加載文件
-        if self.num_threads > 1:
-            with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-                if self.recursive:
-                    for root, _, files in os.walk(self.directory):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            if self._should_load_file(file_path):
-                                await self._load_file(file_path=file_path)
-                else:
-                    for file in os.listdir(self.directory):
-                        file_path = os.path.join(self.directory, file)
-                        if os.path.isfile(file_path) and self._should_load_file(file_path):
-                            await self._load_file(file_path=file_path)
-        print('here_end')
         return self.loaded_files
 
 
+    def __getstate__(self):
+        # Sent to the worker processes; they start with nothing loaded
+        state = self.__dict__.copy()
+        state['loaded_files'] = {}
+        return state
+
+
     async def _human_in_the_loop(self, content: str, source: str) -> str:
         orig_content=content
         
@@ -1,14 +1,12 @@
 from open_webui.apps.webui.routers.loader.classes.BaseLoader import BaseLoader
 from docx import Document
 from docx.enum.shape import WD_INLINE_SHAPE
-from spacy.lang.en import English
 import os
 import datetime
 
 
-from spacy.lang.en import English
 import shutil  
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 import traceback
 import re
 from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
@@ -22,6 +20,7 @@ class DOCXLoader(BaseLoader):
                  encoding: str = 'utf-8',
                  exclude_files: list[str] = None,
                  num_threads: int = 1,
+                 file_timeout: Optional[float] = None,
                  aiil: bool = False,
                  hitl: bool = False,
                  verbose: bool = False) -> None:
@@ -32,13 +31,11 @@ class DOCXLoader(BaseLoader):
                          encoding=encoding, 
                          exclude_files=exclude_files, 
                          num_threads=num_threads,
+                         file_timeout=file_timeout,
                          aiil=aiil,
                          hitl=hitl,
                          verbose=verbose)
 
-        self.nlp = English()
-        self.nlp.add_pipe("sentencizer")
-        
         if not os.path.isdir(directory):
             raise Exception(f"`directory` must be a path of a directory, got {self.directory}")
 
@@ -7,13 +7,11 @@ import re
 import pandas as pd
 from io import StringIO
 from bs4 import BeautifulSoup
-from spacy.lang.en import English
 from unstructured.cleaners.core import clean_bullets
 
 
-from spacy.lang.en import English
 import shutil  
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 import traceback
 import re
 from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
@@ -25,6 +23,7 @@ class MSGLoader(BaseLoader):
                  recursive: bool = True,
                  exclude_files: list[str] = None,
                  num_threads: int = 1,
+                 file_timeout: Optional[float] = None,
                  aiil: bool = False,
                  hitl: bool = False,
                  verbose: bool = False) -> None:
@@ -34,13 +33,11 @@ class MSGLoader(BaseLoader):
                          extensions=['.msg'],
                          exclude_files=exclude_files,
                          num_threads=num_threads,
+                         file_timeout=file_timeout,
                          aiil=aiil,
                          hitl=hitl,
                          verbose=verbose)
 
-        self.nlp = English()
-        self.nlp.add_pipe("sentencizer")
-
         if not os.path.isdir(directory):
             raise Exception(f"`directory` must be a path of a directory, got {self.directory}")
 
@@ -14,16 +14,30 @@ from unstructured.partition.pdf import partition_pdf
 import unstructured
 from unstructured.cleaners.core import clean_bullets
 
-from spacy.lang.en import English
 import shutil  
-from typing import Dict, List, Union
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
 import traceback
 import re
+from pypdf import PdfReader, PdfWriter
 from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
 from open_webui.apps.webui.routers.loader.classes.Chunk import generate_unique_uuid
+from open_webui.config import (
+    PDF_PAGES_PER_PARTITION,
+    PDF_PARTITION_WORKERS,
+    PDF_TEXT_LAYER_MIN_CHARS,
+)
 
 
 class PDFLoader(BaseLoader):
+    # 頁面抽出的文字少於此字數, 視為掃描頁 (沒有文字層), 需要 hi_res OCR
+    TEXT_LAYER_MIN_CHARS = PDF_TEXT_LAYER_MIN_CHARS
+    # 每次 partition 的最大頁數, 以及同時 partition 的數量
+    PAGES_PER_PARTITION = max(1, PDF_PAGES_PER_PARTITION)
+    PARTITION_WORKERS = max(1, PDF_PARTITION_WORKERS)
+
     def __init__(self,
                  directory: str,
                  only_latest_content: bool = True,
@@ -31,6 +45,7 @@ class PDFLoader(BaseLoader):
                  encoding: str = 'utf-8',
                  exclude_files: list[str] = None,
                  num_threads: int = 1,
+                 file_timeout: Optional[float] = None,
                  aiil: bool = False,
                  hitl: bool = False,
                  verbose: bool = False) -> None:
@@ -42,13 +57,11 @@ class PDFLoader(BaseLoader):
                          encoding=encoding, 
                          exclude_files=exclude_files, 
                          num_threads=num_threads,
+                         file_timeout=file_timeout,
                          aiil=aiil,
                          hitl=hitl,
                          verbose=verbose)
 
-        self.nlp = English()
-        self.nlp.add_pipe("sentencizer")
-        
         if not os.path.isdir(directory):
             raise Exception(f"`directory` must be a path of a directory, got {self.directory}")
 
@@ -131,6 +144,11 @@ class PDFLoader(BaseLoader):
 
             pdf_file_name = pdf_elements[0].metadata.filename
 
+            # 一次走訪所有 elements, 依頁碼分組
+            page_elements = defaultdict(list)
+            for element in pdf_elements:
+                page_elements[element.metadata.page_number].append(element)
+
             structed_pages = []
 
             for i in range(max_number):
@@ -140,34 +158,33 @@ class PDFLoader(BaseLoader):
                 page_titles = []
                 page_contents = []
                 
-                for element in pdf_elements:
-                    if element.metadata.page_number == cur_page_number:
-                        if element.category == 'UncategorizedText':
-                            continue
-                        elif isinstance(element, unstructured.documents.elements.Image):
-                            pass
+                for element in page_elements[cur_page_number]:
+                    if element.category == 'UncategorizedText':
+                        continue
+                    elif isinstance(element, unstructured.documents.elements.Image):
+                        pass
+                    
+                    elif isinstance(element, unstructured.documents.elements.NarrativeText):
+                        doc = self.nlp(element.text)
+                        sentences = [sent.text.strip() for sent in doc.sents]
+                        result_text = '\n\n'.join(sentences)
+                        page_contents.append(result_text)
+                    elif isinstance(element, unstructured.documents.elements.Title):
+                        page_titles.append(element.text)
+                        page_contents.append(element.text)
+                    elif isinstance(element, unstructured.documents.elements.Table):
+
+                        #table_dict = pd.read_html(element.metadata.text_as_html)[0].to_dict(orient='records')
+                        #table_json = json.dumps(table_dict, ensure_ascii=False, indent=4)
                         
-                        elif isinstance(element, unstructured.documents.elements.NarrativeText):
-                            doc = self.nlp(element.text)
-                            sentences = [sent.text.strip() for sent in doc.sents]
-                            result_text = '\n\n'.join(sentences)
-                            page_contents.append(result_text)
-                        elif isinstance(element, unstructured.documents.elements.Title):
-                            page_titles.append(element.text)
-                            page_contents.append(element.text)
-                        elif isinstance(element, unstructured.documents.elements.Table):
-
-                            #table_dict = pd.read_html(element.metadata.text_as_html)[0].to_dict(orient='records')
-                            #table_json = json.dumps(table_dict, ensure_ascii=False, indent=4)
-                            
-                            page_contents.append('<html table>')
-
-                            page_contents.append(element.metadata.text_as_html)
-
-                        elif isinstance(element, unstructured.documents.elements.ListItem):
-                            page_contents.append(clean_bullets(element.text))
-                        else:
-                            page_contents.append(element.text)
+                        page_contents.append('<html table>')
+
+                        page_contents.append(element.metadata.text_as_html)
+
+                    elif isinstance(element, unstructured.documents.elements.ListItem):
+                        page_contents.append(clean_bullets(element.text))
+                    else:
+                        page_contents.append(element.text)
 
                 whole_titles = ''
 
@@ -187,21 +204,141 @@ class PDFLoader(BaseLoader):
         return None
 
 
+    def _partition_hi_res(self, file_path: str, image_dir: Optional[str] = None):
+        return partition_pdf(
+            filename=file_path,                  # mandatory
+            strategy="hi_res",                                     # mandatory to use ``hi_res`` strategy
+            extract_images_in_pdf=True,                            # mandatory to set as ``True``
+            extract_image_block_types=["Image", "Table"],          # optional
+            extract_image_block_to_payload=False,                  # optional
+            #extract_image_block_output_dir="./pdf_test_images",  # optional - only works when ``extract_image_block_to_payload=False``
+            infer_table_structure=True,
+            extract_image_block_output_dir=image_dir or self.unstructured_image_dir  # Set the image output directory
+            )
+
+    def _partition_fast(self, file_path: str):
+        # 有文字層的頁面直接讀取文字, 不跑版面分析與 OCR
+        return partition_pdf(filename=file_path, strategy="fast")
+
+    def _get_page_ranges(self, reader: PdfReader):
+        """將頁面依有無文字層分成連續的區段.
+
+        Returns:
+            List[tuple[int, int, bool]]: (起始頁索引, 結束頁索引(不含), 是否為掃描頁)
+        """
+        page_ranges = []
+        for index, page in enumerate(reader.pages):
+            try:
+                text = page.extract_text() or ''
+            except Exception:
+                text = ''
+            scanned = len(text.strip()) < self.TEXT_LAYER_MIN_CHARS
+
+            if (
+                page_ranges
+                and page_ranges[-1][2] == scanned
+                and page_ranges[-1][1] - page_ranges[-1][0] < self.PAGES_PER_PARTITION
+            ):
+                start, _, _ = page_ranges[-1]
+                page_ranges[-1] = (start, index + 1, scanned)
+            else:
+                page_ranges.append((index, index + 1, scanned))
+        return page_ranges
+
+    def _write_page_range(self, reader: PdfReader, page_range, temp_dir: str) -> str:
+        start, end, _ = page_range
+
+        writer = PdfWriter()
+        for index in range(start, end):
+            writer.add_page(reader.pages[index])
+        range_file_path = os.path.join(temp_dir, f'pages_{start + 1}_{end}.pdf')
+        with open(range_file_path, 'wb') as f:
+            writer.write(f)
+        return range_file_path
+
+    def _partition_page_range(self, range_file_path: str, file_path: str, page_range):
+        start, end, scanned = page_range
+
+        if scanned:
+            # 各區段平行 partition, 圖片先輸出到區段自己的目錄, 避免同名圖片互相覆蓋
+            image_dir = os.path.join(self.unstructured_image_dir, f'pages_{start + 1}_{end}')
+            os.makedirs(image_dir, exist_ok=True)
+            elements = self._partition_hi_res(range_file_path, image_dir)
+            self._collect_range_images(image_dir, start, elements)
+        else:
+            elements = self._partition_fast(range_file_path)
+
+        # 將頁碼與檔名換回原始 PDF 的
+        for element in elements:
+            element.metadata.page_number = start + (element.metadata.page_number or 1)
+            element.metadata.filename = os.path.basename(file_path)
+        return elements
+
+    def _collect_range_images(self, image_dir: str, start: int, elements):
+        """將區段輸出的圖片依原始 PDF 的頁碼改名 (例如 figure-1-1.jpg -> figure-11-1.jpg), 移到 unstructured_image_dir.
+
+        Args:
+            image_dir (str): 區段的圖片目錄
+            start (int): 區段的起始頁索引
+            elements: 區段 partition 出的 elements, 其 image_path 會一併更新
+        """
+        renamed = {}
+        for name in os.listdir(image_dir):
+            match = re.match(r'^(.+)-(\d+)-(\d+)(\.\w+)$', name)
+            if match:
+                prefix, page_number, index, ext = match.groups()
+                new_name = f'{prefix}-{start + int(page_number)}-{index}{ext}'
+            else:
+                new_name = f'pages_{start + 1}-{name}'
+            src_path = os.path.join(image_dir, name)
+            dst_path = os.path.join(self.unstructured_image_dir, new_name)
+            shutil.move(src_path, dst_path)
+            renamed[src_path] = dst_path
+        shutil.rmtree(image_dir, ignore_errors=True)
+
+        for element in elements:
+            image_path = getattr(element.metadata, 'image_path', None)
+            if image_path in renamed:
+                element.metadata.image_path = renamed[image_path]
+
+    def _partition_pdf(self, file_path: str):
+        """有文字層的頁面使用 fast strategy, 只有掃描頁使用 hi_res; 各頁面區段平行 partition."""
+        try:
+            reader = PdfReader(file_path)
+            page_ranges = self._get_page_ranges(reader)
+        except Exception as e:
+            print(f"\n***** Cannot read pages of {file_path}, using hi_res: {e} *****\n")
+            return self._partition_hi_res(file_path)
+
+        if not page_ranges:
+            return []
+        if len(page_ranges) == 1:
+            # 只有一個區段, 不需要拆檔
+            return self._partition_page_range(file_path, file_path, page_ranges[0])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # PdfReader 不是 thread safe, 先依序拆出各區段的 PDF
+            range_file_paths = [
+                self._write_page_range(reader, page_range, temp_dir)
+                for page_range in page_ranges
+            ]
+
+            # 用執行緒: hi_res 的模型推論會釋放 GIL, 且 loader 可能已在 BaseLoader.load_parallel 的子行程中
+            with ThreadPoolExecutor(max_workers=self.PARTITION_WORKERS) as executor:
+                results = executor.map(
+                    self._partition_page_range,
+                    range_file_paths,
+                    [file_path] * len(page_ranges),
+                    page_ranges,
+                )
+                return [element for elements in results for element in elements]
+
     def _pdf_to_chunks(self, file_path:str):
         try:
             self.unstructured_image_dir = os.path.join(os.path.dirname(file_path), 'unstructured_images')
             os.makedirs(self.unstructured_image_dir, exist_ok=True)
 
-            elements = partition_pdf(
-                filename=file_path,                  # mandatory
-                strategy="hi_res",                                     # mandatory to use ``hi_res`` strategy
-                extract_images_in_pdf=True,                            # mandatory to set as ``True``
-                extract_image_block_types=["Image", "Table"],          # optional
-                extract_image_block_to_payload=False,                  # optional
-                #extract_image_block_output_dir="./pdf_test_images",  # optional - only works when ``extract_image_block_to_payload=False``
-                infer_table_structure=True,
-                extract_image_block_output_dir=self.unstructured_image_dir  # Set the image output directory
-                )
+            elements = self._partition_pdf(file_path)
 
             
             pages = self._from_unstructed_elements_to_structed_pages(pdf_elements=elements, file_path=file_path)
@@ -1,13 +1,11 @@
 from open_webui.apps.webui.routers.loader.classes.BaseLoader import BaseLoader
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
-from spacy.lang.en import English
 import os
 import datetime
 
-from spacy.lang.en import English
 import shutil  
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 import traceback
 import re
 from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
@@ -21,6 +19,7 @@ class PPTXLoader(BaseLoader):
                  encoding: str = 'utf-8',
                  exclude_files: list[str] = None,
                  num_threads: int = 1,
+                 file_timeout: Optional[float] = None,
                  aiil: bool = False,
                  hitl: bool = False,
                  verbose: bool = False) -> None:
@@ -31,13 +30,11 @@ class PPTXLoader(BaseLoader):
                          encoding=encoding, 
                          exclude_files=exclude_files, 
                          num_threads=num_threads,
+                         file_timeout=file_timeout,
                          aiil=aiil,
                          hitl=hitl,
                          verbose=verbose)
 
-        self.nlp = English()
-        self.nlp.add_pipe("sentencizer")
-        
         if not os.path.isdir(directory):
             raise Exception(f"`directory` must be a path of a directory, got {self.directory}")
 
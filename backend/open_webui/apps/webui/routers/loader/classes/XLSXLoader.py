@@ -6,7 +6,7 @@ from openpyxl.drawing.image import Image as XLImage
 
 from spacy.lang.en import English
 import shutil  
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 import traceback
 import re
 from open_webui.apps.webui.routers.loader.classes.Chunk import Chunk
@@ -18,6 +18,7 @@ class XLSXLoader(BaseLoader):
                  recursive: bool = True,
                  exclude_files: list[str] = None,
                  num_threads: int = 1,
+                 file_timeout: Optional[float] = None,
                  aiil: bool = False,
                  hitl: bool = False,
                  verbose: bool = False) -> None:
@@ -27,6 +28,7 @@ class XLSXLoader(BaseLoader):
                          extensions=['.xlsx'],
                          exclude_files=exclude_files,
                          num_threads=num_threads,
+                         file_timeout=file_timeout,
                          aiil=aiil,
                          hitl=hitl,
                          verbose=verbose)
@@ -508,6 +508,25 @@ if CUSTOM_NAME:
 UPLOAD_DIR = f"{DATA_DIR}/uploads"
 Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
+# Uploaded documents are extracted by a background job queue
+# (see apps/webui/ingestion.py)
+INGESTION_JOB_WORKERS = int(os.environ.get("INGESTION_JOB_WORKERS", "2"))
+INGESTION_JOB_MAX_RETRIES = int(os.environ.get("INGESTION_JOB_MAX_RETRIES", "2"))
+# Seconds after which a job whose worker stopped renewing its claim is taken
+# over by another worker
+INGESTION_JOB_CLAIM_TIMEOUT = int(os.environ.get("INGESTION_JOB_CLAIM_TIMEOUT", "300"))
+# Build the document loaders' shared spaCy sentencizer at startup instead of
+# on the first upload
+ENABLE_SENTENCIZER_PREWARM = (
+    os.environ.get("ENABLE_SENTENCIZER_PREWARM", "True").lower() == "true"
+)
+# PDF pages with less extracted text than this are treated as scanned and
+# partitioned with hi_res OCR; the rest use the fast text layer strategy
+PDF_TEXT_LAYER_MIN_CHARS = int(os.environ.get("PDF_TEXT_LAYER_MIN_CHARS", "20"))
+# PDFs are partitioned in ranges of at most this many pages, several at once
+PDF_PAGES_PER_PARTITION = int(os.environ.get("PDF_PAGES_PER_PARTITION", "10"))
+PDF_PARTITION_WORKERS = int(os.environ.get("PDF_PARTITION_WORKERS", "4"))
+
 
 ####################################
 # Cache DIR
@@ -524,6 +543,14 @@ Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
 DOCS_DIR = os.getenv("DOCS_DIR", f"{DATA_DIR}/docs")
 Path(DOCS_DIR).mkdir(parents=True, exist_ok=True)
 
+# Files indexed concurrently by a DOCS_DIR scan
+DOCS_DIR_SCAN_WORKERS = int(os.environ.get("DOCS_DIR_SCAN_WORKERS", "4"))
+# Index DOCS_DIR changes as they happen (needs watchfiles, which ships with
+# uvicorn[standard])
+ENABLE_DOCS_DIR_WATCH = (
+    os.environ.get("ENABLE_DOCS_DIR_WATCH", "False").lower() == "true"
+)
+
 
 ####################################
 # Tools DIR
@@ -600,6 +627,25 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT = 300
 
+# Shared upstream connection pool (see utils/session_pool.py). A streamed
+# chat holds its connection until it finishes, so the connection limits
+# default to 0 (unlimited) and any cap queues chats beyond it.
+AIOHTTP_CLIENT_POOL_LIMIT = int(os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "0"))
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(
+    os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0")
+)
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = int(
+    os.environ.get("AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30")
+)
+AIOHTTP_CLIENT_DNS_CACHE_TTL = int(
+    os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+)
+
+# Seconds between event loop lag samples (see utils/loop_monitor.py, 0 disables)
+EVENT_LOOP_MONITOR_INTERVAL = float(
+    os.environ.get("EVENT_LOOP_MONITOR_INTERVAL", "0.1")
+)
+
 
 K8S_FLAG = os.environ.get("K8S_FLAG", "")
 USE_OLLAMA_DOCKER = os.environ.get("USE_OLLAMA_DOCKER", "false")
@@ -631,6 +677,14 @@ OLLAMA_BASE_URLS = PersistentConfig(
     "OLLAMA_BASE_URLS", "ollama.base_urls", OLLAMA_BASE_URLS
 )
 
+# Seconds between /api/ps health probes of each Ollama backend (0 disables)
+OLLAMA_HEALTH_CHECK_INTERVAL = int(os.environ.get("OLLAMA_HEALTH_CHECK_INTERVAL", "15"))
+
+# Keep a chat on the backend that served its previous turn while it stays healthy
+ENABLE_OLLAMA_CHAT_AFFINITY = (
+    os.environ.get("ENABLE_OLLAMA_CHAT_AFFINITY", "True").lower() == "true"
+)
+
 ####################################
 # OPENAI_API
 ####################################
@@ -682,6 +736,16 @@ except Exception:
 
 OPENAI_API_BASE_URL = "https://api.openai.com/v1"
 
+# Seconds to wait on a single pipeline filter inlet/outlet call
+PIPELINE_FILTER_TIMEOUT = int(os.environ.get("PIPELINE_FILTER_TIMEOUT", "30"))
+
+# Run outlet filters concurrently on the same body. A filter changing a field
+# an earlier filter already changed runs a second time, on the merged body, so
+# this only pays off for filters that modify independent fields
+ENABLE_PIPELINE_CONCURRENT_OUTLETS = (
+    os.environ.get("ENABLE_PIPELINE_CONCURRENT_OUTLETS", "False").lower() == "true"
+)
+
 ####################################
 # WEBUI
 ####################################
@@ -788,6 +852,11 @@ MODEL_FILTER_LIST = PersistentConfig(
     [model.strip() for model in MODEL_FILTER_LIST.split(";")],
 )
 
+# Seconds a fetched model list is served before it is refreshed in the background
+MODELS_CACHE_TTL = int(os.environ.get("MODELS_CACHE_TTL", "60"))
+# Seconds to wait on a single backend (ollama, openai, pipes) when listing models
+MODELS_BACKEND_TIMEOUT = int(os.environ.get("MODELS_BACKEND_TIMEOUT", "10"))
+
 WEBHOOK_URL = PersistentConfig(
     "WEBHOOK_URL", "webhook_url", os.environ.get("WEBHOOK_URL", "")
 )
@@ -1032,6 +1101,15 @@ RAG_EMBEDDING_OPENAI_BATCH_SIZE = PersistentConfig(
     int(os.environ.get("RAG_EMBEDDING_OPENAI_BATCH_SIZE", "1")),
 )
 
+# Remote (ollama/openai) embedding requests in flight per embedding call
+RAG_EMBEDDING_CONCURRENT_REQUESTS = int(
+    os.environ.get("RAG_EMBEDDING_CONCURRENT_REQUESTS", "4")
+)
+RAG_EMBEDDING_OLLAMA_BATCH_SIZE = int(
+    os.environ.get("RAG_EMBEDDING_OLLAMA_BATCH_SIZE", "32")
+)
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "3"))
+
 RAG_RERANKING_MODEL = PersistentConfig(
     "RAG_RERANKING_MODEL",
     "rag.reranking_model",
@@ -1048,6 +1126,26 @@ RAG_RERANKING_MODEL_TRUST_REMOTE_CODE = (
     os.environ.get("RAG_RERANKING_MODEL_TRUST_REMOTE_CODE", "").lower() == "true"
 )
 
+# Hybrid search reranks the merged candidates of all collections in one call
+RAG_RERANKING_BATCH_SIZE = int(os.environ.get("RAG_RERANKING_BATCH_SIZE", "32"))
+RAG_RERANKING_MAX_CANDIDATES = int(os.environ.get("RAG_RERANKING_MAX_CANDIDATES", "50"))
+# Cached (query, chunk) reranking scores, reused across regenerations
+RAG_RERANKING_SCORE_CACHE_SIZE = int(
+    os.environ.get("RAG_RERANKING_SCORE_CACHE_SIZE", "10000")
+)
+
+# Max number of collections queried concurrently for a single retrieval
+RAG_QUERY_MAX_WORKERS = int(os.environ.get("RAG_QUERY_MAX_WORKERS", "8"))
+
+# Worker threads running retrievals for chat requests off the event loop
+RAG_RETRIEVAL_MAX_WORKERS = int(os.environ.get("RAG_RETRIEVAL_MAX_WORKERS", "4"))
+
+# In-process LRU of query embeddings, optionally backed by an on-disk tier
+RAG_EMBEDDING_CACHE_SIZE = int(os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "2048"))
+ENABLE_RAG_EMBEDDING_DISK_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_DISK_CACHE", "False").lower() == "true"
+)
+
 
 if CHROMA_HTTP_HOST != "":
     CHROMA_CLIENT = chromadb.HttpClient(
@@ -1085,6 +1183,13 @@ CHUNK_OVERLAP = PersistentConfig(
     int(os.environ.get("CHUNK_OVERLAP", "100")),
 )
 
+# Chunks embedded and added per step when ingesting a document, and how many
+# loaded batches may wait ahead of the embedder
+RAG_INGESTION_BATCH_SIZE = int(os.environ.get("RAG_INGESTION_BATCH_SIZE", "128"))
+RAG_INGESTION_PREFETCH_BATCHES = int(
+    os.environ.get("RAG_INGESTION_PREFETCH_BATCHES", "2")
+)
+
 DEFAULT_RAG_TEMPLATE = """Use the following context as your learned knowledge, inside <context></context> XML tags.
 <context>
     [context]
@@ -1229,6 +1334,25 @@ RAG_WEB_SEARCH_CONCURRENT_REQUESTS = PersistentConfig(
     int(os.getenv("RAG_WEB_SEARCH_CONCURRENT_REQUESTS", "10")),
 )
 
+# Web pages fetched at once from a single host, seconds a page may take once
+# its download starts, and bytes read per page before it is truncated
+RAG_WEB_FETCH_CONCURRENT_REQUESTS_PER_HOST = int(
+    os.environ.get("RAG_WEB_FETCH_CONCURRENT_REQUESTS_PER_HOST", "2")
+)
+RAG_WEB_FETCH_TIMEOUT = float(os.environ.get("RAG_WEB_FETCH_TIMEOUT", "10"))
+RAG_WEB_FETCH_MAX_SIZE = int(
+    os.environ.get("RAG_WEB_FETCH_MAX_SIZE", str(5 * 1024 * 1024))
+)
+
+# Seconds web search engine results and fetched pages are reused for
+# (0 disables), and how many of each are kept
+RAG_WEB_SEARCH_CACHE_TTL = int(os.environ.get("RAG_WEB_SEARCH_CACHE_TTL", "3600"))
+RAG_WEB_SEARCH_CACHE_SIZE = int(os.environ.get("RAG_WEB_SEARCH_CACHE_SIZE", "1000"))
+# Embedded web page chunks, so pages seen before are not embedded again
+RAG_WEB_EMBEDDING_CACHE_SIZE = int(
+    os.environ.get("RAG_WEB_EMBEDDING_CACHE_SIZE", "20000")
+)
+
 
 ####################################
 # Transcribe
@@ -58,6 +58,7 @@ log_sources = [
     "OLLAMA",
     "OPENAI",
     "RAG",
+    "SOCKET",
     "WEBHOOK",
 ]
 
@@ -249,6 +250,15 @@ WEBUI_AUTH_TRUSTED_EMAIL_HEADER = os.environ.get(
 )
 WEBUI_AUTH_TRUSTED_NAME_HEADER = os.environ.get("WEBUI_AUTH_TRUSTED_NAME_HEADER", None)
 
+# Seconds an authenticated user is served from memory before it is read from
+# the database again (0 disables the cache)
+WEBUI_AUTH_USER_CACHE_TTL = float(os.environ.get("WEBUI_AUTH_USER_CACHE_TTL", "5"))
+# Seconds between batched writes of users' last_active_at (0 writes it on
+# every request)
+WEBUI_AUTH_LAST_ACTIVE_FLUSH_INTERVAL = float(
+    os.environ.get("WEBUI_AUTH_LAST_ACTIVE_FLUSH_INTERVAL", "30")
+)
+
 
 ####################################
 # WEBUI_SECRET_KEY
@@ -273,3 +283,19 @@ WEBUI_SESSION_COOKIE_SECURE = os.environ.get(
 
 if WEBUI_AUTH and WEBUI_SECRET_KEY == "":
     raise ValueError(ERROR_MESSAGES.ENV_VAR_NOT_FOUND)
+
+
+####################################
+# WEBSOCKET
+####################################
+
+# "redis" shares socket.io events, rooms and presence between workers and
+# replicas through WEBSOCKET_REDIS_URL; anything else keeps them in process
+WEBSOCKET_MANAGER = os.environ.get("WEBSOCKET_MANAGER", "")
+WEBSOCKET_REDIS_URL = os.environ.get("WEBSOCKET_REDIS_URL", "redis://localhost:6379/0")
+# Seconds the sessions of a worker that stopped refreshing them stay counted
+WEBSOCKET_PRESENCE_TTL = int(os.environ.get("WEBSOCKET_PRESENCE_TTL", "60"))
+# Seconds between coalesced user-count and usage broadcasts
+WEBSOCKET_BROADCAST_INTERVAL = float(
+    os.environ.get("WEBSOCKET_BROADCAST_INTERVAL", "1")
+)
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import inspect
 import json
@@ -17,6 +18,7 @@ import requests
 
 from open_webui.apps.audio.main import app as audio_app
 from open_webui.apps.images.main import app as images_app
+from open_webui.apps.ollama.balancer import OLLAMA_BALANCER
 from open_webui.apps.ollama.main import app as ollama_app
 from open_webui.apps.ollama.main import (
     generate_openai_chat_completion as generate_ollama_chat_completion,
@@ -27,10 +29,21 @@ from open_webui.apps.openai.main import (
     generate_chat_completion as generate_openai_chat_completion,
 )
 from open_webui.apps.openai.main import get_all_models as get_openai_models
-from open_webui.apps.rag.main import app as rag_app
-from open_webui.apps.rag.utils import get_rag_context, rag_template
+from open_webui.apps.rag.main import (
+    app as rag_app,
+    normalize_ollama_collections,
+    start_docs_dir_watch,
+    stop_docs_dir_watch,
+)
+from open_webui.apps.rag.utils import get_rag_context_async, rag_template
 from open_webui.apps.socket.main import app as socket_app
-from open_webui.apps.socket.main import get_event_call, get_event_emitter
+from open_webui.apps.socket.main import (
+    get_event_call,
+    get_event_emitter,
+    start_presence,
+    stop_presence,
+)
+from open_webui.apps.webui.ingestion import INGESTION_QUEUE
 from open_webui.apps.webui.internal.db import Session
 from open_webui.apps.webui.main import app as webui_app
 from open_webui.apps.webui.main import (
@@ -41,6 +54,9 @@ from open_webui.apps.webui.models.auths import Auths
 from open_webui.apps.webui.models.functions import Functions
 from open_webui.apps.webui.models.models import Models
 from open_webui.apps.webui.models.users import UserModel, Users
+from open_webui.apps.webui.routers.loader.utils.nlp import (
+    warm_up as warm_up_sentencizer,
+)
 from open_webui.apps.webui.utils import load_function_module_by_id
 
 
@@ -54,15 +70,19 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     ENABLE_ADMIN_CHAT_ACCESS,
     ENABLE_ADMIN_EXPORT,
+    ENABLE_DOCS_DIR_WATCH,
     ENABLE_MODEL_FILTER,
     ENABLE_OAUTH_SIGNUP,
     ENABLE_OLLAMA_API,
     ENABLE_OPENAI_API,
+    ENABLE_PIPELINE_CONCURRENT_OUTLETS,
+    ENABLE_SENTENCIZER_PREWARM,
     ENV,
     FRONTEND_BUILD_DIR,
     MODEL_FILTER_LIST,
     OAUTH_MERGE_ACCOUNTS_BY_EMAIL,
     OAUTH_PROVIDERS,
+    PIPELINE_FILTER_TIMEOUT,
     ENABLE_SEARCH_QUERY,
     SEARCH_QUERY_GENERATION_PROMPT_TEMPLATE,
     STATIC_DIR,
@@ -104,10 +124,12 @@ from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from sqlalchemy import text
+from starlette.datastructures import Headers
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import RedirectResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.responses import RedirectResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 
 from open_webui.utils.misc import (
@@ -116,6 +138,15 @@ from open_webui.utils.misc import (
     parse_duration,
     prepend_to_first_user_message_content,
 )
+from open_webui.utils.chat_request import (
+    get_chat_request_body,
+    get_chat_request_context,
+    get_chat_request_openapi_extra,
+    wait_for_disconnect,
+)
+from open_webui.utils.loop_monitor import LOOP_MONITOR
+from open_webui.utils.model_registry import MODEL_REGISTRY
+from open_webui.utils.session_pool import CLIENT_SESSIONS, release_response
 from open_webui.utils.task import (
     moa_response_generation_template,
     search_query_generation_template,
@@ -124,6 +155,7 @@ from open_webui.utils.task import (
 )
 from open_webui.utils.tools import get_tools
 from open_webui.utils.utils import (
+    LAST_ACTIVE_TRACKER,
     create_token,
     decode_token,
     get_admin_user,
@@ -175,8 +207,45 @@ https://github.com/open-webui/open-webui
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     run_migrations()
+
+    # Warm one pooled client session per configured upstream
+    CLIENT_SESSIONS.open(
+        [
+            *ollama_app.state.config.OLLAMA_BASE_URLS,
+            *openai_app.state.config.OPENAI_API_BASE_URLS,
+        ]
+    )
+
+    LOOP_MONITOR.start()
+    LAST_ACTIVE_TRACKER.start()
+    start_presence()
+    INGESTION_QUEUE.start()
+    if ENABLE_SENTENCIZER_PREWARM:
+        asyncio.get_running_loop().run_in_executor(None, warm_up_sentencizer)
+    # Collections indexed before Ollama embeddings came from /api/embed
+    asyncio.get_running_loop().run_in_executor(None, normalize_ollama_collections)
+    if ENABLE_DOCS_DIR_WATCH:
+        start_docs_dir_watch()
+    MODEL_REGISTRY.start()
+    OLLAMA_BALANCER.start(
+        lambda: (
+            ollama_app.state.config.OLLAMA_BASE_URLS
+            if ollama_app.state.config.ENABLE_OLLAMA_API
+            else []
+        )
+    )
+
     yield
 
+    await OLLAMA_BALANCER.stop()
+    await MODEL_REGISTRY.stop()
+    await stop_docs_dir_watch()
+    await INGESTION_QUEUE.stop()
+    await LOOP_MONITOR.stop()
+    await stop_presence()
+    await LAST_ACTIVE_TRACKER.stop()
+    await CLIENT_SESSIONS.close()
+
 
 app = FastAPI(
     docs_url="/docs" if ENV == "dev" else None, redoc_url=None, lifespan=lifespan
@@ -409,7 +478,7 @@ async def chat_completion_tools_handler(
     )
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         raise e
 
@@ -465,21 +534,38 @@ async def chat_completion_tools_handler(
     return body, {"contexts": contexts, "citations": citations}
 
 
-async def chat_completion_files_handler(body) -> tuple[dict, dict[str, list]]:
+async def chat_completion_files_handler(
+    body, receive: Optional[Receive] = None
+) -> tuple[dict, dict[str, list]]:
     contexts = []
     citations = []
 
     if files := body.get("metadata", {}).get("files", None):
-        contexts, citations = get_rag_context(
-            files=files,
-            messages=body["messages"],
-            embedding_function=rag_app.state.EMBEDDING_FUNCTION,
-            k=rag_app.state.config.TOP_K,
-            reranking_function=rag_app.state.sentence_transformer_rf,
-            r=rag_app.state.config.RELEVANCE_THRESHOLD,
-            hybrid_search=rag_app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+        # Retrieval runs on the RAG worker pool, off the event loop
+        retrieval = asyncio.create_task(
+            get_rag_context_async(
+                files=files,
+                messages=body["messages"],
+                embedding_function=rag_app.state.EMBEDDING_FUNCTION,
+                k=rag_app.state.config.TOP_K,
+                reranking_function=rag_app.state.sentence_transformer_rf,
+                r=rag_app.state.config.RELEVANCE_THRESHOLD,
+                hybrid_search=rag_app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+            )
         )
 
+        if receive is not None:
+            disconnect = asyncio.create_task(wait_for_disconnect(receive))
+            await asyncio.wait(
+                {retrieval, disconnect}, return_when=asyncio.FIRST_COMPLETED
+            )
+            disconnect.cancel()
+            if not retrieval.done():
+                retrieval.cancel()
+                raise ClientDisconnect()
+
+        contexts, citations = await retrieval
+
         log.debug(f"rag_contexts: {contexts}, citations: {citations}")
 
     return body, {"contexts": contexts, "citations": citations}
@@ -492,38 +578,87 @@ def is_chat_completion_request(request):
     )
 
 
-async def get_body_and_model_and_user(request):
-    # Read the original request body
-    body = await request.body()
-    body_str = body.decode("utf-8")
-    body = json.loads(body_str) if body_str else {}
+def get_chat_request_user(request, context):
+    if context.user is None:
+        context.user = get_current_user(
+            request,
+            get_http_authorization_cred(request.headers.get("Authorization")),
+        )
+    return context.user
+
+
+def get_body_and_model_and_user(request, context):
+    body = context.body
 
     model_id = body["model"]
     if model_id not in app.state.MODELS:
         raise Exception("Model not found")
     model = app.state.MODELS[model_id]
 
-    user = get_current_user(
-        request,
-        get_http_authorization_cred(request.headers.get("Authorization")),
-    )
+    user = get_chat_request_user(request, context)
 
     return body, model, user
 
 
-class ChatCompletionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+def get_send_with_data_items(send, data_items):
+    """
+    Wrap an ASGI send callable so `data_items` are streamed to the client
+    ahead of an SSE (OpenAI) or NDJSON (Ollama) completion stream.
+    """
+    if not data_items:
+        return send
+
+    async def _send(message):
+        await send(message)
+
+        if message["type"] != "http.response.start":
+            return
+
+        headers = Headers(raw=message.get("headers", []))
+        if "content-length" in headers:
+            return
+
+        content_type = headers.get("content-type", "")
+        if "text/event-stream" in content_type:
+            chunk = "".join(f"data: {json.dumps(item)}\n\n" for item in data_items)
+        elif "application/x-ndjson" in content_type:
+            chunk = "".join(f"{json.dumps(item)}\n" for item in data_items)
+        else:
+            return
+
+        await send(
+            {
+                "type": "http.response.body",
+                "body": chunk.encode("utf-8"),
+                "more_body": True,
+            }
+        )
+
+    return _send
+
+
+class ChatCompletionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = Request(scope, receive)
         if not is_chat_completion_request(request):
-            return await call_next(request)
+            return await self.app(scope, receive, send)
         log.debug(f"request.url.path: {request.url.path}")
 
         try:
-            body, model, user = await get_body_and_model_and_user(request)
+            context = await get_chat_request_context(request)
+            body, model, user = get_body_and_model_and_user(request, context)
         except Exception as e:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"detail": str(e)},
             )
+            return await response(scope, receive, send)
 
         metadata = {
             "chat_id": body.pop("chat_id", None),
@@ -547,7 +682,7 @@ class ChatCompletionMiddleware(BaseHTTPMiddleware):
 
         # Initialize data_items to store additional data to be sent to the client
         # Initalize contexts and citation
-        data_items = []
+        data_items = context.data_items
         contexts = []
         citations = []
 
@@ -556,10 +691,11 @@ class ChatCompletionMiddleware(BaseHTTPMiddleware):
                 body, model, extra_params
             )
         except Exception as e:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"detail": str(e)},
             )
+            return await response(scope, receive, send)
 
         metadata = {
             **metadata,
@@ -576,9 +712,12 @@ class ChatCompletionMiddleware(BaseHTTPMiddleware):
             log.exception(e)
 
         try:
-            body, flags = await chat_completion_files_handler(body)
+            body, flags = await chat_completion_files_handler(body, receive)
             contexts.extend(flags.get("contexts", []))
             citations.extend(flags.get("citations", []))
+        except ClientDisconnect:
+            log.debug("client disconnected during retrieval")
+            return
         except Exception as e:
             log.exception(e)
 
@@ -609,43 +748,16 @@ class ChatCompletionMiddleware(BaseHTTPMiddleware):
         if len(citations) > 0:
             data_items.append({"citations": citations})
 
-        modified_body_bytes = json.dumps(body).encode("utf-8")
-        # Replace the request body with the modified one
-        request._body = modified_body_bytes
-        # Set custom header to ensure content-length matches new body length
-        request.headers.__dict__["_list"] = [
-            (b"content-length", str(len(modified_body_bytes)).encode("utf-8")),
-            *[(k, v) for k, v in request.headers.raw if k.lower() != b"content-length"],
-        ]
-
-        response = await call_next(request)
-        if not isinstance(response, StreamingResponse):
-            return response
-
-        content_type = response.headers["Content-Type"]
-        is_openai = "text/event-stream" in content_type
-        is_ollama = "application/x-ndjson" in content_type
-        if not is_openai and not is_ollama:
-            return response
-
-        def wrap_item(item):
-            return f"data: {item}\n\n" if is_openai else f"{item}\n"
+        # Hand the modified body to the handler without re-serializing it
+        context.body = body
+        context.model = model
 
-        async def stream_wrapper(original_generator, data_items):
-            for item in data_items:
-                yield wrap_item(json.dumps(item))
-
-            async for data in original_generator:
-                yield data
-
-        return StreamingResponse(
-            stream_wrapper(response.body_iterator, data_items),
-            headers=dict(response.headers),
+        await self.app(
+            scope,
+            context.get_receive(receive),
+            get_send_with_data_items(send, data_items),
         )
 
-    async def _receive(self, body: bytes):
-        return {"type": "http.request", "body": body, "more_body": False}
-
 
 app.add_middleware(ChatCompletionMiddleware)
 
@@ -675,7 +787,54 @@ def get_sorted_filters(model_id):
     return sorted_filters
 
 
-def filter_pipeline(payload, user):
+async def post_pipeline_filter(filter, endpoint: str, body: dict, user: dict):
+    """
+    Call a pipeline filter's `inlet` or `outlet` through the shared session
+    pool. Returns None if the filter is skipped or fails, and raises
+    Exception(status_code, response) if it rejects the body with a detail.
+    """
+    r = None
+    try:
+        urlIdx = filter["urlIdx"]
+
+        url = openai_app.state.config.OPENAI_API_BASE_URLS[urlIdx]
+        key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
+
+        if key == "":
+            return None
+
+        session = CLIENT_SESSIONS.get_session(url)
+        r = await session.post(
+            f"{url}/{filter['id']}/filter/{endpoint}",
+            headers={"Authorization": f"Bearer {key}"},
+            json={
+                "user": user,
+                "body": body,
+            },
+            timeout=aiohttp.ClientTimeout(total=PIPELINE_FILTER_TIMEOUT or None),
+        )
+
+        r.raise_for_status()
+        return await r.json()
+    except Exception as e:
+        # Handle connection error here
+        log.error(f"Pipeline filter {filter['id']} {endpoint} failed: {e}")
+
+        res = None
+        if r is not None:
+            try:
+                res = await r.json()
+            except Exception:
+                pass
+
+        if isinstance(res, dict) and "detail" in res:
+            raise Exception(r.status, res)
+        return None
+    finally:
+        await release_response(r)
+
+
+async def filter_pipeline(payload, user):
     user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
     model_id = payload["model"]
     sorted_filters = get_sorted_filters(model_id)
@@ -686,87 +845,109 @@ def filter_pipeline(payload, user):
         sorted_filters.append(model)
 
     for filter in sorted_filters:
-        r = None
         try:
-            urlIdx = filter["urlIdx"]
+            res = await post_pipeline_filter(filter, "inlet", payload, user)
+        except Exception as e:
+            status_code, res = e.args
+            raise Exception(status_code, res["detail"])
 
-            url = openai_app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
+        if res is not None:
+            payload = res
 
-            if key == "":
-                continue
+    return payload
 
-            headers = {"Authorization": f"Bearer {key}"}
-            r = requests.post(
-                f"{url}/{filter['id']}/filter/inlet",
-                headers=headers,
-                json={
-                    "user": user,
-                    "body": payload,
-                },
+
+def get_changed_keys(data: dict, res: dict) -> set:
+    return {
+        key
+        for key in data.keys() | res.keys()
+        if key not in res or key not in data or data[key] != res[key]
+    }
+
+
+async def outlet_pipeline(sorted_filters, data, user):
+    if not ENABLE_PIPELINE_CONCURRENT_OUTLETS:
+        for filter in sorted_filters:
+            res = await post_pipeline_filter(filter, "outlet", data, user)
+            if res is not None:
+                data = res
+        return data
+
+    # Every filter sees the same body and the fields each one changed are
+    # merged in priority order. A filter changing a field an earlier one
+    # already changed (e.g. both edit `messages`) would lose that edit, so
+    # its result is dropped and it runs again on the merged body afterwards.
+    results = await asyncio.gather(
+        *[
+            post_pipeline_filter(filter, "outlet", data, user)
+            for filter in sorted_filters
+        ]
+    )
+
+    merged = {**data}
+    changed = set()
+    conflicting = []
+    for filter, res in zip(sorted_filters, results):
+        if res is None:
+            continue
+
+        keys = get_changed_keys(data, res)
+        if keys & changed:
+            log.debug(
+                f"outlet filter {filter['id']} conflicts on "
+                f"{sorted(keys & changed)}, running it again on the merged body"
             )
+            conflicting.append(filter)
+            continue
 
-            r.raise_for_status()
-            payload = r.json()
-        except Exception as e:
-            # Handle connection error here
-            print(f"Connection error: {e}")
+        for key in keys:
+            if key in res:
+                merged[key] = res[key]
+            else:
+                merged.pop(key, None)
+        changed |= keys
 
-            if r is not None:
-                res = r.json()
-                if "detail" in res:
-                    raise Exception(r.status_code, res["detail"])
+    for filter in conflicting:
+        res = await post_pipeline_filter(filter, "outlet", merged, user)
+        if res is not None:
+            merged = res
+    return merged
 
-    return payload
 
+class PipelineMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-class PipelineMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+        request = Request(scope, receive)
         if not is_chat_completion_request(request):
-            return await call_next(request)
+            return await self.app(scope, receive, send)
 
         log.debug(f"request.url.path: {request.url.path}")
 
-        # Read the original request body
-        body = await request.body()
-        # Decode body to string
-        body_str = body.decode("utf-8")
-        # Parse string to JSON
-        data = json.loads(body_str) if body_str else {}
-
-        user = get_current_user(
-            request,
-            get_http_authorization_cred(request.headers["Authorization"]),
-        )
+        # Parsed once here and shared with ChatCompletionMiddleware and the handler
+        context = await get_chat_request_context(request)
+        user = get_chat_request_user(request, context)
 
         try:
-            data = filter_pipeline(data, user)
+            context.body = await filter_pipeline(context.body, user)
         except Exception as e:
             if len(e.args) > 1:
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=e.args[0],
                     content={"detail": e.args[1]},
                 )
             else:
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     content={"detail": str(e)},
                 )
+            return await response(scope, receive, send)
 
-        modified_body_bytes = json.dumps(data).encode("utf-8")
-        # Replace the request body with the modified one
-        request._body = modified_body_bytes
-        # Set custom header to ensure content-length matches new body length
-        request.headers.__dict__["_list"] = [
-            (b"content-length", str(len(modified_body_bytes)).encode("utf-8")),
-            *[(k, v) for k, v in request.headers.raw if k.lower() != b"content-length"],
-        ]
-
-        response = await call_next(request)
-        return response
-
-    async def _receive(self, body: bytes):
-        return {"type": "http.request", "body": body, "more_body": False}
+        await self.app(scope, context.get_receive(receive), send)
 
 
 app.add_middleware(PipelineMiddleware)
@@ -778,6 +959,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -797,9 +979,12 @@ async def check_url(request: Request, call_next):
         pass
 
     start_time = int(time.time())
+    blocked = LOOP_MONITOR.blocked
     response = await call_next(request)
     process_time = int(time.time()) - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    # Time the event loop was stalled (by any request) while serving this one
+    response.headers["X-Event-Loop-Blocked"] = f"{LOOP_MONITOR.blocked - blocked:.3f}"
 
     return response
 
@@ -827,30 +1012,44 @@ webui_app.state.EMBEDDING_FUNCTION = rag_app.state.EMBEDDING_FUNCTION
 
 
 async def get_all_models():
-    # TODO: Optimize this function
-    pipe_models = []
-    openai_models = []
-    ollama_models = []
+    # Served from the model registry; see fetch_all_models for the loader
+    return await MODEL_REGISTRY.get()
 
-    pipe_models = await get_pipe_models()
 
-    if app.state.config.ENABLE_OPENAI_API:
-        openai_models = await get_openai_models()
-        openai_models = openai_models["data"]
+async def fetch_openai_models():
+    if not app.state.config.ENABLE_OPENAI_API:
+        return []
 
-    if app.state.config.ENABLE_OLLAMA_API:
-        ollama_models = await get_ollama_models()
-        ollama_models = [
-            {
-                "id": model["model"],
-                "name": model["name"],
-                "object": "model",
-                "created": int(time.time()),
-                "owned_by": "ollama",
-                "ollama": model,
-            }
-            for model in ollama_models["models"]
-        ]
+    openai_models = await get_openai_models()
+    return openai_models["data"]
+
+
+async def fetch_ollama_models():
+    if not app.state.config.ENABLE_OLLAMA_API:
+        return []
+
+    ollama_models = await get_ollama_models()
+    return [
+        {
+            "id": model["model"],
+            "name": model["name"],
+            "object": "model",
+            "created": int(time.time()),
+            "owned_by": "ollama",
+            "ollama": model,
+        }
+        for model in ollama_models["models"]
+    ]
+
+
+async def fetch_all_models():
+    # Backends are queried concurrently; a failing one falls back to its
+    # last known models instead of failing the whole list.
+    pipe_models, openai_models, ollama_models = await asyncio.gather(
+        MODEL_REGISTRY.fetch_backend("pipe", get_pipe_models),
+        MODEL_REGISTRY.fetch_backend("openai", fetch_openai_models),
+        MODEL_REGISTRY.fetch_backend("ollama", fetch_ollama_models),
+    )
 
     models = pipe_models + openai_models + ollama_models
 
@@ -973,6 +1172,9 @@ async def get_all_models():
     return models
 
 
+MODEL_REGISTRY.loader = fetch_all_models
+
+
 @app.get("/api/models")
 async def get_models(user=Depends(get_verified_user)):
     models = await get_all_models()
@@ -997,8 +1199,11 @@ async def get_models(user=Depends(get_verified_user)):
     return {"data": models}
 
 
-@app.post("/api/chat/completions")
-async def generate_chat_completions(form_data: dict, user=Depends(get_verified_user)):
+@app.post("/api/chat/completions", openapi_extra=get_chat_request_openapi_extra())
+async def generate_chat_completions(
+    form_data: dict = Depends(get_chat_request_body),
+    user=Depends(get_verified_user),
+):
     model_id = form_data["model"]
 
     if model_id not in app.state.MODELS:
@@ -1038,49 +1243,24 @@ async def chat_completed(form_data: dict, user=Depends(get_verified_user)):
     if "pipeline" in model:
         sorted_filters = [model] + sorted_filters
 
-    for filter in sorted_filters:
-        r = None
-        try:
-            urlIdx = filter["urlIdx"]
-
-            url = openai_app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
-
-            if key != "":
-                headers = {"Authorization": f"Bearer {key}"}
-                r = requests.post(
-                    f"{url}/{filter['id']}/filter/outlet",
-                    headers=headers,
-                    json={
-                        "user": {
-                            "id": user.id,
-                            "name": user.name,
-                            "email": user.email,
-                            "role": user.role,
-                        },
-                        "body": data,
-                    },
-                )
-
-                r.raise_for_status()
-                data = r.json()
-        except Exception as e:
-            # Handle connection error here
-            print(f"Connection error: {e}")
-
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "detail" in res:
-                        return JSONResponse(
-                            status_code=r.status_code,
-                            content=res,
-                        )
-                except Exception:
-                    pass
-
-            else:
-                pass
+    try:
+        data = await outlet_pipeline(
+            sorted_filters,
+            data,
+            {
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "role": user.role,
+            },
+        )
+    except Exception as e:
+        if len(e.args) < 2:
+            raise e
+        return JSONResponse(
+            status_code=e.args[0],
+            content=e.args[1],
+        )
 
     __event_emitter__ = get_event_emitter(
         {
@@ -1408,7 +1588,7 @@ Prompt: {{prompt:middletruncate:8000}}"""
     log.debug(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         if len(e.args) > 1:
             return JSONResponse(
@@ -1477,7 +1657,7 @@ Interaction History:
     print(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         if len(e.args) > 1:
             return JSONResponse(
@@ -1540,7 +1720,7 @@ Message: """{{prompt}}"""
     log.debug(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         if len(e.args) > 1:
             return JSONResponse(
@@ -1598,7 +1778,7 @@ Responses from models: {{responses}}"""
     log.debug(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         if len(e.args) > 1:
             return JSONResponse(
@@ -1682,6 +1862,7 @@ async def upload_pipeline(
 
         r.raise_for_status()
         data = r.json()
+        MODEL_REGISTRY.invalidate()
 
         return {**data}
     except Exception as e:
@@ -1730,6 +1911,7 @@ async def add_pipeline(form_data: AddPipelineForm, user=Depends(get_admin_user))
 
         r.raise_for_status()
         data = r.json()
+        MODEL_REGISTRY.invalidate()
 
         return {**data}
     except Exception as e:
@@ -1772,6 +1954,7 @@ async def delete_pipeline(form_data: DeletePipelineForm, user=Depends(get_admin_
 
         r.raise_for_status()
         data = r.json()
+        MODEL_REGISTRY.invalidate()
 
         return {**data}
     except Exception as e:
@@ -2062,6 +2245,11 @@ async def update_webhook_url(form_data: UrlForm, user=Depends(get_admin_user)):
     return {"url": app.state.config.WEBHOOK_URL}
 
 
+@app.get("/api/event-loop/stats")
+async def get_event_loop_stats(user=Depends(get_admin_user)):
+    return LOOP_MONITOR.to_dict()
+
+
 @app.get("/api/version")
 async def get_app_version():
     return {
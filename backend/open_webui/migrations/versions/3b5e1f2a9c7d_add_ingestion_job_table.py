@@ -0,0 +1,50 @@
+"""Add ingestion job table
+
+Revision ID: 3b5e1f2a9c7d
+Revises: ca81bd47c050
+Create Date: 2024-09-02 10:12:44.517203
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+import open_webui.apps.webui.internal.db
+from open_webui.apps.webui.internal.db import JSONField
+from open_webui.migrations.util import get_existing_tables
+
+# revision identifiers, used by Alembic.
+revision: str = "3b5e1f2a9c7d"
+down_revision: Union[str, None] = "ca81bd47c050"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "ingestion_job" not in existing_tables:
+        op.create_table(
+            "ingestion_job",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("file_id", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("progress", sa.Integer(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("meta", JSONField(), nullable=True),
+            sa.Column("created_at", sa.BigInteger(), nullable=False),
+            sa.Column("updated_at", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ingestion_job_status_idx", "ingestion_job", ["status"], unique=False
+        )
+
+
+def downgrade():
+    op.drop_index("ingestion_job_status_idx", table_name="ingestion_job")
+    op.drop_table("ingestion_job")
@@ -0,0 +1,28 @@
+"""Add file content hash
+
+Revision ID: 4c8a2e6f1d3b
+Revises: 3b5e1f2a9c7d
+Create Date: 2024-09-03 16:40:12.902311
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8a2e6f1d3b"
+down_revision: Union[str, None] = "3b5e1f2a9c7d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column("file", sa.Column("hash", sa.Text(), nullable=True))
+    op.create_index("file_hash_idx", "file", ["hash"], unique=False)
+
+
+def downgrade():
+    op.drop_index("file_hash_idx", table_name="file")
+    op.drop_column("file", "hash")
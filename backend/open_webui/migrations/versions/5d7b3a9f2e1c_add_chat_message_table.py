@@ -0,0 +1,193 @@
+"""Add chat message table
+
+Revision ID: 5d7b3a9f2e1c
+Revises: 4c8a2e6f1d3b
+Create Date: 2024-09-06 11:02:37.415826
+
+"""
+
+import hashlib
+import json
+import time
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from open_webui.migrations.util import get_existing_tables
+
+# revision identifiers, used by Alembic.
+revision: str = "5d7b3a9f2e1c"
+down_revision: Union[str, None] = "4c8a2e6f1d3b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 100
+
+chat_table = sa.table(
+    "chat",
+    sa.column("id", sa.String()),
+    sa.column("chat", sa.Text()),
+)
+
+# meta is JSON stored as text, serialized here rather than through JSONField
+chat_message_table = sa.table(
+    "chat_message",
+    sa.column("chat_id", sa.String()),
+    sa.column("id", sa.String()),
+    sa.column("parent_id", sa.String()),
+    sa.column("content", sa.Text()),
+    sa.column("meta", sa.Text()),
+    sa.column("hash", sa.String()),
+    sa.column("created_at", sa.BigInteger()),
+    sa.column("updated_at", sa.BigInteger()),
+)
+
+
+def iter_chats(conn):
+    # Batches of rows, keyset paginated so rewritten rows are not revisited
+    last_id = ""
+    while True:
+        rows = conn.execute(
+            sa.select(chat_table.c.id, chat_table.c.chat)
+            .where(chat_table.c.id > last_id)
+            .order_by(chat_table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def get_message_timestamp(message: dict, default: int) -> int:
+    # Orders the messages of a chat when it is read back
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return int(timestamp)
+    return default
+
+
+def split_messages(conn, chat_id: str, chat: dict, now: int):
+    history = chat.get("history")
+    if not isinstance(history, dict) or not isinstance(history.get("messages"), dict):
+        return
+
+    rows = []
+    for message_id, message in history["messages"].items():
+        content = message.get("content")
+        if not isinstance(content, str):
+            content = None
+        rows.append(
+            {
+                "chat_id": chat_id,
+                "id": message_id,
+                "parent_id": message.get("parentId"),
+                "content": content,
+                "meta": json.dumps(
+                    {
+                        key: value
+                        for key, value in message.items()
+                        if key != "content" or content is None
+                    }
+                ),
+                "hash": hashlib.sha256(
+                    json.dumps(message, sort_keys=True).encode()
+                ).hexdigest(),
+                "created_at": get_message_timestamp(message, now),
+                "updated_at": now,
+            }
+        )
+    if rows:
+        conn.execute(chat_message_table.insert(), rows)
+
+    skeleton = {key: value for key, value in chat.items() if key != "messages"}
+    skeleton["history"] = {
+        key: value for key, value in history.items() if key != "messages"
+    }
+    conn.execute(
+        chat_table.update()
+        .where(chat_table.c.id == chat_id)
+        .values(chat=json.dumps(skeleton))
+    )
+
+
+def join_messages(conn, chat_id: str, chat: dict):
+    history = chat.get("history")
+    if not isinstance(history, dict) or "messages" in history:
+        return
+
+    messages = {}
+    for message_id, content, meta in conn.execute(
+        sa.select(
+            chat_message_table.c.id,
+            chat_message_table.c.content,
+            chat_message_table.c.meta,
+        )
+        .where(chat_message_table.c.chat_id == chat_id)
+        .order_by(chat_message_table.c.created_at, chat_message_table.c.id)
+    ):
+        message = json.loads(meta) if meta else {}
+        if content is not None:
+            message["content"] = content
+        messages[message_id] = message
+
+    branch = []
+    message_id = history.get("currentId")
+    while message_id in messages and len(branch) < len(messages):
+        branch.append(messages[message_id])
+        message_id = messages[message_id].get("parentId")
+
+    chat = {
+        **chat,
+        "history": {**history, "messages": messages},
+        "messages": branch[::-1],
+    }
+    conn.execute(
+        chat_table.update()
+        .where(chat_table.c.id == chat_id)
+        .values(chat=json.dumps(chat))
+    )
+
+
+def upgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "chat_message" not in existing_tables:
+        op.create_table(
+            "chat_message",
+            sa.Column("chat_id", sa.String(), nullable=False),
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("parent_id", sa.String(), nullable=True),
+            sa.Column("content", sa.Text(), nullable=True),
+            sa.Column("meta", sa.Text(), nullable=True),
+            sa.Column("hash", sa.String(), nullable=True),
+            sa.Column("created_at", sa.BigInteger(), nullable=True),
+            sa.Column("updated_at", sa.BigInteger(), nullable=True),
+            sa.PrimaryKeyConstraint("chat_id", "id"),
+        )
+
+    conn = op.get_bind()
+    now = int(time.time())
+    for rows in iter_chats(conn):
+        for chat_id, chat in rows:
+            try:
+                chat = json.loads(chat)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(chat, dict):
+                split_messages(conn, chat_id, chat, now)
+
+
+def downgrade():
+    conn = op.get_bind()
+    for rows in iter_chats(conn):
+        for chat_id, chat in rows:
+            try:
+                chat = json.loads(chat)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(chat, dict):
+                join_messages(conn, chat_id, chat)
+
+    op.drop_table("chat_message")
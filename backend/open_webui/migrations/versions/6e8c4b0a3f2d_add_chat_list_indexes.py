@@ -0,0 +1,34 @@
+"""Add chat list indexes
+
+Revision ID: 6e8c4b0a3f2d
+Revises: 5d7b3a9f2e1c
+Create Date: 2024-09-09 09:48:15.206734
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6e8c4b0a3f2d"
+down_revision: Union[str, None] = "5d7b3a9f2e1c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Chat lists of a user, archived or not, newest first by (updated_at, id)
+    op.create_index(
+        "chat_user_id_archived_updated_at_idx",
+        "chat",
+        ["user_id", "archived", "updated_at", "id"],
+        unique=False,
+    )
+    # Chat exports across all users
+    op.create_index("chat_updated_at_idx", "chat", ["updated_at", "id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("chat_updated_at_idx", table_name="chat")
+    op.drop_index("chat_user_id_archived_updated_at_idx", table_name="chat")
@@ -0,0 +1,34 @@
+"""Add ingestion job claim
+
+Revision ID: 7a1f5c8e9b4d
+Revises: 6e8c4b0a3f2d
+Create Date: 2024-09-10 14:21:53.640172
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a1f5c8e9b4d"
+down_revision: Union[str, None] = "6e8c4b0a3f2d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column("ingestion_job", sa.Column("worker", sa.String(), nullable=True))
+    op.add_column(
+        "ingestion_job", sa.Column("claimed_at", sa.BigInteger(), nullable=True)
+    )
+    op.add_column(
+        "ingestion_job", sa.Column("available_at", sa.BigInteger(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("ingestion_job", "available_at")
+    op.drop_column("ingestion_job", "claimed_at")
+    op.drop_column("ingestion_job", "worker")
@@ -0,0 +1,172 @@
+import threading
+import time
+from pathlib import Path
+
+
+class FakeIndex:
+    """Records the callbacks `DocsDirScanner.scan` makes."""
+
+    def __init__(self, fail: set[str] = frozenset(), delay: float = 0):
+        self.fail = set(fail)
+        self.delay = delay
+
+        self.indexed: list[tuple[str, str]] = []
+        self.removed_files: list[tuple[str, str]] = []
+        self.removed_collections: list[str] = []
+
+        self.lock = threading.Lock()
+        self.active: dict[str, int] = {}
+        self.max_active: dict[str, int] = {}
+
+    def index_file(self, path: Path, collection_name: str) -> bool:
+        with self.lock:
+            self.active[collection_name] = self.active.get(collection_name, 0) + 1
+            self.max_active[collection_name] = max(
+                self.max_active.get(collection_name, 0), self.active[collection_name]
+            )
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[collection_name] -= 1
+            self.indexed.append((path.name, collection_name))
+        return path.name not in self.fail
+
+    def remove_file(self, path: Path, collection_name: str):
+        self.removed_files.append((path.name, collection_name))
+
+    def remove_collection(self, collection_name: str):
+        self.removed_collections.append(collection_name)
+
+    def reset(self):
+        self.indexed.clear()
+        self.removed_files.clear()
+        self.removed_collections.clear()
+
+
+class TestDocsDirScanner:
+    def setup_method(self, method):
+        from open_webui.apps.rag.scan import DocsDirScanner
+
+        self.DocsDirScanner = DocsDirScanner
+
+    def create_scanner(self, tmp_path: Path):
+        docs_dir = tmp_path / "docs"
+        docs_dir.mkdir(exist_ok=True)
+        return docs_dir, self.DocsDirScanner(
+            docs_dir=str(docs_dir), manifest_path=tmp_path / "manifest.json", workers=4
+        )
+
+    def scan(self, scanner, index: FakeIndex, **kwargs) -> dict:
+        return scanner.scan(
+            index_file=index.index_file,
+            remove_file=index.remove_file,
+            remove_collection=index.remove_collection,
+            **kwargs,
+        )
+
+    def get_collection_name(self, path: Path) -> str:
+        from open_webui.apps.rag.scan import calculate_file_sha256
+
+        return calculate_file_sha256(path)[:63]
+
+    def test_add_update_and_unchanged(self, tmp_path):
+        docs_dir, scanner = self.create_scanner(tmp_path)
+        (docs_dir / "a.txt").write_text("first")
+        (docs_dir / "b.txt").write_text("second")
+        index = FakeIndex()
+
+        result = self.scan(scanner, index)
+        assert result["added"] == 2
+        assert sorted(name for name, _ in index.indexed) == ["a.txt", "b.txt"]
+
+        # Nothing changed, nothing read
+        index.reset()
+        result = self.scan(scanner, index)
+        assert result["unchanged"] == 2
+        assert index.indexed == []
+
+        # Touched but with the same content
+        index.reset()
+        (docs_dir / "a.txt").write_text("first")
+        result = self.scan(scanner, index)
+        assert result["unchanged"] == 2
+        assert index.indexed == []
+
+        # Changed content goes to a new collection, the old one is released
+        index.reset()
+        old_collection_name = self.get_collection_name(docs_dir / "b.txt")
+        (docs_dir / "b.txt").write_text("second, edited")
+        result = self.scan(scanner, index)
+        assert result["updated"] == 1
+        assert index.indexed == [
+            ("b.txt", self.get_collection_name(docs_dir / "b.txt"))
+        ]
+        assert index.removed_collections == [old_collection_name]
+
+        # The manifest is reloaded by a new scanner, e.g. in another worker
+        index.reset()
+        _, scanner = self.create_scanner(tmp_path)
+        assert self.scan(scanner, index)["unchanged"] == 2
+
+    def test_failed_index_is_retried(self, tmp_path):
+        docs_dir, scanner = self.create_scanner(tmp_path)
+        (docs_dir / "a.txt").write_text("first")
+
+        result = self.scan(scanner, FakeIndex(fail={"a.txt"}))
+        assert result["failed"] == 1
+
+        index = FakeIndex()
+        assert self.scan(scanner, index)["added"] == 1
+        assert [name for name, _ in index.indexed] == ["a.txt"]
+
+    def test_delete_and_collection_release(self, tmp_path):
+        docs_dir, scanner = self.create_scanner(tmp_path)
+        (docs_dir / "a.txt").write_text("same")
+        (docs_dir / "b.txt").write_text("same")
+        (docs_dir / "c.txt").write_text("other")
+        collection_name = self.get_collection_name(docs_dir / "a.txt")
+        other_collection_name = self.get_collection_name(docs_dir / "c.txt")
+        index = FakeIndex()
+        self.scan(scanner, index)
+
+        # b.txt still uses the collection
+        index.reset()
+        (docs_dir / "a.txt").unlink()
+        result = self.scan(scanner, index)
+        assert result["deleted"] == 1
+        assert index.removed_files == [("a.txt", collection_name)]
+        assert index.removed_collections == []
+
+        index.reset()
+        (docs_dir / "b.txt").unlink()
+        result = self.scan(scanner, index)
+        assert result["deleted"] == 1
+        assert index.removed_collections == [collection_name]
+
+        # Scanning a subpath only removes files under it
+        index.reset()
+        (docs_dir / "sub").mkdir()
+        result = self.scan(scanner, index, paths=[docs_dir / "sub"])
+        assert result["deleted"] == 0
+        assert index.removed_collections == []
+
+        index.reset()
+        (docs_dir / "c.txt").unlink()
+        self.scan(scanner, index)
+        assert index.removed_collections == [other_collection_name]
+
+    def test_duplicate_content_is_indexed_in_order(self, tmp_path):
+        docs_dir, scanner = self.create_scanner(tmp_path)
+        for name in ["c.txt", "a.txt", "b.txt"]:
+            (docs_dir / name).write_text("same")
+        (docs_dir / "d.txt").write_text("other")
+        collection_name = self.get_collection_name(docs_dir / "a.txt")
+        index = FakeIndex(delay=0.05)
+
+        result = self.scan(scanner, index)
+        assert result["added"] == 4
+
+        # One at a time, in path order, for the shared collection
+        assert index.max_active[collection_name] == 1
+        assert [
+            name for name, indexed in index.indexed if indexed == collection_name
+        ] == ["a.txt", "b.txt", "c.txt"]
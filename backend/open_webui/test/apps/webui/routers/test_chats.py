@@ -234,3 +234,272 @@ class TestChats(AbstractPostgresTest):
 
         chat = self.chats.get_chat_by_id(chat_id)
         assert chat.share_id is None
+
+
+def create_message(id, parent_id, role, content, timestamp):
+    return {
+        "id": id,
+        "parentId": parent_id,
+        "childrenIds": [],
+        "role": role,
+        "content": content,
+        "timestamp": timestamp,
+    }
+
+
+class TestChatMessages(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/chats"
+
+    def setup_class(cls):
+        super().setup_class()
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.apps.webui.models.chats import ChatForm, Chats
+
+        self.chats = Chats
+        question = create_message("a", None, "user", "question", 100)
+        question["childrenIds"] = ["b"]
+        answer = create_message("b", "a", "assistant", "answer", 101)
+        # Stored out of order; read back in timestamp order
+        self.messages = {"b": answer, "a": question}
+        self.chat_id = self.chats.insert_new_chat(
+            "2",
+            ChatForm(
+                **{
+                    "chat": {
+                        "title": "chat with history",
+                        "history": {"currentId": "b", "messages": self.messages},
+                        "messages": [question, answer],
+                    }
+                }
+            ),
+        ).id
+
+    def get_message_rows(self, chat_id):
+        from open_webui.apps.webui.internal.db import Session
+        from open_webui.apps.webui.models.chats import ChatMessage
+
+        Session.commit()
+        return {
+            message.id: message
+            for message in Session.query(ChatMessage).filter_by(chat_id=chat_id)
+        }
+
+    def get_chat(self, chat_id):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url(f"/{chat_id}"))
+        assert response.status_code == 200
+        return response.json()["chat"]
+
+    def test_split_and_join(self):
+        import json
+
+        stored = json.loads(self.chats.get_chat_by_id(self.chat_id).chat)
+        assert stored["history"] == {"currentId": "b"}
+        assert "messages" not in stored
+
+        rows = self.get_message_rows(self.chat_id)
+        assert set(rows) == {"a", "b"}
+        assert rows["b"].parent_id == "a"
+        assert rows["b"].content == "answer"
+        assert rows["a"].created_at == 100
+
+        chat = self.get_chat(self.chat_id)
+        assert list(chat["history"]["messages"]) == ["a", "b"]
+        assert chat["history"]["messages"] == self.messages
+        assert [message["id"] for message in chat["messages"]] == ["a", "b"]
+
+    def test_save_replaces_messages(self):
+        question = {**self.messages["a"], "content": "edited", "childrenIds": []}
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}"),
+                json={
+                    "chat": {"history": {"currentId": "a", "messages": {"a": question}}}
+                },
+            )
+        assert response.status_code == 200
+        assert response.json()["chat"]["history"]["messages"] == {"a": question}
+
+        rows = self.get_message_rows(self.chat_id)
+        assert set(rows) == {"a"}
+        assert rows["a"].content == "edited"
+
+    def test_save_skips_unchanged_messages(self):
+        from open_webui.apps.webui.internal.db import Session
+        from open_webui.apps.webui.models.chats import ChatMessage
+
+        Session.query(ChatMessage).filter_by(chat_id=self.chat_id).update(
+            {"updated_at": 0}
+        )
+        Session.commit()
+
+        answer = {**self.messages["b"], "content": "better answer"}
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}"),
+                json={
+                    "chat": {
+                        "history": {
+                            "currentId": "b",
+                            "messages": {**self.messages, "b": answer},
+                        }
+                    }
+                },
+            )
+        assert response.status_code == 200
+
+        rows = self.get_message_rows(self.chat_id)
+        assert rows["a"].updated_at == 0
+        assert rows["b"].updated_at > 0
+        assert rows["b"].content == "better answer"
+
+    def test_upsert_links_children(self):
+        follow_up = create_message("c", "b", "user", "follow up", 102)
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}/messages"),
+                json={"messages": {"c": follow_up}, "current_id": "c"},
+            )
+        assert response.status_code == 200
+        assert response.json()["id"] == self.chat_id
+
+        chat = self.get_chat(self.chat_id)
+        assert chat["history"]["currentId"] == "c"
+        assert chat["history"]["messages"]["b"]["childrenIds"] == ["c"]
+        assert chat["history"]["messages"]["c"] == follow_up
+        assert [message["id"] for message in chat["messages"]] == ["a", "b", "c"]
+
+    def test_patch_message(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}/messages/b"),
+                json={"message": {"content": "patched", "done": True}},
+            )
+        assert response.status_code == 200
+        assert response.json() == {
+            **self.messages["b"],
+            "content": "patched",
+            "done": True,
+        }
+
+        chat = self.get_chat(self.chat_id)
+        assert chat["history"]["messages"]["b"]["content"] == "patched"
+        assert chat["history"]["messages"]["a"] == self.messages["a"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}/messages/missing"),
+                json={"message": {"content": "patched"}},
+            )
+        assert response.status_code == 404
+
+    def test_share_copies_messages(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}/share")
+            )
+        assert response.status_code == 200
+        share_id = response.json()["id"]
+        assert share_id != self.chat_id
+        assert response.json()["chat"]["history"]["messages"] == self.messages
+
+        assert set(self.get_message_rows(share_id)) == {"a", "b"}
+
+        # Rows are copied, so editing the chat leaves the shared copy as is
+        self.chats.update_message_by_id(self.chat_id, "b", {"content": "edited"})
+        assert self.get_message_rows(share_id)["b"].content == "answer"
+
+    def test_delete_removes_messages(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{self.chat_id}/share")
+            )
+        share_id = response.json()["id"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.delete(self.create_url(f"/{self.chat_id}"))
+        assert response.status_code == 200
+        assert response.json() is True
+
+        assert self.get_message_rows(self.chat_id) == {}
+        assert self.get_message_rows(share_id) == {}
+
+
+class TestChatPagination(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/chats"
+
+    def setup_class(cls):
+        super().setup_class()
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.apps.webui.internal.db import Session
+        from open_webui.apps.webui.models.chats import Chat, ChatForm, Chats
+
+        # Ties on updated_at are ordered by id, so they split across pages
+        updated_at = [300, 200, 200, 200, 100]
+        self.chat_ids = []
+        for i, timestamp in enumerate(updated_at):
+            chat = Chats.insert_new_chat(
+                "2", ChatForm(**{"chat": {"title": f"chat{i}"}})
+            )
+            Session.query(Chat).filter_by(id=chat.id).update({"updated_at": timestamp})
+            self.chat_ids.append((timestamp, chat.id))
+        Session.commit()
+
+        self.expected = [id for _, id in sorted(self.chat_ids, reverse=True)]
+
+    def get_pages(self, path, limit):
+        ids = []
+        cursor = None
+        while True:
+            query_params = {"limit": limit}
+            if cursor:
+                query_params["cursor"] = cursor
+            with mock_webui_user(id="2"):
+                response = self.fast_api_client.get(self.create_url(path, query_params))
+            assert response.status_code == 200
+            assert len(response.json()) <= limit
+            ids.extend(chat["id"] for chat in response.json())
+
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return ids
+
+    def test_keyset_pages(self):
+        for limit in (1, 2, 3, 5):
+            assert self.get_pages("/list", limit) == self.expected
+            assert self.get_pages("/all", limit) == self.expected
+
+    def test_no_cursor_after_last_page(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/list", {"limit": 10}))
+        assert response.status_code == 200
+        assert [chat["id"] for chat in response.json()] == self.expected
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_page_and_cursor(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url(
+                    "/list", {"page": 1, "cursor": f"200:{self.expected[1]}"}
+                )
+            )
+        assert response.status_code == 400
+
+    def test_invalid_limit(self):
+        for limit in (0, -1):
+            with mock_webui_user(id="2"):
+                response = self.fast_api_client.get(
+                    self.create_url("/list", {"limit": limit})
+                )
+            assert response.status_code == 422
+
+    def test_invalid_cursor(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/list", {"cursor": "not-a-cursor"})
+            )
+        assert response.status_code == 400
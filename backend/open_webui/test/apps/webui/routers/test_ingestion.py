@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+from test.util.mock_user import mock_webui_user
+
+
+def run_queue(queue, job_ids, until, timeout=10):
+    async def main():
+        queue.start()
+        for job_id in job_ids:
+            queue.enqueue(job_id)
+
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+class TestIngestion(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/files"
+
+    def setup_class(cls):
+        super().setup_class()
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.apps.webui.models.jobs import JobForm, Jobs, JobStatus
+
+        self.jobs = Jobs
+        self.status = JobStatus
+        self.job = Jobs.insert_new_job("2", JobForm(file_id="file-1"))
+
+    def create_queue(self, **kwargs):
+        from open_webui.apps.webui.ingestion import IngestionQueue
+
+        return IngestionQueue(workers=2, **kwargs)
+
+    def is_finished(self, *job_ids):
+        def finished():
+            return all(
+                self.jobs.get_job_by_id(job_id).status
+                in (self.status.COMPLETED, self.status.FAILED)
+                for job_id in job_ids
+            )
+
+        return finished
+
+    def test_enqueue(self, monkeypatch):
+        processed = []
+        monkeypatch.setattr(
+            "open_webui.apps.webui.ingestion.process_ingestion_job",
+            lambda job, on_progress: processed.append(job.id),
+        )
+
+        queue = self.create_queue()
+        run_queue(queue, [self.job.id], self.is_finished(self.job.id))
+
+        job = self.jobs.get_job_by_id(self.job.id)
+        assert job.status == self.status.COMPLETED
+        assert job.progress == 100
+        assert job.attempts == 1
+        assert job.worker == queue.worker_id
+        assert processed == [self.job.id]
+
+    def test_claim_is_exclusive(self):
+        assert self.jobs.claim_job(self.job.id, "worker-a", 60) is not None
+        assert self.jobs.claim_job(self.job.id, "worker-b", 60) is None
+
+        # Worker a stopped renewing its claim
+        self.jobs.update_job_by_id(self.job.id, {"claimed_at": 0})
+        job = self.jobs.claim_job(self.job.id, "worker-b", 60)
+        assert job is not None
+        assert job.worker == "worker-b"
+        assert job.attempts == 2
+        assert self.jobs.renew_claim(self.job.id, "worker-a") is False
+
+    def test_resume(self, monkeypatch):
+        from open_webui.apps.webui.models.jobs import JobForm
+
+        processed = []
+        monkeypatch.setattr(
+            "open_webui.apps.webui.ingestion.process_ingestion_job",
+            lambda job, on_progress: processed.append(job.id),
+        )
+
+        # Left processing by a worker that died
+        stale = self.jobs.insert_new_job("2", JobForm(file_id="file-2"))
+        self.jobs.update_job_by_id(
+            stale.id,
+            {"status": self.status.PROCESSING, "worker": "dead", "claimed_at": 0},
+        )
+        # Being processed by a live worker
+        held = self.jobs.insert_new_job("2", JobForm(file_id="file-3"))
+        self.jobs.update_job_by_id(
+            held.id,
+            {
+                "status": self.status.PROCESSING,
+                "worker": "alive",
+                "claimed_at": int(time.time()),
+            },
+        )
+
+        # Not enqueued: picked up by the startup sweep
+        run_queue(self.create_queue(), [], self.is_finished(self.job.id, stale.id))
+
+        assert sorted(processed) == sorted([self.job.id, stale.id])
+        assert self.jobs.get_job_by_id(stale.id).status == self.status.COMPLETED
+        held = self.jobs.get_job_by_id(held.id)
+        assert held.status == self.status.PROCESSING
+        assert held.worker == "alive"
+
+    def test_failure(self, monkeypatch):
+        def fail(job, on_progress):
+            raise Exception("extraction failed")
+
+        monkeypatch.setattr(
+            "open_webui.apps.webui.ingestion.process_ingestion_job", fail
+        )
+
+        run_queue(
+            self.create_queue(max_retries=0),
+            [self.job.id],
+            self.is_finished(self.job.id),
+        )
+
+        job = self.jobs.get_job_by_id(self.job.id)
+        assert job.status == self.status.FAILED
+        assert job.error == "extraction failed"
+        assert job.attempts == 1
+
+    def test_failure_backs_off(self, monkeypatch):
+        def fail(job, on_progress):
+            raise Exception("extraction failed")
+
+        monkeypatch.setattr(
+            "open_webui.apps.webui.ingestion.process_ingestion_job", fail
+        )
+
+        def attempted():
+            job = self.jobs.get_job_by_id(self.job.id)
+            return job.attempts == 1 and job.status == self.status.PENDING
+
+        run_queue(self.create_queue(max_retries=1), [self.job.id], attempted)
+
+        job = self.jobs.get_job_by_id(self.job.id)
+        assert job.status == self.status.PENDING
+        assert job.error == "extraction failed"
+        assert job.worker is None
+        assert job.available_at > time.time()
+        # Not claimable until the backoff has passed
+        assert self.jobs.claim_job(self.job.id, "worker-b", 60) is None
+
+    def test_delete_hands_over_job(self):
+        from open_webui.apps.webui.models.files import FileForm, Files
+
+        # Two uploads of the same content waiting on the job of the first
+        for file_id in ("file-1", "file-2"):
+            Files.insert_new_file(
+                "2",
+                FileForm(
+                    id=file_id,
+                    filename=f"{file_id}.pdf",
+                    hash="hash",
+                    meta={"job_id": self.job.id, "status": self.status.PENDING},
+                ),
+            )
+
+        # Only the owner (or an admin) may delete an upload
+        with mock_webui_user(id="3"):
+            response = self.fast_api_client.delete(self.create_url("/file-1"))
+        assert response.status_code == 404
+        assert Files.get_file_by_id("file-1") is not None
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.delete(self.create_url("/file-1"))
+        assert response.status_code == 200
+        assert Files.get_file_by_id("file-1") is None
+        assert self.jobs.get_job_by_id(self.job.id).file_id == "file-2"
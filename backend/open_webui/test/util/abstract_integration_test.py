@@ -148,8 +148,10 @@ class AbstractPostgresTest(AbstractIntegrationTest):
         tables = [
             "auth",
             "chat",
+            "chat_message",
             "chatidtag",
             "document",
+            "ingestion_job",
             "memory",
             "model",
             "prompt",
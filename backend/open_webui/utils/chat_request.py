@@ -0,0 +1,124 @@
+import json
+from typing import Optional
+
+from fastapi import Request
+from pydantic import BaseModel
+
+
+class ChatRequestContext:
+    """
+    A chat completion request body parsed once by the first middleware that
+    needs it and shared with the rest of the chain through `request.state`.
+
+    Middlewares mutate `body` in place and the chat handlers read it back
+    with `get_chat_request_body`, so the JSON is decoded once per request and
+    only serialized again if something downstream reads the raw body.
+    """
+
+    def __init__(self, body: dict):
+        self.body = body
+        self.user = None
+        self.model: Optional[dict] = None
+        # Extra items streamed to the client ahead of the completion
+        self.data_items: list[dict] = []
+
+    def serialize(self) -> bytes:
+        return json.dumps(self.body).encode("utf-8")
+
+    def get_receive(self, receive):
+        """
+        ASGI receive callable replaying the (possibly modified) body to the
+        downstream app, serialized lazily on first read.
+        """
+        if getattr(receive, "chat_request", None) is self:
+            return receive
+
+        sent = False
+
+        async def _receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {
+                    "type": "http.request",
+                    "body": self.serialize(),
+                    "more_body": False,
+                }
+            # Body already consumed; pass through disconnect notifications
+            return await receive()
+
+        _receive.chat_request = self
+        _receive.receive = receive
+        return _receive
+
+
+async def wait_for_disconnect(receive):
+    """
+    Return once the client disconnects. Only valid after the request body
+    has been read into the context, so the next message is a disconnect.
+    """
+    # Skip the replaying wrappers and wait on the server's receive
+    while hasattr(receive, "chat_request"):
+        receive = receive.receive
+
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def get_chat_request_context(request: Request) -> ChatRequestContext:
+    context = getattr(request.state, "chat_request", None)
+    if context is None:
+        body = await request.body()
+        context = ChatRequestContext(json.loads(body) if body else {})
+        request.state.chat_request = context
+
+        # The body length changes once middlewares rewrite it; the replayed
+        # body is delimited by `more_body` instead.
+        request.scope["headers"] = [
+            (k, v) for k, v in request.scope["headers"] if k != b"content-length"
+        ]
+    return context
+
+
+async def get_chat_request_body(request: Request) -> dict:
+    """
+    FastAPI dependency returning the parsed chat request body, reusing the
+    one parsed by the middlewares when available.
+    """
+    context = getattr(request.state, "chat_request", None)
+    if context is not None:
+        return context.body
+
+    body = await request.body()
+    return json.loads(body) if body else {}
+
+
+def _inline_refs(schema, defs: dict):
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_refs(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+        return {k: _inline_refs(v, defs) for k, v in schema.items() if k != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(item, defs) for item in schema]
+    return schema
+
+
+def get_chat_request_openapi_extra(model: Optional[type[BaseModel]] = None) -> dict:
+    """
+    `openapi_extra` documenting the JSON body of a route that reads it with
+    `get_chat_request_body` rather than a body parameter: the schema of
+    `model`, or any object.
+    """
+    schema = {"type": "object"}
+    if model is not None:
+        schema = model.model_json_schema()
+        schema = _inline_refs(schema, schema.get("$defs", {}))
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}},
+        }
+    }
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from open_webui.config import EVENT_LOOP_MONITOR_INTERVAL
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Single stalls longer than this are logged as warnings
+BLOCKED_WARNING_THRESHOLD = 1.0
+
+
+class EventLoopMonitor:
+    """
+    Measures how long the event loop is blocked by sleeping for `interval`
+    and accumulating how late each wakeup is.
+
+    `blocked` is a running total, so the blocking seen while a request was
+    being served is the difference between two readings.
+    """
+
+    def __init__(self, interval: float = EVENT_LOOP_MONITOR_INTERVAL):
+        self.interval = interval
+        self.blocked = 0.0
+        self.max_blocked = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+
+            if lag > 0:
+                self.blocked += lag
+                self.max_blocked = max(self.max_blocked, lag)
+                if lag > BLOCKED_WARNING_THRESHOLD:
+                    log.warning(f"Event loop was blocked for {lag:.3f}s")
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def to_dict(self) -> dict:
+        return {
+            "interval": self.interval,
+            "blocked": self.blocked,
+            "max_blocked": self.max_blocked,
+        }
+
+
+LOOP_MONITOR = EventLoopMonitor()
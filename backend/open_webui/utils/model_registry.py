@@ -0,0 +1,117 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from open_webui.config import MODELS_BACKEND_TIMEOUT, MODELS_CACHE_TTL
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ModelRegistry:
+    """
+    TTL cache around the aggregated model list.
+
+    - Fresh entries are served as is.
+    - Stale entries are served immediately while a single background refresh
+      runs (stale-while-revalidate).
+    - `invalidate()` forces the next `get()` to wait for a new list; call it
+      whenever models, functions or backend URLs are edited.
+    - `fetch_backend()` keeps the last good result per backend, so one slow
+      or failing backend does not empty the whole list.
+    """
+
+    def __init__(
+        self,
+        ttl: int = MODELS_CACHE_TTL,
+        backend_timeout: int = MODELS_BACKEND_TIMEOUT,
+    ):
+        self.ttl = ttl
+        self.backend_timeout = backend_timeout
+        self.loader: Optional[Callable[[], Awaitable[list]]] = None
+
+        self.models: Optional[list] = None
+        self.updated_at = 0.0
+        self.version = 0
+        self.loaded_version = -1
+
+        self.backend_models: dict[str, list] = {}
+
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.background_task: Optional[asyncio.Task] = None
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.updated_at > self.ttl
+
+    def is_invalidated(self) -> bool:
+        return self.models is None or self.loaded_version != self.version
+
+    def invalidate(self):
+        self.version += 1
+
+    async def _refresh(self):
+        version = self.version
+        try:
+            models = await self.loader()
+            self.models = models
+            self.updated_at = time.monotonic()
+            self.loaded_version = version
+        except Exception as e:
+            log.exception(f"Failed to refresh models: {e}")
+            if self.models is None:
+                self.models = []
+
+    def refresh(self) -> asyncio.Task:
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self._refresh())
+        return self.refresh_task
+
+    async def get(self) -> list:
+        # A refresh may already be in flight with data read before the
+        # invalidation, so allow one more round before serving.
+        for _ in range(2):
+            if not self.is_invalidated():
+                break
+            # Shielded so a cancelled request does not cancel the shared refresh
+            await asyncio.shield(self.refresh())
+
+        if self.is_stale():
+            self.refresh()
+
+        return self.models
+
+    async def fetch_backend(self, name: str, fetch: Callable[[], Awaitable[list]]):
+        try:
+            models = await asyncio.wait_for(fetch(), timeout=self.backend_timeout)
+            self.backend_models[name] = copy.deepcopy(models)
+            return models
+        except Exception as e:
+            log.error(f"Failed to fetch models from {name}, using last known: {e}")
+            return copy.deepcopy(self.backend_models.get(name, []))
+
+    async def _run_background_refresh(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.exception(e)
+
+    def start(self):
+        if self.background_task is None or self.background_task.done():
+            self.background_task = asyncio.create_task(self._run_background_refresh())
+
+    async def stop(self):
+        for task in (self.background_task, self.refresh_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+
+MODEL_REGISTRY = ModelRegistry()
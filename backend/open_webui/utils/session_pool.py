@@ -0,0 +1,77 @@
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from open_webui.config import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    AIOHTTP_CLIENT_TIMEOUT,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_base_url(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class ClientSessionPool:
+    """
+    One long-lived aiohttp session per upstream (scheme://host:port), so
+    proxied requests reuse keep-alive connections and cached DNS lookups
+    instead of paying TCP/TLS setup on every call.
+    Sessions are bound to the event loop they are created on; open and
+    close the pool from the application lifespan.
+    """
+
+    def __init__(self):
+        self.sessions: dict[str, aiohttp.ClientSession] = {}
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=AIOHTTP_CLIENT_POOL_LIMIT,
+                limit_per_host=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=AIOHTTP_CLIENT_DNS_CACHE_TTL,
+            ),
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            trust_env=True,
+        )
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+        session = self.sessions.get(base_url)
+        if session is None or session.closed:
+            log.debug(f"opening client session for {base_url}")
+            session = self._create_session()
+            self.sessions[base_url] = session
+        return session
+
+    def open(self, urls: list[str]):
+        for url in urls:
+            if url:
+                self.get_session(url)
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        for base_url, session in sessions.items():
+            try:
+                await session.close()
+            except Exception as e:
+                log.error(f"Error closing client session for {base_url}: {e}")
+
+
+CLIENT_SESSIONS = ClientSessionPool()
+
+
+async def release_response(response: Optional[aiohttp.ClientResponse]):
+    # Hand the connection back to the pool instead of closing the session
+    if response:
+        response.release()
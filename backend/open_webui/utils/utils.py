@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import threading
+import time
 import uuid
 from datetime import UTC, datetime, timedelta
 from typing import Optional, Union
@@ -6,13 +9,20 @@ from typing import Optional, Union
 import jwt
 from open_webui.apps.webui.models.users import Users
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import WEBUI_SECRET_KEY
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    WEBUI_AUTH_LAST_ACTIVE_FLUSH_INTERVAL,
+    WEBUI_SECRET_KEY,
+)
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from passlib.context import CryptContext
 
 logging.getLogger("passlib").setLevel(logging.ERROR)
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
 
 SESSION_SECRET = WEBUI_SECRET_KEY
 ALGORITHM = "HS256"
@@ -71,6 +81,58 @@ def get_http_authorization_cred(auth_header: str):
         raise ValueError(ERROR_MESSAGES.INVALID_TOKEN)
 
 
+class LastActiveTracker:
+    """
+    Coalesces users' last_active_at updates in memory and writes them in
+    one batch every `interval` seconds, instead of one write per request.
+    """
+
+    def __init__(self, interval: float = WEBUI_AUTH_LAST_ACTIVE_FLUSH_INTERVAL):
+        self.interval = interval
+        self.pending: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    def touch(self, id: str):
+        if self.interval <= 0:
+            Users.update_user_last_active_by_id(id)
+            return
+        with self.lock:
+            self.pending[id] = int(time.time())
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if pending and not Users.update_users_last_active(pending):
+            log.warning(f"Failed to update last_active_at of {len(pending)} users")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                log.exception(e)
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self.flush)
+
+
+LAST_ACTIVE_TRACKER = LastActiveTracker()
+
+
 def get_current_user(
     request: Request,
     auth_token: HTTPAuthorizationCredentials = Depends(bearer_security),
@@ -93,14 +155,14 @@ def get_current_user(
     # auth by jwt token
     data = decode_token(token)
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = Users.get_cached_user_by_id(data["id"])
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=ERROR_MESSAGES.INVALID_TOKEN,
             )
         else:
-            Users.update_user_last_active_by_id(user.id)
+            LAST_ACTIVE_TRACKER.touch(user.id)
         return user
     else:
         raise HTTPException(
@@ -110,7 +172,7 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = Users.get_cached_user_by_api_key(api_key)
 
     if user is None:
         raise HTTPException(
@@ -118,7 +180,7 @@ def get_current_user_by_api_key(api_key: str):
             detail=ERROR_MESSAGES.INVALID_TOKEN,
         )
     else:
-        Users.update_user_last_active_by_id(user.id)
+        LAST_ACTIVE_TRACKER.touch(user.id)
 
     return user
 
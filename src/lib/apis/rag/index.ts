@@ -1,4 +1,4 @@
-import { RAG_API_BASE_URL } from '$lib/constants';
+import { RAG_API_BASE_URL, WEBUI_API_BASE_URL } from '$lib/constants';
 
 export const getRAGConfig = async (token: string) => {
 	let error = null;
@@ -170,29 +170,59 @@ export const updateQuerySettings = async (token: string, settings: QuerySettings
 	return res;
 };
 
+const JOB_POLL_INTERVAL = 1000;
+
+const waitForIngestionJob = async (token: string, job_id: string) => {
+	while (true) {
+		const res = await fetch(`${WEBUI_API_BASE_URL}/files/jobs/${job_id}`, {
+			method: 'GET',
+			headers: {
+				Accept: 'application/json',
+				authorization: `Bearer ${token}`
+			}
+		});
+		if (!res.ok) throw await res.json();
+
+		const job = await res.json();
+		if (job.status === 'completed') return job;
+		if (job.status === 'failed') throw { detail: job.error ?? 'Ingestion job failed' };
+
+		await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL));
+	}
+};
+
 export const processDocToVectorDB = async (token: string, file_id: string) => {
 	let error = null;
 
-	const res = await fetch(`${RAG_API_BASE_URL}/process/doc`, {
-		method: 'POST',
-		headers: {
-			Accept: 'application/json',
-			'Content-Type': 'application/json',
-			authorization: `Bearer ${token}`
-		},
-		body: JSON.stringify({
-			file_id: file_id
-		})
-	})
-		.then(async (res) => {
-			if (!res.ok) throw await res.json();
-			return res.json();
-		})
-		.catch((err) => {
-			error = err.detail;
-			console.log(err);
-			return null;
+	const process = async () => {
+		const res = await fetch(`${RAG_API_BASE_URL}/process/doc`, {
+			method: 'POST',
+			headers: {
+				Accept: 'application/json',
+				'Content-Type': 'application/json',
+				authorization: `Bearer ${token}`
+			},
+			body: JSON.stringify({
+				file_id: file_id
+			})
 		});
+		if (!res.ok) throw await res.json();
+		return { accepted: res.status === 202, body: await res.json() };
+	};
+
+	const res = await (async () => {
+		let { accepted, body } = await process();
+		// The upload is still being extracted; wait for its job, then index it
+		while (accepted) {
+			await waitForIngestionJob(token, body.job_id);
+			({ accepted, body } = await process());
+		}
+		return body;
+	})().catch((err) => {
+		error = err.detail;
+		console.log(err);
+		return null;
+	});
 
 	if (error) {
 		throw error;